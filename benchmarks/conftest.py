@@ -0,0 +1,23 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip('pytest_benchmark')
+sys.path.insert(0, str(Path(__file__).parent))
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from simulator import PanOsSimulator  # noqa: E402
+
+
+@pytest.fixture(scope='session')
+def simulator():
+    with PanOsSimulator(managed_devices_count=20, device_groups_count=5, rules_count=500) as _simulator:
+        yield _simulator
+
+
+@pytest.fixture
+def panorama(simulator):
+    from pypaloalto_api.devices import Panorama
+
+    return Panorama(simulator.panorama_config(), simulator.device_config())
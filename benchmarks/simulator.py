@@ -0,0 +1,599 @@
+"""Local stand-in of PAN-OS XML API (/api/) and REST API (/restapi/vX/) for benchmarks.
+
+Replies are synthetic: a Panorama with managed firewalls, device groups and large rulebases.
+The same server answers as Panorama and as every managed firewall, managed devices ip-address points back to it.
+"""
+import gzip
+import json
+import random
+import re
+import shutil
+import ssl
+import subprocess
+import tempfile
+import threading
+import time
+import xml.etree.ElementTree as ET
+import zlib
+from collections import Counter
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from pathlib import Path
+from typing import Optional, Dict, Set
+from urllib.parse import urlparse, parse_qs
+
+from pypaloalto_api.configuration_commands import ConfigAction, split_xpath
+from pypaloalto_api.operational_commands import OPCmdBuilder
+from pypaloalto_api.snapshot import ConfigSnapshot
+
+CONFIG_LOCK_ERROR = 'Timed out while getting config lock. Please try again.'
+API_KEY = 'SIMULATOR-API-KEY'
+
+
+def make_rule_xml(index: int, device_group_name: str = 'DG-0') -> str:
+    return f'<entry name="rule-{index}" uuid="{device_group_name}-uuid-{index}">' \
+           f'<from><member>trust</member></from><to><member>untrust</member></to>' \
+           f'<source><member>10.{index // 65536 % 256}.{index // 256 % 256}.{index % 256}</member></source>' \
+           f'<destination><member>any</member></destination><source-user><member>any</member></source-user>' \
+           f'<service><member>application-default</member></service>' \
+           f'<application><member>web-browsing</member><member>ssl</member></application>' \
+           f'<action>allow</action><tag><member>bench</member></tag>' \
+           f'<description>Synthetic rule {index}</description>' \
+           f'<profile-setting><group><member>default</member></group></profile-setting></entry>'
+
+
+def make_rulebase_reply(rules_count: int, device_group_name: str = 'DG-0') -> bytes:
+    _rules = ''.join(make_rule_xml(x, device_group_name) for x in range(rules_count))
+    return f'<response status="success"><result total-count="1" count="1"><rules>{_rules}</rules>' \
+           f'</result></response>'.encode()
+
+
+class PanOsSimulator:
+    """Threaded HTTPS server with canned and synthetic replies.
+
+    latency_seconds - delay before every reply.
+    error_rate - share of replies with status="error".
+    config_lock_failures - count of next config modifications answered with config lock timeout.
+    compression - 'gzip' or 'deflate' to compress replies of clients accepting it.
+    """
+
+    def __init__(self, managed_devices_count: int = 4, device_groups_count: int = 2, rules_count: int = 100,
+                 latency_seconds: float = 0.0, error_rate: float = 0.0, config_lock_failures: int = 0,
+                 logs_count: int = 1000,
+                 use_tls: bool = True, compression: str = ''):
+        self.managed_devices_count = managed_devices_count
+        self.device_groups_count = device_groups_count
+        self.rules_count = rules_count
+        self.latency_seconds = latency_seconds
+        self.error_rate = error_rate
+        self.config_lock_failures = config_lock_failures
+        self.logs_count = logs_count
+        self._log_jobs: Dict[str, dict] = {}
+        self._commit_jobs: Dict[str, dict] = {}
+        self.use_tls = use_tls
+        self.compression = compression
+        self.requests_counter = Counter()
+        self._lock = threading.Lock()
+        self._job_id = 0
+        self.registered_ips: Dict[str, Set[str]] = {}
+        self.policy_push_count = 0
+        # Committed config version and locations with not committed candidate changes
+        self.config_version = 1
+        self.changed_locations: Set[str] = set()
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+        self._temp_dir = ''
+        self._config_snapshot = ConfigSnapshot(self._build_config())
+
+    @property
+    def address(self) -> str:
+        """host:port to use as IPv4 in device config"""
+        return f'127.0.0.1:{self._server.server_address[1]}'
+
+    def panorama_config(self) -> dict:
+        return {'ApiKey': API_KEY, 'ApiVersion': '10.1', 'IPv4': self.address, 'RequestsDelaySeconds': 0}
+
+    def device_config(self) -> dict:
+        return {'ApiKey': API_KEY, 'ApiVersion': '10.1', 'RequestsDelaySeconds': 0}
+
+    def serial(self, index: int) -> str:
+        return f'0071{index:08d}'
+
+    def device_group_name(self, index: int) -> str:
+        return f'DG-{index}'
+
+    def start(self) -> 'PanOsSimulator':
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), self._make_handler())
+        self._server.daemon_threads = True
+
+        if self.use_tls:
+            self._server.socket = self._make_ssl_context().wrap_socket(self._server.socket, server_side=True)
+
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+        if self._temp_dir:
+            shutil.rmtree(self._temp_dir, ignore_errors=True)
+            self._temp_dir = ''
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    def _make_ssl_context(self) -> ssl.SSLContext:
+        self._temp_dir = tempfile.mkdtemp(prefix='panos_simulator_')
+        _cert_file = str(Path(self._temp_dir) / 'cert.pem')
+        _key_file = str(Path(self._temp_dir) / 'key.pem')
+        subprocess.run(
+            ['openssl', 'req', '-x509', '-newkey', 'rsa:2048', '-nodes', '-keyout', _key_file, '-out', _cert_file,
+             '-days', '1', '-subj', '/CN=localhost'],
+            check=True, capture_output=True,
+        )
+        _context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        _context.load_cert_chain(_cert_file, _key_file)
+        return _context
+
+    def next_job_id(self) -> int:
+        with self._lock:
+            self._job_id += 1
+            return self._job_id
+
+    def _build_config(self) -> ET.Element:
+        _config = ET.Element('config')
+        _mgt_devices = ET.SubElement(ET.SubElement(_config, 'mgt-config'), 'devices')
+
+        for _index in range(self.managed_devices_count):
+            _device = ET.SubElement(_mgt_devices, 'entry', {'name': self.serial(_index)})
+            _vsys = ET.SubElement(ET.SubElement(_device, 'vsys'), 'entry', {'name': 'vsys1'})
+            _tags = ET.SubElement(_vsys, 'tags')
+            ET.SubElement(_tags, 'member').text = f'site-{_index % 3}'
+
+        _localhost = ET.SubElement(ET.SubElement(_config, 'devices'), 'entry', {'name': 'localhost.localdomain'})
+        _device_groups = ET.SubElement(_localhost, 'device-group')
+
+        for _index in range(self.device_groups_count):
+            _name = self.device_group_name(_index)
+            _device_group = ET.SubElement(_device_groups, 'entry', {'name': _name})
+            _address = ET.SubElement(_device_group, 'address')
+
+            for _address_index in range(10):
+                _entry = ET.SubElement(_address, 'entry', {'name': f'host-{_address_index}'})
+                ET.SubElement(_entry, 'ip-netmask').text = f'192.168.{_index}.{_address_index}/32'
+
+            _rules_xml = ET.fromstring(
+                f'<rules>{"".join(make_rule_xml(x, _name) for x in range(self.rules_count))}</rules>'
+            )
+            _security = ET.SubElement(ET.SubElement(_device_group, 'pre-rulebase'), 'security')
+            _security.append(_rules_xml)
+            ET.SubElement(ET.SubElement(ET.SubElement(_device_group, 'post-rulebase'), 'security'), 'rules')
+
+        ET.SubElement(_config, 'shared')
+        return _config
+
+    # Replies
+
+    def system_info(self, target: str = '') -> str:
+        if target:
+            _index = int(target[4:])
+            return f'<response status="success"><result><system><hostname>fw-{_index}</hostname>' \
+                   f'<ip-address>{self.address}</ip-address><model>PA-5260</model><serial>{target}</serial>' \
+                   f'<sw-version>10.1.5</sw-version><multi-vsys>off</multi-vsys></system></result></response>'
+
+        return '<response status="success"><result><system><hostname>simulator</hostname>' \
+               '<devicename>simulator</devicename><ip-address>127.0.0.1</ip-address><model>M-600</model>' \
+               '<serial>007000000000</serial><sw-version>10.1.5</sw-version><multi-vsys>off</multi-vsys>' \
+               '<system-mode>panorama</system-mode></system></result></response>'
+
+    @staticmethod
+    def ha_state() -> str:
+        return '<response status="success"><result><enabled>yes</enabled><local-info><state>active</state>' \
+               '<priority>primary</priority></local-info><peer-info><state>passive</state></peer-info>' \
+               '<running-sync>synchronized</running-sync></result></response>'
+
+    def _device_entry(self, index: int) -> str:
+        """Like real devices, md5sum of pushed policy is reported per vsys, device groups have no md5sum"""
+        return f'<entry name="{self.serial(index)}"><serial>{self.serial(index)}</serial>' \
+               f'<connected>yes</connected><hostname>fw-{index}</hostname><ip-address>{self.address}</ip-address>' \
+               f'<model>PA-5260</model><sw-version>10.1.5</sw-version><ha><state>active</state></ha>' \
+               f'<multi-vsys>no</multi-vsys><vsys><entry name="vsys1"><display-name>vsys1</display-name>' \
+               f'<shared-policy-md5sum>md5-{index}-{self.policy_push_count}</shared-policy-md5sum>' \
+               f'</entry></vsys></entry>'
+
+    def devices_connected(self) -> str:
+        _entries = ''.join(self._device_entry(x) for x in range(self.managed_devices_count))
+        return f'<response status="success"><result><devices>{_entries}</devices></result></response>'
+
+    def devicegroups(self) -> str:
+        _entries = ''
+
+        for _index in range(self.device_groups_count):
+            _devices = ''.join(
+                self._device_entry(x) for x in range(self.managed_devices_count)
+                if x % self.device_groups_count == _index
+            )
+            _entries += f'<entry name="{self.device_group_name(_index)}"><devices>{_devices}</devices></entry>'
+
+        return f'<response status="success"><result><devicegroups>{_entries}</devicegroups></result></response>'
+
+    def dg_hierarchy(self) -> str:
+        _dgs = ''.join(
+            f'<dg name="{self.device_group_name(x)}" dg_id="{x + 10}"/>' for x in range(self.device_groups_count)
+        )
+        return f'<response status="success"><result><dg-hierarchy>{_dgs}</dg-hierarchy></result></response>'
+
+    def change_summary(self) -> str:
+        with self._lock:
+            _members = ''.join(f'<member>{x}</member>' for x in sorted(self.changed_locations) if x != 'shared')
+            _shared = '<shared/>' if 'shared' in self.changed_locations else ''
+
+        return f'<response status="success"><result><summary><device-group>{_members}</device-group>{_shared}' \
+               f'</summary></result></response>'
+
+    def commit_reply(self, params: dict) -> str:
+        """Commit job is finished on the second poll. commit-all job has results of device group devices"""
+        _job_id = str(self.next_job_id())
+        _job = {'type': 'Commit', 'polls': 0, 'serials': []}
+
+        if params.get('action') == 'all':
+            _job['type'] = 'CommitAll'
+            _entry = ET.fromstring(params.get('cmd', '')).find('shared-policy/device-group/entry')
+            _serials = [x.get('name') for x in _entry.findall('devices/entry')] if _entry is not None else []
+            _job['serials'] = _serials or [self.serial(x) for x in range(self.managed_devices_count)]
+
+        with self._lock:
+            self._commit_jobs[_job_id] = _job
+
+            if _job['type'] == 'CommitAll':
+                self.policy_push_count += 1
+            else:
+                self.config_version += 1
+                self.changed_locations.clear()
+
+        return f'<response status="success" code="19"><result><msg><line>Commit job enqueued</line></msg>' \
+               f'<job>{_job_id}</job></result></response>'
+
+    def jobs(self, job_id: str = '') -> str:
+        _job_id = job_id or '1'
+        _job = self._commit_jobs.get(_job_id, {'type': 'Commit', 'polls': 1, 'serials': []})
+        _job['polls'] += 1
+
+        if _job['polls'] < 2:
+            return f'<response status="success"><result><job><id>{_job_id}</id><type>{_job["type"]}</type>' \
+                   f'<status>ACT</status><result>PEND</result><progress>50</progress></job></result></response>'
+
+        _devices = ''.join(
+            f'<entry><serial-no>{x}</serial-no><devicename>fw-{x}</devicename><status>commit succeeded</status>'
+            f'<result>OK</result></entry>' for x in _job['serials']
+        )
+        return f'<response status="success"><result><job><id>{_job_id}</id><type>{_job["type"]}</type>' \
+               f'<status>FIN</status><result>OK</result><progress>100</progress><devices>{_devices}</devices>' \
+               f'</job></result></response>'
+
+    def vsys_list(self) -> str:
+        return json.dumps({
+            '@status': 'success', '@code': '19',
+            'result': {'@total-count': '1', '@count': '1', 'entry': [{'@name': 'vsys1', 'display-name': 'vsys1'}]},
+        })
+
+    def op_reply(self, cmd: str, target: str = '') -> str:
+        """target - serial of managed device when request is proxied by panorama"""
+        if target and target not in {self.serial(x) for x in range(self.managed_devices_count)}:
+            return f'<response status="error"><msg><line>Device {target} is not connected</line></msg></response>'
+
+        if cmd == OPCmdBuilder.show_system_info():
+            return self.system_info(target)
+
+        if cmd == OPCmdBuilder.show_ha_state():
+            return self.ha_state()
+
+        if cmd in (OPCmdBuilder.show_devices_connected(), OPCmdBuilder.show_devices_all()):
+            return self.devices_connected()
+
+        if cmd == OPCmdBuilder.show_devicegroups():
+            return self.devicegroups()
+
+        if cmd == OPCmdBuilder.show_dg_hierarchy():
+            return self.dg_hierarchy()
+
+        if cmd == OPCmdBuilder.show_config_audit_info():
+            return f'<response status="success"><result><entry><version>{self.config_version}</version>' \
+                   f'<admin>admin</admin></entry></result></response>'
+
+        if cmd == OPCmdBuilder.show_config_change_summary():
+            return self.change_summary()
+
+        if cmd.startswith('<show><object><registered-ip>'):
+            _xml = ET.fromstring(cmd).find('object/registered-ip')
+            _tag = _xml.find('tag/entry')
+            return self.registered_ips_reply(int(_xml.findtext('start-point') or 1),
+                                             int(_xml.findtext('limit') or 500),
+                                             _tag.get('name') if _tag is not None else '')
+
+        if cmd.startswith('<show><jobs>'):
+            _job_id = ET.fromstring(cmd).findtext('jobs/id') or ''
+            return self.jobs(_job_id)
+
+        return '<response status="success"><result/></response>'
+
+    def registered_ips_reply(self, start_point: int = 1, limit: int = 500, tag: str = '') -> str:
+        """Returns at most limit entries starting from start_point (1 based), count is the total"""
+        with self._lock:
+            _registered_ips = [(k, v) for k, v in self.registered_ips.items() if not tag or tag in v]
+            _entries = ''.join(
+                f'<entry ip="{_ip}" from_agent="0" persistent="1"><tag>'
+                f'{"".join(f"<member>{x}</member>" for x in sorted(_tags))}</tag></entry>'
+                for _ip, _tags in _registered_ips[start_point - 1:start_point - 1 + limit]
+            )
+            _count = len(_registered_ips)
+
+        return f'<response status="success"><result>{_entries}<count>{_count}</count></result></response>'
+
+    def user_id_reply(self, cmd: str) -> str:
+        _payload = ET.fromstring(cmd).find('payload')
+
+        with self._lock:
+            for _entry in _payload.findall('register/entry'):
+                self.registered_ips.setdefault(_entry.get('ip'), set()).update(
+                    x.text for x in _entry.findall('tag/member')
+                )
+
+            for _entry in _payload.findall('unregister/entry'):
+                _tags = self.registered_ips.get(_entry.get('ip'), set())
+                _tags.difference_update(x.text for x in _entry.findall('tag/member'))
+
+                if not _tags:
+                    self.registered_ips.pop(_entry.get('ip'), None)
+
+        return '<response status="success"><result/></response>'
+
+    @staticmethod
+    def log_receive_time(seqno: int) -> str:
+        """Three logs per second"""
+        return time.strftime('%Y/%m/%d %H:%M:%S', time.gmtime(1767225600 + seqno // 3))
+
+    def log_reply(self, params: dict) -> str:
+        """Log jobs are finished on the second poll. Logs have seqno 1..logs_count (at job submit),
+        backward direction is newest first. Only receive_time leq/geq filter of query is applied"""
+        if params.get('action') == 'get':
+            with self._lock:
+                _job = self._log_jobs.get(params.get('job-id', ''))
+
+                if _job is None:
+                    return '<response status="error"><msg><line>Job not found</line></msg></response>'
+
+                _job['polls'] += 1
+
+            if _job['polls'] < 2:
+                return f'<response status="success"><result><job><id>{_job["id"]}</id><status>ACT</status>' \
+                       f'</job><log><logs count="0" progress="50"/></log></result></response>'
+
+            _seqnos = range(1, _job['logs_count'] + 1)
+            _seqnos = _seqnos if _job['direction'] == 'forward' else reversed(_seqnos)
+            _boundary = re.search(r"receive_time (leq|geq) '([^']+)'", _job['query'])
+
+            if _boundary:
+                _operator, _receive_time = _boundary.groups()
+                _seqnos = [x for x in _seqnos if (self.log_receive_time(x) <= _receive_time if _operator == 'leq'
+                                                  else self.log_receive_time(x) >= _receive_time)]
+
+            _seqnos = list(_seqnos)[_job['skip']:_job['skip'] + _job['nlogs']]
+            _entries = ''.join(
+                f'<entry logid="{x}"><seqno>{x}</seqno><receive_time>{self.log_receive_time(x)}</receive_time>'
+                f'<serial>{self.serial(0)}</serial><type>TRAFFIC</type><src>10.0.{x // 256 % 256}.{x % 256}</src>'
+                f'<dst>192.0.2.1</dst><rule>rule-{x % 100}</rule><app>ssl</app><action>allow</action>'
+                f'<bytes>{x * 10}</bytes></entry>'
+                for x in _seqnos
+            )
+            return f'<response status="success"><result><job><id>{_job["id"]}</id><status>FIN</status></job>' \
+                   f'<log><logs count="{len(_seqnos)}" progress="100">{_entries}</logs></log></result></response>'
+
+        if params.get('action') == 'finish':
+            with self._lock:
+                self._log_jobs.pop(params.get('job-id', ''), None)
+
+            return '<response status="success"><result/></response>'
+
+        _job_id = str(self.next_job_id())
+
+        with self._lock:
+            self._log_jobs[_job_id] = {
+                'id': _job_id, 'skip': int(params.get('skip', 0)), 'nlogs': int(params.get('nlogs', 20)), 'polls': 0,
+                'query': params.get('query', ''), 'direction': params.get('dir', 'backward'),
+                'logs_count': self.logs_count,
+            }
+
+        return f'<response status="success"><result><msg><line>query job enqueued with jobid {_job_id}</line>' \
+               f'</msg><job>{_job_id}</job></result></response>'
+
+    @staticmethod
+    def report_entries(rows_count: int = 10) -> str:
+        return ''.join(
+            f'<entry><app>app-{x}</app><risk-of-app>{x % 5 + 1}</risk-of-app><bytes>{(rows_count - x) * 1000}</bytes>'
+            f'<sessions>{rows_count - x}</sessions></entry>' for x in range(rows_count)
+        )
+
+    def report_reply(self, params: dict) -> str:
+        """Async report jobs are finished on the second poll"""
+        if params.get('action') == 'get':
+            with self._lock:
+                _job = self._log_jobs.get(params.get('job-id', ''))
+
+                if _job is None:
+                    return '<response status="error"><msg><line>Job not found</line></msg></response>'
+
+                _job['polls'] += 1
+
+            if _job['polls'] < 2:
+                return f'<response status="success"><result><job><id>{_job["id"]}</id><status>ACT</status>' \
+                       f'</job></result></response>'
+
+            return f'<response status="success"><result><job><id>{_job["id"]}</id><status>FIN</status></job>' \
+                   f'<report reportname="{_job["name"]}">{self.report_entries()}</report></result></response>'
+
+        if params.get('async') == 'yes':
+            _job_id = str(self.next_job_id())
+
+            with self._lock:
+                self._log_jobs[_job_id] = {'id': _job_id, 'name': params.get('reportname', ''), 'polls': 0}
+
+            return f'<response status="success"><result><job>{_job_id}</job></result></response>'
+
+        return f'<report reportname="{params.get("reportname", "")}">{self.report_entries()}</report>'
+
+    def config_reply(self, action: str, xpath: str, element: str, newname: str = '') -> (str, int):
+        if action in ('get', 'show'):
+            _reply, _status_code = self._config_snapshot.xml_api_config_request(ConfigAction(action), xpath)
+            return ET.tostring(_reply).decode(), _status_code
+
+        with self._lock:
+            if self.config_lock_failures > 0:
+                self.config_lock_failures -= 1
+                return f'<response status="error"><msg><line>{CONFIG_LOCK_ERROR}</line></msg></response>', 400
+
+            _config = self._config_snapshot.config_xml
+            _nodes = self._config_snapshot.findall(xpath)
+
+            if action == 'set' and _nodes:
+                for _element in ET.fromstring(f'<elements>{element}</elements>'):
+                    _nodes[0].append(_element)
+
+            elif action == 'delete' and _nodes:
+                _parents = {_child: _parent for _parent in _config.iter() for _child in _parent}
+
+                for _node in _nodes:
+                    _parents[_node].remove(_node)
+
+            elif action == 'edit' and _nodes:
+                _new_node = ET.fromstring(element)
+                # Like device, edit keeps uuid of the entry
+                _uuid = _nodes[0].get('uuid')
+                _nodes[0].clear()
+                _nodes[0].attrib.update(_new_node.attrib)
+
+                if _uuid is not None:
+                    _nodes[0].set('uuid', _uuid)
+
+                _nodes[0].text = _new_node.text
+                _nodes[0].extend(list(_new_node))
+
+            elif action == 'rename' and _nodes:
+                _nodes[0].set('name', newname)
+
+            self._config_snapshot = ConfigSnapshot(_config)
+            _steps = split_xpath(xpath) or []
+
+            if _steps[1:2] == [('shared', None)]:
+                self.changed_locations.add('shared')
+
+            for _index, _step in enumerate(_steps[:-1]):
+                if _step == ('device-group', None):
+                    self.changed_locations.add(_steps[_index + 1][1])
+
+        return '<response status="success" code="20"><msg>command succeeded</msg></response>', 200
+
+    def export_reply(self) -> bytes:
+        return ET.tostring(self._config_snapshot.config_xml)
+
+    def _make_handler(self):
+        _simulator = self
+
+        class _Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, *args):
+                pass
+
+            def setup(self):
+                super().setup()
+                _simulator.requests_counter['connections'] += 1
+
+            def _read_params(self) -> dict:
+                _url = urlparse(self.path)
+                _params = {k: v[0] for k, v in parse_qs(_url.query, keep_blank_values=True).items()}
+                _length = int(self.headers.get('Content-Length') or 0)
+
+                if _length:
+                    _body = self.rfile.read(_length).decode()
+                    _params.update({k: v[0] for k, v in parse_qs(_body, keep_blank_values=True).items()})
+
+                return _params
+
+            def _send(self, body: str or bytes, status_code: int = 200, content_type: str = 'application/xml'):
+                if isinstance(body, str):
+                    body = body.encode()
+
+                self.send_response(status_code)
+                self.send_header('Content-Type', content_type)
+
+                if _simulator.compression and _simulator.compression in self.headers.get('Accept-Encoding', ''):
+                    body = gzip.compress(body) if _simulator.compression == 'gzip' else zlib.compress(body)
+                    self.send_header('Content-Encoding', _simulator.compression)
+                    _simulator.requests_counter['compressed'] += 1
+
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                self._handle()
+
+            def do_POST(self):
+                self._handle()
+
+            def _handle(self):
+                _params = self._read_params()
+                _path = urlparse(self.path).path
+
+                if _simulator.latency_seconds:
+                    time.sleep(_simulator.latency_seconds)
+
+                if _path.startswith('/restapi/'):
+                    _simulator.requests_counter['restapi'] += 1
+                    return self._send(_simulator.vsys_list(), content_type='application/json')
+
+                _request_type = _params.get('type', '')
+                _simulator.requests_counter[_request_type] += 1
+
+                if _simulator.error_rate and random.random() < _simulator.error_rate:
+                    return self._send('<response status="error"><msg><line>Injected error</line></msg></response>')
+
+                if _request_type == 'keygen':
+                    return self._send(f'<response status="success"><result><key>{API_KEY}</key></result></response>')
+
+                if _request_type == 'op':
+                    return self._send(_simulator.op_reply(_params.get('cmd', ''), _params.get('target', '')))
+
+                if _request_type == 'config':
+                    _reply, _status_code = _simulator.config_reply(
+                        _params.get('action', ''), _params.get('xpath', ''), _params.get('element', ''),
+                        _params.get('newname', '')
+                    )
+                    return self._send(_reply, _status_code)
+
+                if _request_type == 'export':
+                    return self._send(_simulator.export_reply())
+
+                if _request_type == 'commit':
+                    return self._send(_simulator.commit_reply(_params))
+
+                if _request_type == 'report':
+                    return self._send(_simulator.report_reply(_params))
+
+                if _request_type == 'log':
+                    return self._send(_simulator.log_reply(_params))
+
+                if _request_type == 'user-id':
+                    return self._send(_simulator.user_id_reply(_params.get('cmd', '')))
+
+                return self._send('<response status="error"><msg><line>Unsupported request type</line></msg>'
+                                  '</response>', 400)
+
+        return _Handler
@@ -0,0 +1,52 @@
+import json
+
+import pytest
+
+from pypaloalto_api.rule_archive import RuleArchive
+from pypaloalto_api.security_rule import SecurityRuleBuilder
+from simulator import make_rulebase_reply
+
+RULES_COUNT = 10000
+
+
+@pytest.fixture(scope='module')
+def archived_rules(tmp_path_factory):
+    _rules = SecurityRuleBuilder.create_security_rules_list(make_rulebase_reply(RULES_COUNT))
+    _directory = tmp_path_factory.mktemp('archive')
+    _archive_file_name = _directory / 'rules.para'
+    _json_file_name = _directory / 'rules.json'
+    RuleArchive.write(_archive_file_name, _rules)
+
+    with open(_json_file_name, 'w', encoding='UTF-8') as _file:
+        json.dump([x.to_json() for x in _rules], _file)
+
+    return _rules, _archive_file_name, _json_file_name
+
+
+def test_json_archive_load_and_get(benchmark, archived_rules):
+    """Baseline: the whole archive is read and every rule is created to find one"""
+    _rules, _, _json_file_name = archived_rules
+
+    def _load_and_get():
+        with open(_json_file_name, 'r', encoding='UTF-8') as _file:
+            _loaded_rules = [SecurityRuleBuilder.security_rule_from_json(x) for x in json.load(_file)]
+
+        return next(x for x in _loaded_rules if x.name == 'rule-7777')
+
+    _rule = benchmark.pedantic(_load_and_get, rounds=3)
+
+    benchmark.extra_info['file_mb'] = round(_json_file_name.stat().st_size / 2 ** 20, 1)
+    assert _rule.to_dict() == _rules[7777].to_dict()
+
+
+def test_rule_archive_open_and_get(benchmark, archived_rules):
+    _rules, _archive_file_name, _ = archived_rules
+
+    def _open_and_get():
+        with RuleArchive(_archive_file_name) as _archive:
+            return _archive.get_rule('rule-7777')
+
+    _rule = benchmark(_open_and_get)
+
+    benchmark.extra_info['file_mb'] = round(_archive_file_name.stat().st_size / 2 ** 20, 1)
+    assert _rule.to_dict() == _rules[7777].to_dict()
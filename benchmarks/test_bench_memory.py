@@ -0,0 +1,85 @@
+import multiprocessing
+import tracemalloc
+import xml.etree.ElementTree as ET
+
+import pytest
+
+from pypaloalto_api.configuration_commands import ConfigAction, CCXPathBuilder, XmlApiRequestType
+from pypaloalto_api.devices import Gateway
+from pypaloalto_api.enums import RulebaseType, RuleType, HttpRequestMethod
+from pypaloalto_api.instrumentation import TransferStatsHook
+from simulator import PanOsSimulator
+
+RULES_COUNT = 5000
+
+
+def _serve_simulator(rules_count: int, addresses: multiprocessing.Queue, stop: multiprocessing.Event,
+                     compression: str = ''):
+    with PanOsSimulator(managed_devices_count=1, device_groups_count=1, rules_count=rules_count,
+                        compression=compression) as _simulator:
+        addresses.put((_simulator.address, _simulator.device_config(), _simulator.device_group_name(0)))
+        stop.wait()
+
+
+@pytest.fixture(scope='module', params=['', 'gzip'])
+def big_rulebase_simulator(request):
+    """Simulator runs in another process, so its allocations aren't traced"""
+    _addresses = multiprocessing.Queue()
+    _stop = multiprocessing.Event()
+    _process = multiprocessing.Process(target=_serve_simulator, args=(RULES_COUNT, _addresses, _stop, request.param),
+                                       daemon=True)
+    _process.start()
+
+    try:
+        yield _addresses.get(timeout=60)
+    finally:
+        _stop.set()
+        _process.join(10)
+
+
+def _measure_peak_bytes(function) -> (int, object):
+    tracemalloc.start()
+
+    try:
+        _result = function()
+        return tracemalloc.get_traced_memory()[1], _result
+    finally:
+        tracemalloc.stop()
+
+
+def test_rulebase_reply_memory(benchmark, big_rulebase_simulator):
+    """Peak memory of big reply kept as bytes against decoded text. Parsed tree dominates full request peak,
+    so reply content and full request peaks are measured separately. XML API request streams reply into parser.
+    Runs with plain and gzip compressed replies"""
+    _address, _device_config, _device_group_name = big_rulebase_simulator
+    _device = Gateway(_address, _device_config)
+    _transfer_stats = TransferStatsHook()
+    _device.add_request_hook(_transfer_stats)
+    _url = f'https://{_device.ipv4}/api/'
+    _xpath = CCXPathBuilder.location(_device_group_name) + \
+        CCXPathBuilder.rule(RulebaseType.pre_rule, RuleType.security)
+    _request_data = {'type': XmlApiRequestType.config.value, 'action': ConfigAction.get.value, 'xpath': _xpath}
+
+    _text_peak, (_text, _status_code) = _measure_peak_bytes(
+        lambda: _device.http_request(HttpRequestMethod.post, _url, _request_data)
+    )
+    _bytes_peak, (_bytes, _status_code) = _measure_peak_bytes(
+        lambda: _device.http_request(HttpRequestMethod.post, _url, _request_data, decode_content=False)
+    )
+    _text_parse_peak, _text_reply = _measure_peak_bytes(
+        lambda: ET.fromstring(_device.http_request(HttpRequestMethod.post, _url, _request_data)[0])
+    )
+    _transfer_stats.reset()
+    _bytes_parse_peak, (_bytes_reply, _status_code) = benchmark.pedantic(
+        _measure_peak_bytes, (lambda: _device.xml_api_config_request(ConfigAction.get, _xpath),), rounds=1
+    )
+
+    benchmark.extra_info['reply_mb'] = round(len(_bytes) / 2 ** 20, 1)
+    benchmark.extra_info['decoded_text_content_peak_mb'] = round(_text_peak / 2 ** 20, 1)
+    benchmark.extra_info['bytes_content_peak_mb'] = round(_bytes_peak / 2 ** 20, 1)
+    benchmark.extra_info['decoded_text_request_peak_mb'] = round(_text_parse_peak / 2 ** 20, 1)
+    benchmark.extra_info['streamed_request_peak_mb'] = round(_bytes_parse_peak / 2 ** 20, 1)
+    benchmark.extra_info['wire_mb'] = round(_transfer_stats.get_report()['config/get']['wire_bytes'] / 2 ** 20, 1)
+
+    assert _text == _bytes.decode()
+    assert len(_bytes_reply.findall('result/rules/entry')) == len(_text_reply.findall('result/rules/entry'))
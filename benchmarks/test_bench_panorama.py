@@ -0,0 +1,41 @@
+import xml.etree.ElementTree as ET
+
+from pypaloalto_api.configuration_commands import ConfigAction, CCXPathBuilder
+from pypaloalto_api.devices import Panorama
+from pypaloalto_api.enums import RulebaseType, RuleType
+from pypaloalto_api.xmlapi import XmlApiElementsBuilder
+
+
+def test_panorama_startup(benchmark, simulator):
+    _panorama = benchmark(Panorama, simulator.panorama_config(), simulator.device_config())
+
+    assert len(_panorama.managed_devices) == simulator.managed_devices_count
+    assert len(_panorama.device_groups_names) == simulator.device_groups_count
+
+
+def test_bulk_address_creation(benchmark, panorama, simulator):
+    _xpath = CCXPathBuilder.location(simulator.device_group_name(0)) + CCXPathBuilder.address()
+    _elements = [
+        XmlApiElementsBuilder.create_ip_address_xml(f'bulk-{x}', f'172.16.{x // 256}.{x % 256}/32', ('bench',))
+        for x in range(1000)
+    ]
+
+    _reply, _status_code = benchmark(panorama.xml_api_config_request, ConfigAction.set, _xpath, _elements)
+
+    assert _status_code == 200
+
+
+def test_rulebase_fetch(benchmark, panorama, simulator):
+    _xpath = CCXPathBuilder.location(simulator.device_group_name(0)) + \
+        CCXPathBuilder.rule(RulebaseType.pre_rule, RuleType.security)
+
+    _reply, _status_code = benchmark(panorama.xml_api_config_request, ConfigAction.get, _xpath)
+
+    assert len(_reply.findall('result/rules/entry')) == simulator.rules_count
+
+
+def test_export_throughput(benchmark, panorama):
+    _content, _status_code = benchmark(panorama.xml_api_export_request, {'category': 'configuration'})
+
+    assert _status_code == 200
+    assert ET.fromstring(_content).tag == 'config'
@@ -0,0 +1,33 @@
+import xml.etree.ElementTree as ET
+
+import pytest
+
+from pypaloalto_api.security_rule import SecurityRuleBuilder
+from simulator import make_rulebase_reply
+
+
+@pytest.mark.parametrize('rules_count', [1000, 10000])
+def test_rules_parsing(benchmark, rules_count):
+    _reply = ET.fromstring(make_rulebase_reply(rules_count))
+
+    _rules = benchmark(SecurityRuleBuilder.create_security_rules_list, _reply.findall('result/rules/entry'))
+
+    assert len(_rules) == rules_count
+
+
+def test_rules_parsing_in_processes(benchmark):
+    _reply = make_rulebase_reply(10000)
+
+    _rules = benchmark.pedantic(SecurityRuleBuilder.create_security_rules_list, (_reply, 4, 1000), rounds=3)
+
+    assert len(_rules) == 10000
+
+
+def test_rules_to_json(benchmark):
+    _rules = SecurityRuleBuilder.create_security_rules_list(
+        ET.fromstring(make_rulebase_reply(1000)).findall('result/rules/entry')
+    )
+
+    _jsons = benchmark(lambda: [x.to_json() for x in _rules])
+
+    assert len(_jsons) == 1000
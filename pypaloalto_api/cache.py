@@ -0,0 +1,220 @@
+import threading
+import time
+import xml.etree.ElementTree as ET
+from collections import OrderedDict
+from typing import Optional, Tuple, Hashable, Any, Callable, Dict
+
+from pypaloalto_api.configuration_commands import XmlApiConfigAction, split_xpath, join_xpath
+from pypaloalto_api.utils import SharedOnCopy
+
+CONFIG_READ_ACTIONS = (XmlApiConfigAction.get.value, XmlApiConfigAction.show.value)
+CONFIG_WRITE_ACTIONS = (
+    XmlApiConfigAction.set.value, XmlApiConfigAction.edit.value, XmlApiConfigAction.delete.value,
+    XmlApiConfigAction.rename.value, XmlApiConfigAction.move.value, XmlApiConfigAction.clone.value,
+    XmlApiConfigAction.override.value, XmlApiConfigAction.multi_move.value, XmlApiConfigAction.multi_clone.value,
+)
+
+
+class CacheStats:
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    @property
+    def hit_ratio(self) -> float:
+        _total = self.hits + self.misses
+        return self.hits / _total if _total else 0.0
+
+    def to_dict(self) -> dict:
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'expirations': self.expirations,
+            'invalidations': self.invalidations,
+            'hit_ratio': self.hit_ratio,
+        }
+
+    def __repr__(self):
+        return str(self.to_dict())
+
+
+class TtlLruCache(SharedOnCopy):
+    """Thread safe size bounded LRU cache with optional time to live for every item.
+    max_size=0 means unlimited size, ttl_seconds=None means items never expire."""
+
+    def __init__(self, max_size: int = 1024, ttl_seconds: Optional[float] = None):
+        if max_size < 0:
+            raise ValueError('max_size must be >= 0')
+
+        self._max_size = max_size
+        self._ttl_seconds = ttl_seconds
+        self._items: OrderedDict = OrderedDict()
+        self._lock = threading.RLock()
+        self._stats = CacheStats()
+        self._loading: Dict[Hashable, threading.Event] = {}
+
+    @property
+    def max_size(self) -> int:
+        return self._max_size
+
+    @property
+    def ttl_seconds(self) -> Optional[float]:
+        return self._ttl_seconds
+
+    @property
+    def stats(self) -> CacheStats:
+        return self._stats
+
+    def __len__(self):
+        return len(self._items)
+
+    def __contains__(self, key: Hashable):
+        return self.get(key, _count_stats=False) is not None
+
+    def get(self, key: Hashable, default=None, _count_stats=True):
+        with self._lock:
+            _item = self._items.get(key)
+
+            if _item is not None:
+                _expires_at, _value = _item
+
+                if _expires_at is not None and _expires_at <= time.monotonic():
+                    del self._items[key]
+
+                    if _count_stats:
+                        self._stats.expirations += 1
+
+                else:
+                    self._items.move_to_end(key)
+
+                    if _count_stats:
+                        self._stats.hits += 1
+
+                    return _value
+
+            if _count_stats:
+                self._stats.misses += 1
+
+            return default
+
+    def put(self, key: Hashable, value: Any, ttl_seconds: Optional[float] = None):
+        ttl_seconds = self._ttl_seconds if ttl_seconds is None else ttl_seconds
+        _expires_at = time.monotonic() + ttl_seconds if ttl_seconds is not None else None
+
+        with self._lock:
+            self._items[key] = (_expires_at, value)
+            self._items.move_to_end(key)
+
+            while self._max_size and len(self._items) > self._max_size:
+                self._items.popitem(last=False)
+                self._stats.evictions += 1
+
+    def get_or_load(self, key: Hashable, loader: Callable[[], Any], ttl_seconds: Optional[float] = None):
+        """Returns cached value or calls loader and caches its result. Concurrent callers of the same missing key
+        wait for one loader call instead of calling it in parallel. Loader exceptions are not cached."""
+        _missing = object()
+        _value = self.get(key, _missing)
+
+        if _value is not _missing:
+            return _value
+
+        with self._lock:
+            _event = self._loading.get(key)
+            _is_loader = _event is None
+
+            if _is_loader:
+                _event = threading.Event()
+                self._loading[key] = _event
+
+        if not _is_loader:
+            _event.wait()
+            _value = self.get(key, _missing, _count_stats=False)
+
+            if _value is not _missing:
+                return _value
+
+            # Loader failed, try by ourselves
+            return self.get_or_load(key, loader, ttl_seconds)
+
+        try:
+            _value = loader()
+            self.put(key, _value, ttl_seconds)
+            return _value
+
+        finally:
+            with self._lock:
+                del self._loading[key]
+
+            _event.set()
+
+    def pop(self, key: Hashable, default=None):
+        with self._lock:
+            _item = self._items.pop(key, None)
+
+        return default if _item is None else _item[1]
+
+    def clear(self):
+        with self._lock:
+            self._stats.invalidations += len(self._items)
+            self._items.clear()
+
+    def keys(self) -> list:
+        with self._lock:
+            return list(self._items.keys())
+
+
+def normalize_config_xpath(xpath: str) -> str:
+    """The same node written with " or ' quotes gets the same xpath. Xpaths with other predicates are kept as is"""
+    _steps = split_xpath(xpath)
+    return join_xpath(_steps) if _steps is not None else xpath
+
+
+def get_parent_xpath(xpath: str) -> Optional[str]:
+    """Normalized xpath of parent node, None if xpath can't be split"""
+    _steps = split_xpath(xpath)
+    return join_xpath(_steps[:-1]) if _steps is not None and len(_steps) > 1 else None
+
+
+def xpaths_overlap(first_xpath: str, second_xpath: str) -> bool:
+    """Returns True if one of xpath is the same node, an ancestor or a descendant of the other one"""
+    if first_xpath == second_xpath:
+        return True
+
+    _shorter, _longer = sorted((first_xpath, second_xpath), key=len)
+
+    return _longer.startswith(_shorter) and _longer[len(_shorter)] in '/['
+
+
+class ConfigCache(TtlLruCache):
+    """Read-through cache of config 'get' and 'show' replies keyed by (action, xpath).
+    Any config modification through the same device drops all cached replies with an overlapping xpath.
+    Xpaths are normalized, so quoting of entry names doesn't matter."""
+
+    def get_reply(self, action: str, xpath: str) -> Optional[Tuple[ET.Element, int]]:
+        return self.get((action, normalize_config_xpath(xpath)))
+
+    def put_reply(self, action: str, xpath: str, reply: Tuple[ET.Element, int]):
+        self.put((action, normalize_config_xpath(xpath)), reply)
+
+    def invalidate(self, xpath: Optional[str] = None, actions: Tuple[str, ...] = CONFIG_READ_ACTIONS) -> int:
+        """Drops cached replies overlapping with xpath (all replies if xpath is None).
+        Returns count of dropped replies."""
+        if xpath is not None:
+            xpath = normalize_config_xpath(xpath)
+
+        with self._lock:
+            _keys = [
+                _key for _key in self._items
+                if _key[0] in actions and (xpath is None or xpaths_overlap(_key[1], xpath))
+            ]
+
+            for _key in _keys:
+                del self._items[_key]
+
+            self._stats.invalidations += len(_keys)
+
+        return len(_keys)
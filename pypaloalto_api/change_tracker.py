@@ -0,0 +1,38 @@
+import threading
+from typing import Optional, List, Iterable, Dict
+
+from pypaloalto_api.utils import SharedOnCopy
+
+
+class ConfigChangeTracker(SharedOnCopy):
+    """xpaths of config modifications made through the device and its copies since the last commit.
+    None xpath means the modified part of config is unknown (multi-move, multi-clone)."""
+
+    def __init__(self):
+        # dict keeps recording order and finds recorded xpath in O(1)
+        self._xpaths: Dict[Optional[str], None] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._xpaths)
+
+    def record(self, xpath: Optional[str]):
+        with self._lock:
+            self._xpaths[xpath] = None
+
+    @property
+    def xpaths(self) -> List[Optional[str]]:
+        with self._lock:
+            return list(self._xpaths)
+
+    def discard(self, xpaths: Iterable[Optional[str]]):
+        """Forgets committed xpaths. Modifications recorded after commit start are kept"""
+        _xpaths = set(xpaths)
+
+        with self._lock:
+            for _xpath in _xpaths:
+                self._xpaths.pop(_xpath, None)
+
+    def clear(self):
+        with self._lock:
+            self._xpaths = {}
@@ -0,0 +1,364 @@
+import json
+import re
+import xml.etree.ElementTree as ET
+from concurrent.futures import Future
+from typing import Optional, List, Iterable, Dict, Set, Tuple
+from xml.sax.saxutils import escape, quoteattr
+
+from pypaloalto_api import logger
+from pypaloalto_api.configuration_commands import XmlApiRequestType, XmlApiXPathBuilder
+from pypaloalto_api.devices import PaloAltoDevice
+from pypaloalto_api.jobs import JobTracker, get_default_job_tracker
+from pypaloalto_api.operational_commands import OPCmdBuilder
+from pypaloalto_api.results import DeviceGroupInfo
+
+_THIS_DEVICE = re.escape(XmlApiXPathBuilder.config_this_device())
+_SCOPE_PATTERNS = (
+    ('device_groups', re.compile(_THIS_DEVICE + r"/device-group/entry\[@name='([^']+)'\]")),
+    ('templates', re.compile(_THIS_DEVICE + r"/template/entry\[@name='([^']+)'\]")),
+    ('template_stacks', re.compile(_THIS_DEVICE + r"/template-stack/entry\[@name='([^']+)'\]")),
+    ('vsys', re.compile(_THIS_DEVICE + r"/vsys/entry\[@name='([^']+)'\]")),
+)
+
+
+class CommitScope:
+    """Parts of config to commit. is_full - some changes are outside of device groups, templates and vsys,
+    so whole config must be committed"""
+
+    def __init__(self, device_groups: Iterable[str] = (), templates: Iterable[str] = (),
+                 template_stacks: Iterable[str] = (), vsys: Iterable[str] = (), is_full: bool = False):
+        self.device_groups: Set[str] = set(device_groups)
+        self.templates: Set[str] = set(templates)
+        self.template_stacks: Set[str] = set(template_stacks)
+        self.vsys: Set[str] = set(vsys)
+        self.is_full = is_full
+
+    @staticmethod
+    def from_xpaths(xpaths: Iterable[Optional[str]]) -> 'CommitScope':
+        _scope = CommitScope()
+
+        for _xpath in xpaths:
+            if _xpath is None:
+                _scope.is_full = True
+                continue
+
+            for _attribute_name, _pattern in _SCOPE_PATTERNS:
+                _match = _pattern.match(_xpath)
+
+                if _match:
+                    getattr(_scope, _attribute_name).add(_match.group(1))
+                    break
+
+            else:
+                _scope.is_full = True
+
+        return _scope
+
+    def includes(self, xpath: Optional[str]) -> bool:
+        """True if modification of xpath is committed by commit of this scope"""
+        if self.is_full:
+            return True
+
+        if xpath is None:
+            return False
+
+        for _attribute_name, _pattern in _SCOPE_PATTERNS:
+            _match = _pattern.match(xpath)
+
+            if _match:
+                return _match.group(1) in getattr(self, _attribute_name)
+
+        return False
+
+    @property
+    def is_empty(self) -> bool:
+        return not (self.is_full or self.device_groups or self.templates or self.template_stacks or self.vsys)
+
+    def __repr__(self):
+        return json.dumps({
+            'device_groups': sorted(self.device_groups),
+            'templates': sorted(self.templates),
+            'template_stacks': sorted(self.template_stacks),
+            'vsys': sorted(self.vsys),
+            'is_full': self.is_full,
+        }, indent=2)
+
+
+def _members(tag: str, names: Iterable[str]) -> str:
+    _names = sorted(names)
+
+    if not _names:
+        return ''
+
+    return f'<{tag}>{"".join(f"<member>{escape(x)}</member>" for x in _names)}</{tag}>'
+
+
+class CommitCmdBuilder:
+    @staticmethod
+    def commit(scope: Optional[CommitScope] = None, admins: Iterable[str] = (), description: str = '',
+               force: bool = False) -> str:
+        """Full commit if scope is None or full, partial commit of scope parts otherwise.
+        admins - commit only changes of these administrators"""
+        _partial = ''
+
+        if scope is not None and not scope.is_full:
+            _partial += _members('device-group', scope.device_groups)
+            _partial += _members('template', scope.templates)
+            _partial += _members('template-stack', scope.template_stacks)
+            _partial += _members('vsys', scope.vsys)
+
+        _partial += _members('admin', admins)
+        _cmd = f'<partial>{_partial}</partial>' if _partial else ''
+
+        if description:
+            _cmd += f'<description>{escape(description)}</description>'
+
+        if force:
+            _cmd = f'<force>{_cmd}</force>'
+
+        return f'<commit>{_cmd}</commit>'
+
+    @staticmethod
+    def commit_all_device_group(device_group_name: str, serials: Iterable[str] = (), include_template: bool = True,
+                                merge_with_candidate_cfg: bool = True, description: str = '') -> str:
+        """Panorama only! Push of device group to all its devices or to devices with serials.
+        Send with action=all"""
+        _devices = ''.join(f'<entry name={quoteattr(x)}/>' for x in serials)
+        _devices = f'<devices>{_devices}</devices>' if _devices else ''
+        _description = f'<description>{escape(description)}</description>' if description else ''
+
+        return f'<commit-all><shared-policy><device-group><entry name={quoteattr(device_group_name)}>{_devices}' \
+               f'</entry></device-group><include-template>{"yes" if include_template else "no"}</include-template>' \
+               f'<merge-with-candidate-cfg>{"yes" if merge_with_candidate_cfg else "no"}' \
+               f'</merge-with-candidate-cfg>{_description}</shared-policy></commit-all>'
+
+    @staticmethod
+    def commit_all_template(template_name: str, serials: Iterable[str] = (), description: str = '') -> str:
+        """Panorama only! Send with action=all"""
+        _devices = ''.join(f'<member>{escape(x)}</member>' for x in serials)
+        _devices = f'<device>{_devices}</device>' if _devices else ''
+        _description = f'<description>{escape(description)}</description>' if description else ''
+
+        return f'<commit-all><template><name>{escape(template_name)}</name>{_devices}{_description}' \
+               f'</template></commit-all>'
+
+
+class CommitDeviceResult:
+    def __init__(self, serial: str, device_name: str, status: str, result: str, details: List[str]):
+        self.serial = serial
+        self.device_name = device_name
+        self.status = status
+        self.result = result
+        self.details = details
+
+    @property
+    def is_ok(self) -> bool:
+        return self.result == 'OK'
+
+    def to_dict(self) -> dict:
+        return {
+            'serial': self.serial,
+            'device_name': self.device_name,
+            'status': self.status,
+            'result': self.result,
+            'details': self.details,
+        }
+
+    def __repr__(self):
+        return json.dumps(self.to_dict(), indent=2)
+
+
+class CommitJobResult:
+    """Finished commit job. devices - results of devices for commit-all jobs"""
+
+    def __init__(self, job_id: str, job_type: str, result: str, details: List[str],
+                 devices: List[CommitDeviceResult]):
+        self.job_id = job_id
+        self.job_type = job_type
+        self.result = result
+        self.details = details
+        self.devices = devices
+
+    @staticmethod
+    def from_xml(job: ET.Element) -> 'CommitJobResult':
+        _devices = [
+            CommitDeviceResult(
+                x.findtext('serial-no') or x.findtext('serial') or x.get('name', ''),
+                x.findtext('devicename') or '',
+                x.findtext('status') or '',
+                x.findtext('result') or '',
+                [y.text for y in x.findall('details/msg/errors/line')] +
+                [y.text for y in x.findall('details/msg/warnings/line')],
+            )
+            for x in job.findall('devices/entry')
+        ]
+
+        return CommitJobResult(
+            job.findtext('id'), job.findtext('type') or '', job.findtext('result') or '',
+            [x.text for x in job.findall('details/line') if x.text], _devices,
+        )
+
+    @property
+    def is_ok(self) -> bool:
+        return self.result == 'OK' and all(x.is_ok for x in self.devices)
+
+    @property
+    def failed_devices(self) -> List[CommitDeviceResult]:
+        return [x for x in self.devices if not x.is_ok]
+
+    def __repr__(self):
+        return json.dumps({
+            'job_id': self.job_id,
+            'job_type': self.job_type,
+            'result': self.result,
+            'details': self.details,
+            'devices': [x.to_dict() for x in self.devices],
+        }, indent=2)
+
+
+class CommitManager:
+    """Commits of one device (firewall or Panorama) and Panorama pushes to devices.
+
+    Change tracking is enabled on the device, so commit() without scope commits only device groups,
+    templates and vsys touched by config requests of this process (full commit if something else was changed).
+    Jobs are polled by job_tracker (shared process tracker by default).
+    """
+
+    def __init__(self, device: PaloAltoDevice, job_tracker: Optional[JobTracker] = None,
+                 job_timeout_seconds: Optional[float] = 1800.0, request_timeout_seconds: int = None):
+        self._device = device
+        self._job_tracker = job_tracker or get_default_job_tracker()
+        self._job_timeout_seconds = job_timeout_seconds
+        self._request_timeout_seconds = request_timeout_seconds
+        self._change_tracker = device.enable_change_tracking()
+
+    def get_pending_scope(self) -> CommitScope:
+        """Scope of modifications made through the device since the last commit of this manager"""
+        return CommitScope.from_xpaths(self._change_tracker.xpaths)
+
+    def __submit(self, cmd: str, **additional_request_data) -> Optional[str]:
+        """Returns job id, None if there is nothing to commit"""
+        _reply, _status_code = self._device.xml_api_cmd_request(
+            XmlApiRequestType.commit, cmd, request_timeout_seconds=self._request_timeout_seconds,
+            **additional_request_data
+        )
+
+        return _reply.findtext('result/job')
+
+    def __get_finished_job(self, job_id: str) -> Optional[ET.Element]:
+        _reply, _status_code = self._device.xml_api_operational_request(
+            OPCmdBuilder.show_jobs(job_id), request_timeout_seconds=self._request_timeout_seconds
+        )
+        _job = _reply.find('result/job')
+
+        return _job if _job is not None and _job.findtext('status') == 'FIN' else None
+
+    def track_job(self, job_id: str) -> Future:
+        """Returns Future of CommitJobResult"""
+        _future = Future()
+        _job_future = self._job_tracker.track(
+            (self._device.serial, self._device.ipv4, 'job', job_id), lambda: self.__get_finished_job(job_id),
+            self._job_timeout_seconds, f'Commit job {job_id}', self._device.device_name,
+        )
+
+        def _done(job_future: Future):
+            if job_future.exception() is not None:
+                _future.set_exception(job_future.exception())
+            else:
+                _future.set_result(CommitJobResult.from_xml(job_future.result()))
+
+        _job_future.add_done_callback(_done)
+
+        return _future
+
+    def wait_job(self, job_id: str) -> CommitJobResult:
+        return self.track_job(job_id).result()
+
+    def commit(self, scope: Optional[CommitScope] = None, admins: Iterable[str] = (), description: str = '',
+               force: bool = False) -> Optional[CommitJobResult]:
+        """Commits scope, pending scope if None. Returns None if there is nothing to commit.
+        Only tracked changes inside of scope are forgotten after commit"""
+        _xpaths = self._change_tracker.xpaths
+
+        if scope is None:
+            scope = CommitScope.from_xpaths(_xpaths)
+
+            if scope.is_empty and not admins and not force:
+                logger.info(f'[{self._device.device_name}]:No tracked config changes to commit.')
+                return None
+
+        if not (scope.is_empty and not admins):
+            # Empty scope without admins is a full commit
+            _xpaths = [x for x in _xpaths if scope.includes(x)]
+
+        _job_id = self.__submit(CommitCmdBuilder.commit(scope, admins, description, force))
+
+        if not _job_id:
+            logger.info(f'[{self._device.device_name}]:There are no changes to commit.')
+            self._change_tracker.discard(_xpaths)
+            return None
+
+        _result = self.wait_job(_job_id)
+
+        if _result.is_ok:
+            self._change_tracker.discard(_xpaths)
+
+        return _result
+
+    def push_device_groups(self, device_group_names: Iterable[str], serials_by_device_group: Dict[str, List[str]] = None,
+                           include_template: bool = True, description: str = '') -> Dict[str, CommitJobResult]:
+        """Panorama only! Starts commit-all job for every device group, all jobs are tracked concurrently.
+        Returns results by device group name"""
+        serials_by_device_group = serials_by_device_group or {}
+        _futures: List[Tuple[str, Future]] = []
+
+        for _device_group_name in device_group_names:
+            _cmd = CommitCmdBuilder.commit_all_device_group(
+                _device_group_name, serials_by_device_group.get(_device_group_name, ()), include_template,
+                description=description,
+            )
+            _job_id = self.__submit(_cmd, action='all')
+
+            if _job_id:
+                _futures.append((_device_group_name, self.track_job(_job_id)))
+            else:
+                logger.info(f'[{self._device.device_name}]:Nothing to push to device group {_device_group_name}.')
+
+        return {_name: _future.result() for _name, _future in _futures}
+
+    def commit_and_push(self, admins: Iterable[str] = (), description: str = '',
+                        include_template: bool = True) -> Tuple[Optional[CommitJobResult], Dict[str, CommitJobResult]]:
+        """Panorama only! Commits pending changes and pushes device groups which were changed.
+        All device groups with devices are pushed if changes outside of device groups (shared, templates...)
+        require full commit"""
+        _scope = self.get_pending_scope()
+        _commit_result = self.commit(_scope, admins, description)
+
+        if _commit_result is not None and not _commit_result.is_ok:
+            return _commit_result, {}
+
+        if _scope.is_full:
+            _reply, _status_code = self._device.xml_api_operational_request(
+                OPCmdBuilder.show_devicegroups(), request_timeout_seconds=self._request_timeout_seconds
+            )
+            _device_group_names = [x.name for x in DeviceGroupInfo.list_from_reply(_reply) if x.serials]
+        else:
+            _device_group_names = _scope.device_groups
+
+        return _commit_result, self.push_device_groups(sorted(_device_group_names), include_template=include_template,
+                                                       description=description)
+
+
+def aggregate_device_results(results: Iterable[CommitJobResult]) -> Dict[str, CommitDeviceResult]:
+    """Results of commit-all jobs by device name (serial if name is unknown). Failed result wins"""
+    _results = {}
+
+    for _job_result in results:
+        for _device_result in _job_result.devices:
+            _key = _device_result.device_name or _device_result.serial
+            _previous = _results.get(_key)
+
+            if _previous is None or _previous.is_ok:
+                _results[_key] = _device_result
+
+    return _results
@@ -1,8 +1,13 @@
+import re
 from enum import Enum
+from typing import List, Optional, Tuple
+
 from pypaloalto_api.enums import RulebaseType, RuleType
 
 from pypaloalto_api.xmlapi import PaloAltoObjectType, XPATH_BY_OBJECT_TYPE
 
+_XPATH_STEP_PATTERN = re.compile(r"/([^/\[\]]+)(?:\[@name=(?:'([^']*)'|\"([^\"]*)\")\])?")
+
 
 class XmlApiRequestType(Enum):
     keygen = 'keygen'  # Generate API keys for authentication.
@@ -165,3 +170,38 @@ class XmlApiXPathBuilder:
 class CCXPathBuilder(XmlApiXPathBuilder):
     """Just short named XmlApiXPathBuilder"""
     pass
+
+
+def split_xpath(xpath: str) -> Optional[List[Tuple[str, Optional[str]]]]:
+    """Splits xpath like /config/shared/address/entry[@name='X'] to [(tag, entry name or None), ...]
+    Returns None if xpath contains anything except tags and [@name='...'] predicates."""
+    _steps = []
+    _position = 0
+
+    for _match in _XPATH_STEP_PATTERN.finditer(xpath):
+        if _match.start() != _position:
+            return None
+
+        _name = _match.group(2) if _match.group(2) is not None else _match.group(3)
+        _steps.append((_match.group(1), _name))
+        _position = _match.end()
+
+    if _position != len(xpath) or not _steps:
+        return None
+
+    return _steps
+
+
+def join_xpath(steps: List[Tuple[str, Optional[str]]]) -> str:
+    """Reverse of split_xpath. Names are quoted with ' unless they contain it"""
+    _xpath = ''
+
+    for _tag, _name in steps:
+        if _name is None:
+            _xpath += f'/{_tag}'
+        elif "'" in _name:
+            _xpath += f'/{_tag}[@name="{_name}"]'
+        else:
+            _xpath += f"/{_tag}[@name='{_name}']"
+
+    return _xpath
@@ -1,11 +1,12 @@
 import copy
+import io
 from abc import ABC, abstractmethod
 from pathlib import Path
-from typing import List, Optional, Dict, Set
+from typing import List, Optional, Dict, Set, BinaryIO
 
 from requests.auth import HTTPBasicAuth, AuthBase
 from pypaloalto_api.configuration_commands import XmlApiConfigAction, ConfigAction, XmlApiRequestType, CCXPathBuilder
-from pypaloalto_api.enums import HaPeerState
+from pypaloalto_api.enums import HaPeerState, CircuitState
 import json
 import time
 import xml.etree.ElementTree as ET
@@ -13,13 +14,29 @@ import requests
 import urllib3
 from pypaloalto_api.enums import HttpRequestMethod
 from pypaloalto_api import settings, logger
+from pypaloalto_api.cache import ConfigCache, CONFIG_READ_ACTIONS, CONFIG_WRITE_ACTIONS, get_parent_xpath
+from pypaloalto_api.change_tracker import ConfigChangeTracker
+from pypaloalto_api.health import DeviceHealth, DeviceHealthRegistry
+from pypaloalto_api.inventory import InventoryCache, get_connected_devices_fingerprint
+from pypaloalto_api.instrumentation import RequestHook, RequestHooks, RequestInfo
+from pypaloalto_api.rate_limit import RateLimiter
+from pypaloalto_api.session import PooledHttpSession, ReplyStream
+from pypaloalto_api.tag_index import PanoramaTagIndex
+from pypaloalto_api.results import SystemInfo, HaState, ConnectedDevice, DeviceGroupInfo, JobInfo
+from pypaloalto_api.retry import RetryPolicy, DEFAULT_RETRY_POLICY, CONFIG_LOCK_RETRY_REASON, get_local_config_lock, \
+    is_read_only_request
 from pypaloalto_api.exceptions import PaloAltoApiRequestException, PaloAltoException, ReplyParsingException, \
-    EmptyReplyException
+    EmptyReplyException, DeviceUnavailableException
 from pypaloalto_api.operational_commands import OPCmdBuilder
 from pypaloalto_api.utils import ApiKeyAuth, custom_deepcopy
 
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
+# PAN-OS management web server compresses replies when asked
+REQUEST_HEADERS = {'Accept-Encoding': 'gzip, deflate'}
+# Size of decompressed reply pieces fed to XML parser
+REPLY_CHUNK_SIZE = 64 * 1024
+
 
 class VsysInfo:
     def __init__(self, vsys_name: str, vsys_display_name: str, panorama_tags: List[str]):
@@ -58,6 +75,14 @@ class PaloAltoDevice(ABC):
     _device_name: str = 'unknown'
     _hostname: str = 'unknown'
     _serial: str = 'unknown'
+    _config_cache: Optional[ConfigCache] = None
+    _request_hooks: Optional[RequestHooks] = None
+    _health: Optional[DeviceHealth] = None
+    _http_session: Optional[PooledHttpSession] = None
+    _change_tracker: Optional[ConfigChangeTracker] = None
+    _rate_limiter: Optional[RateLimiter] = None
+    retry_policy: RetryPolicy = DEFAULT_RETRY_POLICY
+    use_local_config_lock: bool = False
 
     def _read_config(self):
         if isinstance(self._self_config_file, dict):
@@ -94,6 +119,99 @@ class PaloAltoDevice(ABC):
     def ipv4(self):
         return self._ipv4
 
+    @property
+    def config_cache(self) -> Optional[ConfigCache]:
+        return self._config_cache
+
+    def enable_config_cache(self, max_size: int = 1024, ttl_seconds: Optional[float] = None) -> ConfigCache:
+        """Enables read-through cache for config 'get' and 'show' requests without elements and params.
+        Cached replies are dropped by any config modification through this device on an overlapping xpath."""
+        self._config_cache = ConfigCache(max_size, ttl_seconds)
+        return self._config_cache
+
+    def disable_config_cache(self):
+        self._config_cache = None
+
+    @property
+    def health(self) -> Optional[DeviceHealth]:
+        return self._health
+
+    def enable_health_tracking(self, failure_threshold: int = 3, reset_timeout_seconds: float = 300.0,
+                               half_open_max_probes: int = 1) -> DeviceHealth:
+        """After failure_threshold consecutive transport errors or 5xx replies requests raise
+        DeviceUnavailableException without waiting for timeouts until reset_timeout_seconds passed."""
+        self._health = DeviceHealth(failure_threshold, reset_timeout_seconds, half_open_max_probes)
+        return self._health
+
+    def disable_health_tracking(self):
+        self._health = None
+
+    @property
+    def change_tracker(self) -> Optional[ConfigChangeTracker]:
+        return self._change_tracker
+
+    def enable_change_tracking(self) -> ConfigChangeTracker:
+        """Records xpaths of successful config modifications, used to compute partial commit scope"""
+        if self._change_tracker is None:
+            self._change_tracker = ConfigChangeTracker()
+
+        return self._change_tracker
+
+    def disable_change_tracking(self):
+        self._change_tracker = None
+
+    @property
+    def http_session(self) -> Optional[PooledHttpSession]:
+        return self._http_session
+
+    def enable_connection_pooling(self, pool_maxsize: int = 10) -> PooledHttpSession:
+        """Keeps TLS connections to the device open between requests instead of new connection per request.
+        Replaces current session: requests started after the call use the new one,
+        connections of the old one are closed as soon as requests which already use them are finished"""
+        _http_session = PooledHttpSession(pool_maxsize)
+        _old_http_session, self._http_session = self._http_session, _http_session
+
+        if _old_http_session is not None:
+            _old_http_session.close()
+
+        return _http_session
+
+    def disable_connection_pooling(self):
+        _old_http_session, self._http_session = self._http_session, None
+
+        if _old_http_session is not None:
+            _old_http_session.close()
+
+    @property
+    def rate_limiter(self) -> Optional[RateLimiter]:
+        return self._rate_limiter
+
+    def enable_rate_limiting(self, requests_per_second: float, burst: int = 1) -> RateLimiter:
+        """Replaces fixed request_delay_seconds sleep before every request by token bucket rate limit"""
+        self._rate_limiter = RateLimiter(requests_per_second, burst)
+        return self._rate_limiter
+
+    def disable_rate_limiting(self):
+        self._rate_limiter = None
+
+    def _wait_for_request_slot(self):
+        if self._rate_limiter is not None:
+            self._rate_limiter.acquire()
+        else:
+            time.sleep(self.request_delay_seconds)
+
+    def _raise_if_unavailable(self):
+        if self._health is not None and not self._health.is_available:
+            self.__raise_unavailable()
+
+    def __raise_unavailable(self):
+        self._health.record_rejected()
+        raise DeviceUnavailableException(
+            f'Circuit breaker is {self._health.state.value} after {self._health.consecutive_failures} '
+            f'consecutive failures. Last error: {self._health.last_error!r}',
+            self.device_name
+        )
+
     def __get_auth(self) -> AuthBase:
         _config = self._read_config()
         api_key = _config.get('ApiKey')
@@ -109,19 +227,24 @@ class PaloAltoDevice(ABC):
             else:
                 raise Exception('Config must contains ApiKey or Login and Password!')
 
-    def update_and_get_ha_peer_state(self):
-        _ha_info, _status_code = self.xml_api_operational_request(OPCmdBuilder.show_ha_state())
-
-        if _ha_info.find('result/enabled').text == 'yes':
-            state_node = _ha_info.find('result/local-info/state')
+    def get_system_info(self, request_timeout_seconds: int = None) -> SystemInfo:
+        _reply, _status_code = self.xml_api_operational_request(OPCmdBuilder.show_system_info(),
+                                                                request_timeout_seconds=request_timeout_seconds)
+        return SystemInfo.from_reply(_reply)
 
-            if state_node is None:
-                state_node = _ha_info.find('result/group/local-info/state')
+    def get_ha_state(self, request_timeout_seconds: int = None) -> HaState:
+        _reply, _status_code = self.xml_api_operational_request(OPCmdBuilder.show_ha_state(),
+                                                                request_timeout_seconds=request_timeout_seconds)
+        return HaState.from_reply(_reply)
 
-            self._cached_ha_peer_state = HaPeerState(state_node.text)
-        else:
-            self._cached_ha_peer_state = HaPeerState.ha_not_enabled
+    def get_jobs(self, job_id=None, request_timeout_seconds: int = None) -> List[JobInfo]:
+        """All jobs if job_id is None"""
+        _reply, _status_code = self.xml_api_operational_request(OPCmdBuilder.show_jobs(job_id),
+                                                                request_timeout_seconds=request_timeout_seconds)
+        return JobInfo.list_from_reply(_reply)
 
+    def update_and_get_ha_peer_state(self):
+        self._cached_ha_peer_state = self.get_ha_state().ha_peer_state
         return self._cached_ha_peer_state
 
     def restapi_generate_key(self, user: str, password: str) -> str:
@@ -147,7 +270,8 @@ class PaloAltoDevice(ABC):
         if isinstance(data, dict):
             data = json.dumps(data)
 
-        time.sleep(self.request_delay_seconds)
+        self._raise_if_unavailable()
+        self._wait_for_request_slot()
         _url = f'https://{self._primary_ip}/restapi/v{self._restapi_version}/{route}'
         reply, status_code = self.http_request(request_method, _url, data, params, ssl_verify, request_timeout_seconds)
 
@@ -172,72 +296,388 @@ class PaloAltoDevice(ABC):
 
         return reply, status_code
 
+    def add_request_hook(self, hook: RequestHook):
+        """Hook will be called before and after every request of this device and its copies"""
+        if self._request_hooks is None:
+            self._request_hooks = RequestHooks()
+
+        self._request_hooks.add(hook)
+
+    def remove_request_hook(self, hook: RequestHook):
+        if self._request_hooks is not None:
+            self._request_hooks.remove(hook)
+
+    def _start_request_info(self, request_method: HttpRequestMethod, url: str, data: dict or str or None,
+                            params: Optional[dict] = None) -> Optional[RequestInfo]:
+        """Returns None if device has no request hooks"""
+        if not self._request_hooks:
+            return None
+
+        _request_info = RequestInfo(self.device_name, request_method, url, data, params)
+        self._request_hooks.before_request(_request_info)
+        return _request_info
+
+    def _finish_request_info(self, request_info: Optional[RequestInfo], error: Optional[BaseException] = None):
+        if request_info is not None:
+            request_info.finish(error)
+            self._request_hooks.after_request(request_info)
+
     def http_request(self, request_method: HttpRequestMethod, url: str,
                      data: dict or str or None = None, params: dict = None, ssl_verify=False,
-                     timeout_seconds: int = None) -> (str, int):
-        config_lock_max_repeats_count = 4
-        config_lock_wait_seconds = 30
-        config_lock_repeats_count = 0
+                     timeout_seconds: int = None, request_info: Optional[RequestInfo] = None,
+                     http_session: Optional[PooledHttpSession] = None,
+                     decode_content: bool = True) -> (str or bytes, int):
+        """request_info - pass it if caller reports the request to hooks by itself
+        http_session - send over this session instead of device session
+        decode_content - False to get reply content as received bytes without decoding copy"""
+        _reply = self.__tracked_http_request(request_method, url, data, params, ssl_verify, timeout_seconds,
+                                             request_info, http_session)
+
+        return self.__decode_reply(_reply) if decode_content else _reply
+
+    def __tracked_http_request(self, request_method: HttpRequestMethod, url: str, data: dict or str or None,
+                               params: Optional[dict], ssl_verify: bool, timeout_seconds: Optional[int],
+                               request_info: Optional[RequestInfo], http_session: Optional[PooledHttpSession],
+                               parse_xml: bool = False,
+                               stream_reply: bool = False) -> (bytes or ET.Element or ReplyStream, int):
+        """Accounts the request in device health"""
+        _health = self._health
+
+        if _health is None:
+            return self.__reported_http_request(request_method, url, data, params, ssl_verify, timeout_seconds,
+                                                request_info, http_session, parse_xml, stream_reply)
+
+        if not _health.allow_request():
+            self.__raise_unavailable()
+
+        try:
+            _reply = self.__reported_http_request(request_method, url, data, params, ssl_verify, timeout_seconds,
+                                                  request_info, http_session, parse_xml, stream_reply)
+        except BaseException as e:
+            _health.record_result(e)
+            raise
+
+        _health.record_result()
+        return _reply
+
+    @staticmethod
+    def __decode_reply(reply: (bytes, int)) -> (str or bytes, int):
+        """Content stays bytes if it isn't UTF-8 text"""
+        _content, _status_code = reply
+
+        try:
+            return _content.decode(), _status_code
+        except ValueError:
+            return _content, _status_code
+
+    def __reported_http_request(self, request_method: HttpRequestMethod, url: str, data: dict or str or None,
+                                params: Optional[dict], ssl_verify: bool, timeout_seconds: Optional[int],
+                                request_info: Optional[RequestInfo], http_session: Optional[PooledHttpSession],
+                                parse_xml: bool, stream_reply: bool) -> (bytes or ET.Element or ReplyStream, int):
+        if request_info is not None or not self._request_hooks:
+            return self.__send_http_request(request_method, url, data, params, ssl_verify, timeout_seconds,
+                                            request_info, http_session, parse_xml, stream_reply)
+
+        request_info = self._start_request_info(request_method, url, data, params)
+
+        try:
+            _reply = self.__send_http_request(request_method, url, data, params, ssl_verify, timeout_seconds,
+                                              request_info, http_session, parse_xml, stream_reply)
+        except BaseException as e:
+            self._finish_request_info(request_info, e)
+            raise
+
+        # Streamed reply is received by caller, the request is finished when the stream is closed
+        if isinstance(_reply[0], ReplyStream):
+            _reply[0].add_close_callback(lambda x: self._finish_request_info(request_info, x.error))
+        else:
+            self._finish_request_info(request_info)
+
+        return _reply
+
+    @staticmethod
+    def __add_stream_info(request_info: RequestInfo, response: requests.Response, stream: ReplyStream):
+        request_info.add_reply_bytes(response, stream.payload_bytes)
+        request_info.add_transfer_time(stream.transfer_seconds)
+
+    def __send_http_request(self, request_method: HttpRequestMethod, url: str, data: dict or str or None,
+                            params: Optional[dict], ssl_verify: bool, timeout_seconds: Optional[int],
+                            request_info: Optional[RequestInfo], http_session: Optional[PooledHttpSession],
+                            parse_xml: bool = False,
+                            stream_reply: bool = False) -> (bytes or ET.Element or ReplyStream, int):
+        """parse_xml - stream 200 reply into XML parser and return parsed reply instead of content
+        stream_reply - return ReplyStream of 200 reply instead of content"""
+        _retry_policy = self.retry_policy
+        _is_read_only = is_read_only_request(request_method, data, params)
+        http_session = http_session or self._http_session
+        _request = http_session.request if http_session is not None else requests.request
+        _first_attempt_at = time.monotonic()
+        _attempt = 0
 
         while True:
-            _response = requests.request(request_method.value, url, auth=self.__get_auth(), verify=ssl_verify,
-                                         data=data, params=params, timeout=timeout_seconds)
+            _attempt += 1
+            _started_at = time.perf_counter()
 
             try:
-                _response_content = _response.content.decode()
-            except ValueError:
+                _response = _request(request_method.value, url, auth=self.__get_auth(), verify=ssl_verify,
+                                     data=data, params=params, timeout=timeout_seconds, headers=REQUEST_HEADERS,
+                                     stream=parse_xml or stream_reply)
+
+                if request_info is not None:
+                    request_info.add_response(_response, time.perf_counter() - _started_at)
+
+                if parse_xml and _response.status_code == 200:
+                    return self.__read_xml_reply(_response, request_info), _response.status_code
+
+                if stream_reply and _response.status_code == 200:
+                    _stream = ReplyStream(_response, REPLY_CHUNK_SIZE)
+
+                    if request_info is not None:
+                        _stream.add_close_callback(lambda x: self.__add_stream_info(request_info, _response, x))
+
+                    return _stream, _response.status_code
+
+                _transfer_started_at = time.perf_counter()
                 _response_content = _response.content
 
-            if _response.status_code != 200:
-                if 'Timed out while getting config lock. Please try again.' in _response_content:
-                    logger.warning(
-                        f'[{self.device_name}]:Timed out while getting config lock. Retrying after {config_lock_wait_seconds} seconds..'
-                    )
-                    time.sleep(config_lock_wait_seconds)
-                    config_lock_repeats_count += 1
+                if request_info is not None:
+                    request_info.add_reply_bytes(_response, len(_response_content))
+                    request_info.add_transfer_time(time.perf_counter() - _transfer_started_at)
 
-                    if config_lock_repeats_count >= config_lock_max_repeats_count:
-                        raise PaloAltoApiRequestException(self.device_name, _response.status_code, _response_content,
-                                                          'bad status code')
+            except requests.RequestException as e:
+                if not _retry_policy.is_retryable_exception(e, _is_read_only):
+                    raise
 
-                    continue
+                _delay_seconds = _retry_policy.get_delay_seconds(_attempt)
+
+                if not _retry_policy.can_retry(_attempt, time.monotonic() - _first_attempt_at, _delay_seconds):
+                    raise
+
+                if self._health is not None and not self._health.record_failed_attempt(e):
+                    raise
+
+                logger.warning(
+                    f'[{self.device_name}]:{e.__class__.__name__} on attempt {_attempt}. '
+                    f'Retrying after {_delay_seconds:.1f} seconds..'
+                )
+                time.sleep(_delay_seconds)
+                continue
+
+            if _response.status_code != 200:
+                _retry_reason = _retry_policy.get_response_retry_reason(_response.status_code, _response_content,
+                                                                        _is_read_only)
+
+                if _retry_reason:
+                    _delay_seconds = _retry_policy.get_delay_seconds(_attempt, _retry_reason)
+
+                    if _retry_policy.can_retry(_attempt, time.monotonic() - _first_attempt_at, _delay_seconds,
+                                               _retry_reason) and self.__record_failed_attempt(_response,
+                                                                                               _response_content):
+                        logger.warning(
+                            f'[{self.device_name}]:{_retry_reason} on attempt {_attempt}. '
+                            f'Retrying after {_delay_seconds:.1f} seconds..'
+                        )
+                        time.sleep(_delay_seconds)
+                        continue
+
+                if _retry_reason == CONFIG_LOCK_RETRY_REASON:
+                    raise PaloAltoApiRequestException(self.device_name, _response.status_code, _response_content,
+                                                      'bad status code')
 
                 elif self._exception_on_request_error:
                     raise PaloAltoApiRequestException(self.device_name, _response.status_code, _response_content,
                                                       'bad status code')
 
                 else:
-                    logger.error(f'[{self.device_name}]:{_response.content} {_response.status_code}')
+                    logger.error(f'[{self.device_name}]:{_response_content} {_response.status_code}')
 
             return _response_content, _response.status_code
 
+    def __record_failed_attempt(self, response: requests.Response, response_content: bytes) -> bool:
+        """Accounts not 200 reply which is going to be repeated in device health.
+        Returns False if circuit breaker opened and request must not be repeated"""
+        if self._health is None:
+            return True
+
+        return self._health.record_failed_attempt(
+            PaloAltoApiRequestException(self.device_name, response.status_code, response_content, 'bad status code')
+        )
+
+    def __read_xml_reply(self, response: requests.Response, request_info: Optional[RequestInfo]) -> ET.Element:
+        """Feeds reply to parser piece by piece while it's received and decompressed,
+        so neither compressed nor decompressed reply is kept whole"""
+        _parser = ET.XMLParser()
+        _payload_bytes = 0
+        _parse_seconds = 0.0
+        _chunk = b''
+        _started_at = time.perf_counter()
+
+        try:
+            for _chunk in response.iter_content(REPLY_CHUNK_SIZE):
+                _payload_bytes += len(_chunk)
+                _parse_started_at = time.perf_counter()
+                _parser.feed(_chunk)
+                _parse_seconds += time.perf_counter() - _parse_started_at
+
+            _parse_started_at = time.perf_counter()
+            _reply = _parser.close()
+            _parse_seconds += time.perf_counter() - _parse_started_at
+
+        except ET.ParseError as e:
+            if not _payload_bytes:
+                raise EmptyReplyException(self.device_name, response.status_code)
+
+            # Reply is not kept, the error shows its rest starting from the bad piece
+            _content = _chunk + b''.join(response.iter_content(REPLY_CHUNK_SIZE))
+            _payload_bytes += len(_content) - len(_chunk)
+            raise ReplyParsingException(self.device_name, response.status_code, _content,
+                                        f'Failed convert response to XML: {e}')
+
+        finally:
+            response.close()
+
+            if request_info is not None:
+                request_info.add_reply_bytes(response, _payload_bytes)
+                request_info.add_parse_time(_parse_seconds)
+                request_info.add_transfer_time(max(time.perf_counter() - _started_at - _parse_seconds, 0.0))
+
+        return _reply
+
     def xml_api_request(self, request_data: dict, params: dict = None, ssl_verify=False,
                         request_timeout_seconds: int = None) -> (str, int):
+        self._raise_if_unavailable()
+        self._wait_for_request_slot()
+
+        return self.__reported_xml_api_request(request_data, params, ssl_verify, request_timeout_seconds)
+
+    def xml_api_batch_request(self, requests_data: List[dict], params: dict = None, ssl_verify=False,
+                              request_timeout_seconds: int = None,
+                              return_exceptions: bool = False) -> List[tuple or BaseException]:
+        """Sends requests back-to-back over one keep-alive connection, replies are in order of requests.
+        request_delay_seconds is waited once per batch. With rate limiter every request takes its slot.
+        Config modifications invalidate config cache and are recorded by change tracker like xml_api_config_request,
+        except requests with target (they modify config of a managed device).
+        return_exceptions - put request errors into replies instead of raising the first one"""
+        if not requests_data:
+            return []
+
+        self._raise_if_unavailable()
+        self._wait_for_request_slot()
+        _http_session = self._http_session or PooledHttpSession(pool_maxsize=1)
+        _replies = []
+
+        try:
+            for _index, _request_data in enumerate(requests_data):
+                if _index and self._rate_limiter is not None:
+                    self._rate_limiter.acquire()
+
+                try:
+                    _replies.append(self.__reported_xml_api_request(_request_data, params, ssl_verify,
+                                                                    request_timeout_seconds, _http_session))
+                except Exception as e:
+                    if not return_exceptions:
+                        raise
+
+                    _replies.append(e)
+
+        finally:
+            if _http_session is not self._http_session:
+                _http_session.close()
+
+            self._apply_config_changes(requests_data, _replies)
+
+        return _replies
+
+    def __reported_xml_api_request(self, request_data: dict, params: Optional[dict], ssl_verify: bool,
+                                   request_timeout_seconds: Optional[int],
+                                   http_session: Optional[PooledHttpSession] = None) -> (ET.Element, int):
         _url = f'https://{self._ipv4}/api/'
-        time.sleep(self.request_delay_seconds)
-        content, status_code = self.http_request(HttpRequestMethod.post,
-                                                 _url,
-                                                 request_data,
-                                                 params,
-                                                 ssl_verify,
-                                                 request_timeout_seconds)
+        _request_info = self._start_request_info(HttpRequestMethod.post, _url, request_data, params)
 
         try:
-            content_xml = ET.fromstring(content)
-        except Exception as e:
-            if content:
-                raise ReplyParsingException(self.device_name, status_code, content,
-                                            f'Failed convert response to XML: {e}')
+            if self.use_local_config_lock and self.__is_config_changing_request(request_data):
+                with get_local_config_lock(self._ipv4):
+                    _reply = self.__xml_api_request(_url, request_data, params, ssl_verify, request_timeout_seconds,
+                                                    _request_info, http_session)
             else:
-                raise EmptyReplyException(self.device_name, status_code)
+                _reply = self.__xml_api_request(_url, request_data, params, ssl_verify, request_timeout_seconds,
+                                                _request_info, http_session)
+        except BaseException as e:
+            self._finish_request_info(_request_info, e)
+            raise
+
+        self._finish_request_info(_request_info)
+        return _reply
+
+    def xml_api_raw_request(self, request_data: dict, params: dict = None, ssl_verify=False,
+                            request_timeout_seconds: int = None) -> (bytes, int):
+        """Like xml_api_request, but returns whole reply content bytes as is. For replies parsed by caller"""
+        _url = f'https://{self._ipv4}/api/'
+        self._raise_if_unavailable()
+        self._wait_for_request_slot()
+
+        return self.http_request(HttpRequestMethod.post, _url, request_data, params, ssl_verify,
+                                 request_timeout_seconds, decode_content=False)
+
+    def xml_api_stream_request(self, request_data: dict, params: dict = None, ssl_verify=False,
+                               request_timeout_seconds: int = None) -> (BinaryIO, int):
+        """Like xml_api_raw_request, but returns file-like object which receives reply while it's read,
+        e.g. by ET.iterparse. For big replies: they aren't kept whole. Close it to release the connection.
+        Not 200 replies are read whole. Request hooks get the streamed request when the stream is closed"""
+        _url = f'https://{self._ipv4}/api/'
+        self._raise_if_unavailable()
+        self._wait_for_request_slot()
+        _content, _status_code = self.__tracked_http_request(HttpRequestMethod.post, _url, request_data, params,
+                                                             ssl_verify, request_timeout_seconds, None, None,
+                                                             stream_reply=True)
+
+        return (io.BytesIO(_content) if isinstance(_content, bytes) else _content), _status_code
+
+    @staticmethod
+    def __is_config_changing_request(request_data: dict) -> bool:
+        _request_type = request_data.get('type')
+
+        if _request_type == XmlApiRequestType.config.value:
+            return request_data.get('action') in CONFIG_WRITE_ACTIONS
+
+        return _request_type == XmlApiRequestType.commit.value
+
+    def __xml_api_request(self, url: str, request_data: dict, params: Optional[dict], ssl_verify: bool,
+                          request_timeout_seconds: Optional[int],
+                          request_info: Optional[RequestInfo],
+                          http_session: Optional[PooledHttpSession] = None) -> (ET.Element, int):
+        content, status_code = self.__tracked_http_request(HttpRequestMethod.post, url, request_data, params,
+                                                           ssl_verify, request_timeout_seconds, request_info,
+                                                           http_session, parse_xml=True)
+
+        if isinstance(content, ET.Element):
+            content_xml = content
+        else:
+            # Not 200 reply is read whole for retry policy and error reporting
+            _parse_started_at = time.perf_counter()
+
+            try:
+                content_xml = ET.fromstring(content)
+            except Exception as e:
+                if content:
+                    raise ReplyParsingException(self.device_name, status_code, content,
+                                                f'Failed convert response to XML: {e}')
+                else:
+                    raise EmptyReplyException(self.device_name, status_code)
+
+            if request_info is not None:
+                request_info.add_parse_time(time.perf_counter() - _parse_started_at)
 
         if content_xml.get('status') in ['error', 'unauth']:
+            if not isinstance(content, bytes):
+                content = ET.tostring(content_xml)
+
             if self._exception_on_request_error:
                 raise PaloAltoApiRequestException(self.device_name, status_code, content,
                                                   'status is error')
 
             else:
-                logger.error(f'[{self.device_name}]:{content} {status_code}')
+                logger.error(f'[{self.device_name}]:{content.decode(errors="replace")} {status_code}')
 
         return content_xml, status_code
 
@@ -308,7 +748,51 @@ class PaloAltoDevice(ABC):
 
             _request_data['element'] = elements_string
 
-        return self.xml_api_request(_request_data, params, ssl_verify, request_timeout_seconds)
+        _cache = self._config_cache
+        _is_cacheable = _cache is not None and not elements and not params and action.value in CONFIG_READ_ACTIONS
+
+        if _is_cacheable:
+            _cached_reply = _cache.get_reply(action.value, xpath)
+
+            if _cached_reply is not None:
+                return copy.deepcopy(_cached_reply[0]), _cached_reply[1]
+
+        reply_xml, status_code = self.xml_api_request(_request_data, params, ssl_verify, request_timeout_seconds)
+        self._apply_config_change(action.value, xpath, reply_xml)
+
+        if _is_cacheable and reply_xml.get('status') == 'success':
+            _cache.put_reply(action.value, xpath, (copy.deepcopy(reply_xml), status_code))
+
+        return reply_xml, status_code
+
+    def _apply_config_change(self, action: str, xpath: Optional[str], reply_xml: Optional[ET.Element]):
+        """Records successful config modification in change tracker and drops cached replies of modified xpath.
+        reply_xml is None if the request failed without reply, cache is invalidated anyway"""
+        if action not in CONFIG_WRITE_ACTIONS:
+            return
+
+        _is_multi_action = action in (ConfigAction.multi_move.value, ConfigAction.multi_clone.value)
+
+        if self._change_tracker is not None and reply_xml is not None and reply_xml.get('status') == 'success':
+            self._change_tracker.record(None if _is_multi_action else xpath)
+
+        if self._config_cache is not None:
+            # Source objects of multi actions are listed in elements, so it's impossible to find all affected xpaths
+            if _is_multi_action:
+                xpath = None
+            # Renamed entry appears under the new name, a sibling of xpath. Whole parent container is dropped
+            elif action == ConfigAction.rename.value:
+                xpath = get_parent_xpath(xpath) if xpath else None
+
+            self._config_cache.invalidate(xpath)
+
+    def _apply_config_changes(self, requests_data: List[dict], replies: List[tuple or BaseException]):
+        """Does _apply_config_change for config requests of batch. Reply is exception or None if request failed.
+        Requests with target modify config of a managed device, they are skipped"""
+        for _request_data, _reply in zip(requests_data, replies):
+            if _request_data.get('type') == XmlApiRequestType.config.value and 'target' not in _request_data:
+                self._apply_config_change(_request_data.get('action'), _request_data.get('xpath'),
+                                          _reply[0] if isinstance(_reply, tuple) else None)
 
 
 class Gateway(PaloAltoDevice):
@@ -336,11 +820,10 @@ RequestsDelaySeconds: 1
         self._restapi_version = _device_config['ApiVersion']
         self.request_delay_seconds = _device_config['RequestsDelaySeconds']
 
-        _system_info = self.xml_api_operational_request(OPCmdBuilder.show_system_info(),
-                                                        request_timeout_seconds=init_requests_timeout_seconds)[0]
-        self._is_multi_vsys = True if _system_info.find('result/system/multi-vsys').text == 'on' else False
-        self._device_name = _system_info.find('result/system/hostname').text
-        self._serial = _system_info.find('result/system/serial').text
+        _system_info = self.get_system_info(init_requests_timeout_seconds)
+        self._is_multi_vsys = _system_info.is_multi_vsys
+        self._device_name = _system_info.hostname
+        self._serial = _system_info.serial
         self._cached_ha_peer_state = self.update_and_get_ha_peer_state()
         self._vsys_display_name_by_vsys_name = {}
         self._vsys_info = []
@@ -476,9 +959,15 @@ class PanoramaDeviceGroup:
 
 
 class Panorama(PaloAltoDevice):
+    _managed_devices_health: Optional[DeviceHealthRegistry] = None
+    _panorama_tag_index: Optional[PanoramaTagIndex] = None
+
     def __init__(self, panorama_config_file: str or Path or dict, device_config_file: str or Path or dict = '',
-                 exception_on_request_error=True, load_managed_devices=True, init_requests_timeout_seconds=120):
-        """Config file structure:
+                 exception_on_request_error=True, load_managed_devices=True, init_requests_timeout_seconds=120,
+                 inventory_cache: Optional[InventoryCache] = None):
+        """inventory_cache - load managed devices and device groups from cache file instead of Panorama requests
+
+Config file structure:
 
 ApiKey: XXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXX==
     or
@@ -519,17 +1008,126 @@ RequestsDelaySeconds: 1
         self.__should_load_managed_devices = load_managed_devices
         self._cached_ha_peer_state = self.update_and_get_ha_peer_state()
 
-        _system_info = self.xml_api_operational_request(OPCmdBuilder.show_system_info(),
-                                                        request_timeout_seconds=init_requests_timeout_seconds)[0]
-        _system_info = _system_info.find('result/system')
-        self._hostname = _system_info.find('hostname').text
-        self._device_name = _system_info.find('devicename').text
-        self._serial = _system_info.find('serial').text
+        _system_info = self.get_system_info(init_requests_timeout_seconds)
+        self._hostname = _system_info.hostname
+        self._device_name = _system_info.devicename
+        self._serial = _system_info.serial
+        self._sw_version = _system_info.sw_version or ''
+        self._inventory_cache = inventory_cache
+
+        self.__load_inventory()
 
-        self.try_update_managed_devices()
-        self.update_device_groups()
         self._exception_on_request_error = exception_on_request_error
 
+    def refresh_inventory(self, connected_devices: Optional[List[ConnectedDevice]] = None):
+        """Reloads managed devices and device groups from Panorama and saves them to inventory cache.
+        connected_devices - already fetched reply of show devices connected"""
+        if connected_devices is None and (self.__should_load_managed_devices or self._inventory_cache is not None):
+            connected_devices = self.get_connected_devices()
+
+        self.try_update_managed_devices(connected_devices)
+        self.update_device_groups()
+
+        if self._inventory_cache is not None:
+            self._inventory_cache.put(self._serial, self._sw_version, self.__export_inventory(),
+                                      get_connected_devices_fingerprint(connected_devices))
+
+    def wait_inventory_revalidation(self, timeout_seconds: Optional[float] = None) -> bool:
+        """Returns False if background inventory reload is still running after timeout"""
+        if self._inventory_cache is None:
+            return True
+
+        return self._inventory_cache.wait_revalidation(timeout_seconds)
+
+    def __load_inventory(self):
+        """From inventory cache if it has fresh entry, from Panorama otherwise"""
+        if self._inventory_cache is None:
+            self.refresh_inventory()
+            return
+
+        # One request instead of full inventory load: connected, removed or changed devices make entry stale
+        _connected_devices = self.get_connected_devices()
+        _entry = self._inventory_cache.get(self._serial, self._sw_version,
+                                           get_connected_devices_fingerprint(_connected_devices))
+
+        if _entry is not None and _entry.data.get('load_managed_devices') == self.__should_load_managed_devices:
+            try:
+                self.__import_inventory(_entry.data)
+            except Exception as e:
+                logger.warning(f'[{self.device_name}]:Failed to load cached inventory: {e!r}')
+            else:
+                logger.info(f'[{self.device_name}]:Inventory is loaded from cache saved {_entry.age_seconds:.0f} '
+                            f'seconds ago.')
+
+                if _entry.age_seconds >= self._inventory_cache.revalidate_after_seconds:
+                    self._inventory_cache.revalidate(self._serial, self.refresh_inventory)
+
+                return
+
+        self.refresh_inventory(_connected_devices)
+
+    def __export_inventory(self) -> dict:
+        return {
+            'load_managed_devices': self.__should_load_managed_devices,
+            'managed_devices': [
+                {
+                    'ipv4': x.ipv4,
+                    'serial': x.serial,
+                    'device_name': x.device_name,
+                    'ha_state': x.ha_peer_state.value,
+                    'is_multi_vsys': x.is_multi_vsys,
+                    'vsys_info': [[y.vsys_name, y.vsys_display_name, y.panorama_tags] for y in x._vsys_info],
+                }
+                for x in self._managed_devices
+            ],
+            'device_groups': [
+                {
+                    'name': x.device_group_name,
+                    'targets': [[y.gateway.serial, y.vsys_name] for y in x._targets],
+                }
+                for x in self.__device_groups_info
+            ],
+            'device_groups_hierarchy_xml': ET.tostring(self.__device_groups_hierarchy_xml, encoding='unicode'),
+            'panorama_tag_index': self._panorama_tag_index.to_dict() if self._panorama_tag_index else None,
+        }
+
+    def __import_inventory(self, data: dict):
+        _managed_devices = []
+
+        for _device_data in data['managed_devices']:
+            _device = _ManagedDevice(
+                _device_data['ipv4'],
+                _device_data['serial'],
+                _device_data['device_name'],
+                HaPeerState(_device_data['ha_state']),
+                self._device_config_file,
+                self._exception_on_request_error,
+                [VsysInfo(*x) for x in _device_data['vsys_info']],
+                _device_data['is_multi_vsys'],
+            )
+
+            if self._managed_devices_health is not None:
+                _device._health = self._managed_devices_health.get(_device.serial)
+
+            _managed_devices.append(_device)
+
+        _devices_by_serial = {x.serial: x for x in _managed_devices}
+        _device_groups_info = [
+            PanoramaDeviceGroup(x['name'], [
+                DeviceGroupTarget(_devices_by_serial[y[0]].device_name, y[1], _devices_by_serial[y[0]])
+                for y in x['targets']
+            ])
+            for x in data['device_groups']
+        ]
+        _hierarchy_xml = ET.fromstring(data['device_groups_hierarchy_xml'])
+        _panorama_tag_index = data.get('panorama_tag_index')
+
+        self._managed_devices = _managed_devices
+        self.__device_groups_info = _device_groups_info
+        self.__device_groups_names = [x.get('name') for x in _hierarchy_xml.findall('.//dg')]
+        self.__device_groups_hierarchy_xml = _hierarchy_xml
+        self._panorama_tag_index = PanoramaTagIndex.from_dict(_panorama_tag_index) if _panorama_tag_index else None
+
     def __create_device_group_hierarchy_dict(self, _hierarchy_xml) -> Dict[str, List[dict]]:
         _dict = {}
 
@@ -548,29 +1146,23 @@ RequestsDelaySeconds: 1
         _all_dg_hierarchy_xml = self.xml_api_operational_request(OPCmdBuilder.show_dg_hierarchy())[0].find(
             './/dg-hierarchy')
         _all_dg_names = _all_dg_hierarchy_xml.findall('.//dg')
-        self.__device_groups_names = [x.get('name') for x in _all_dg_names]
-        self.__device_groups_hierarchy_xml = _all_dg_hierarchy_xml
-        self.__device_groups_info = []
-
-        _cmd = OPCmdBuilder.show_devicegroups()
-        _device_groups_info, _status_code = self.xml_api_operational_request(_cmd)
+        _device_groups_info = []
 
-        for _device_group in _device_groups_info.findall('result/devicegroups/entry'):
+        for _device_group in self.get_device_groups_info():
             _device_group_targets = []
 
             if self.__should_load_managed_devices:
-                if _device_group.find('devices'):
-                    for _serial in _device_group.findall('devices/entry/serial'):
-                        _device = self.get_managed_device_by_serial(_serial.text)
+                if _device_group.serials:
+                    for _serial in _device_group.serials:
+                        _device = self.get_managed_device_by_serial(_serial)
 
                         if _device:
-                            _device_vsys_list = _device_group.findall(
-                                f'devices/entry[@name="{_device.serial}"]/vsys/entry')
+                            _device_vsys_names = _device_group.get_vsys_names(_device.serial)
 
-                            if _device_vsys_list:
-                                for _vsys in _device_vsys_list:
+                            if _device_vsys_names:
+                                for _vsys_name in _device_vsys_names:
                                     _device_group_targets.append(
-                                        DeviceGroupTarget(_device.device_name, _vsys.get('name'), _device)
+                                        DeviceGroupTarget(_device.device_name, _vsys_name, _device)
                                     )
                             else:
                                 _device_group_targets.append(
@@ -578,17 +1170,33 @@ RequestsDelaySeconds: 1
                                 )
                         else:
                             logger.warning(
-                                f'[{self.device_name}]:Device with serial {_serial.text} configured on panorama in device group {_device_group.get("name")} but it status is "not connected"! Can\'t load this device.')
+                                f'[{self.device_name}]:Device with serial {_serial} configured on panorama in device group {_device_group.name} but it status is "not connected"! Can\'t load this device.')
                             # raise Exception(
                             #    f'Panorama class desync error. Device with serial {_serial.text} not in panorama managed devices list!')
 
-            self.__device_groups_info.append(
-                PanoramaDeviceGroup(_device_group.get('name'), _device_group_targets)
+            _device_groups_info.append(
+                PanoramaDeviceGroup(_device_group.name, _device_group_targets)
             )
 
-    def try_update_managed_devices(self):
+        # Assigned at once, so background inventory revalidation doesn't expose partially loaded groups
+        self.__device_groups_names = [x.get('name') for x in _all_dg_names]
+        self.__device_groups_hierarchy_xml = _all_dg_hierarchy_xml
+        self.__device_groups_info = _device_groups_info
+
+    def get_connected_devices(self, request_timeout_seconds: int = None) -> List[ConnectedDevice]:
+        _reply, _status_code = self.xml_api_operational_request(OPCmdBuilder.show_devices_connected(),
+                                                                request_timeout_seconds=request_timeout_seconds)
+        return ConnectedDevice.list_from_reply(_reply)
+
+    def get_device_groups_info(self, request_timeout_seconds: int = None) -> List[DeviceGroupInfo]:
+        _reply, _status_code = self.xml_api_operational_request(OPCmdBuilder.show_devicegroups(),
+                                                                request_timeout_seconds=request_timeout_seconds)
+        return DeviceGroupInfo.list_from_reply(_reply)
+
+    def try_update_managed_devices(self, connected_devices: Optional[List[ConnectedDevice]] = None):
+        """connected_devices - already fetched reply of show devices connected"""
         if self.__should_load_managed_devices:
-            self.__load_managed_devices(self._device_config_file)
+            self.__load_managed_devices(self._device_config_file, connected_devices)
         else:
             logger.warning(
                 f'[{self.device_name}]:panorama should_load_managed_devices is False! Managed devices not loaded.')
@@ -616,25 +1224,25 @@ RequestsDelaySeconds: 1
 
         return copy.deepcopy(self._managed_devices)
 
-    def __load_managed_devices(self, device_config_file: str or Path or dict):
+    def __load_managed_devices(self, device_config_file: str or Path or dict,
+                               connected_devices: Optional[List[ConnectedDevice]] = None):
         if not device_config_file:
             raise PaloAltoException(
                 "You trying to load managed devices from panorama but device config file not specified!",
                 self.device_name
             )
 
-        self._managed_devices = []
-        _cmd = OPCmdBuilder.show_devices_connected()
-        _connected_devices_info, _status_code = self.xml_api_operational_request(_cmd)
+        _managed_devices = []
+        _connected_devices = connected_devices if connected_devices is not None else self.get_connected_devices()
         _xpath = CCXPathBuilder.config_managed_devices()
         _mgmt_devices_info, _status_code = self.xml_api_config_request(ConfigAction.get, _xpath)
+        self._panorama_tag_index = PanoramaTagIndex.from_xml(_mgmt_devices_info.find('result'))
 
-        for _device_info in _connected_devices_info.findall('result/devices/entry'):
+        for _device_info in _connected_devices:
             _device_vsys_info = []
-            _device_serial = _device_info.find('serial').text
+            _device_serial = _device_info.serial
 
-            for _vsys in _device_info.findall('.//vsys/entry'):
-                _vsys_name = _vsys.get('name')
+            for _vsys_name, _vsys_display_name in _device_info.vsys_display_name_by_vsys_name.items():
                 _panorama_tags = _mgmt_devices_info.findall(
                     f'result/entry[@name="{_device_serial}"]/vsys/entry[@name="{_vsys_name}"]/tags/member'
                 )
@@ -645,22 +1253,53 @@ RequestsDelaySeconds: 1
                     _panorama_tags = [x.text for x in _panorama_tags]
 
                 _device_vsys_info.append(
-                    VsysInfo(_vsys_name, _vsys.find('display-name').text, _panorama_tags)
+                    VsysInfo(_vsys_name, _vsys_display_name, _panorama_tags)
                 )
 
             _device = _ManagedDevice(
-                _device_info.find('ip-address').text,
+                _device_info.ip_address,
                 _device_serial,
-                _device_info.find('hostname').text,
-                HaPeerState.ha_not_enabled if not _device_info.find('ha') else HaPeerState(
-                    _device_info.find('ha/state').text),
+                _device_info.hostname,
+                _device_info.ha_state,
                 device_config_file,
                 self._exception_on_request_error,
                 _device_vsys_info,
-                True if _device_info.find('multi-vsys').text == 'yes' else False,
+                _device_info.is_multi_vsys,
             )
 
-            self._managed_devices.append(_device)
+            if self._managed_devices_health is not None:
+                _device._health = self._managed_devices_health.get(_device_serial)
+
+            _managed_devices.append(_device)
+
+        self._managed_devices = _managed_devices
+
+    def enable_managed_devices_health_tracking(self, failure_threshold: int = 3, reset_timeout_seconds: float = 300.0,
+                                               half_open_max_probes: int = 1):
+        """Enables circuit breaker of every managed device. Health state is kept by serial,
+        so it survives try_update_managed_devices()"""
+        self._managed_devices_health = DeviceHealthRegistry(failure_threshold, reset_timeout_seconds,
+                                                            half_open_max_probes)
+
+        for _device in self._managed_devices:
+            _device._health = self._managed_devices_health.get(_device.serial)
+
+    def get_available_devices(self, devices: Optional[List[Gateway]] = None) -> List[Gateway]:
+        """Filters out devices with open circuit breaker. All managed devices if devices is None"""
+        if devices is None:
+            devices = self.managed_devices
+
+        return [x for x in devices if x.health is None or x.health.is_available]
+
+    def get_unavailable_devices_report(self) -> Dict[str, dict]:
+        """Health state by device name of managed devices with not closed circuit breaker"""
+        _report = {}
+
+        for _device in self._managed_devices:
+            if _device.health is not None and _device.health.state != CircuitState.closed:
+                _report[_device.device_name] = _device.health.to_dict()
+
+        return _report
 
     def get_devices_in_descendant_groups(self, device_group_name: str) -> List[Gateway]:
         _all_dg_names = self.get_descendant_dg_names(device_group_name)
@@ -717,73 +1356,37 @@ RequestsDelaySeconds: 1
 
         return None
 
-    def get_device_names_with_panorama_tag(self, panorama_tag: str,
-                                           mgmt_device_entry_xml: Optional[ET.Element] = None) -> Set[str]:
-        if mgmt_device_entry_xml is None:
-            mgmt_device_entry_xml, reply_status = self.xml_api_config_request(
-                ConfigAction.get, f"/config/mgt-config/devices/entry",
-            )
-            mgmt_device_entry_xml = mgmt_device_entry_xml.find('result')
-
-        device_serials_with_tag = set()
-
-        for device_entry in mgmt_device_entry_xml:
-            device_entry: ET.Element
-            device_serial = device_entry.get('name')
-            device_vsys_info = device_entry.findall(f".//vsys/entry")
+    @property
+    def panorama_tag_index(self) -> PanoramaTagIndex:
+        """Built from managed devices config fetched with inventory, fetched once if managed devices aren't loaded"""
+        if self._panorama_tag_index is None:
+            self.update_panorama_tag_index()
 
-            if device_vsys_info is None:
-                if panorama_tag in [x.text for x in device_entry.findall(f".//tags/member")]:
-                    device_serials_with_tag.add(device_serial)
+        return self._panorama_tag_index
 
-                continue
+    def update_panorama_tag_index(self) -> PanoramaTagIndex:
+        _mgmt_devices_info, _status_code = self.xml_api_config_request(ConfigAction.get,
+                                                                       CCXPathBuilder.config_managed_devices())
+        self._panorama_tag_index = PanoramaTagIndex.from_xml(_mgmt_devices_info.find('result'))
+        return self._panorama_tag_index
 
-            for vsys_entry in device_vsys_info:
-                vsys_entry: ET.Element
-                vsys_name = vsys_entry.get('name')
+    def __get_panorama_tag_index(self, mgmt_device_entry_xml: Optional[ET.Element]) -> PanoramaTagIndex:
+        if mgmt_device_entry_xml is None:
+            return self.panorama_tag_index
 
-                if panorama_tag in [x.text for x in vsys_entry.findall(f"tags/member")]:
-                    device_serials_with_tag.add(f'{device_serial}/{vsys_name}')
+        return PanoramaTagIndex.from_xml(mgmt_device_entry_xml)
 
-        return device_serials_with_tag
+    def get_device_names_with_panorama_tag(self, panorama_tag: str,
+                                           mgmt_device_entry_xml: Optional[ET.Element] = None) -> Set[str]:
+        """Returns 'serial/vsys' (or 'serial' for devices without vsys) of targets with tag.
+        Uses panorama_tag_index if mgmt_device_entry_xml is None"""
+        return self.__get_panorama_tag_index(mgmt_device_entry_xml).get_targets(panorama_tag)
 
     def get_all_panorama_tags_by_device_name(self, mgmt_device_entry_xml: Optional[ET.Element] = None
                                              ) -> Dict[str, List[str]]:
-
-        if mgmt_device_entry_xml is None:
-            mgmt_device_entry_xml, reply_status = self.xml_api_config_request(
-                ConfigAction.get, f"/config/mgt-config/devices/entry",
-            )
-            mgmt_device_entry_xml = mgmt_device_entry_xml.find('result')
-
-        panorama_tags_by_device_name = {}
-
-        for device_entry in mgmt_device_entry_xml:
-            device_entry: ET.Element
-            device_name = device_entry.get('name')
-            device_vsys_info = device_entry.findall(f".//vsys/entry")
-
-            if device_vsys_info is None:
-                panorama_tags = panorama_tags_by_device_name.setdefault(device_name, [])
-                panorama_tags += [x.text for x in device_entry.findall(f".//tags/member")]
-                continue
-
-            for vsys_entry in device_vsys_info:
-                vsys_entry: ET.Element
-                vsys_name = vsys_entry.get('name')
-                panorama_tags = panorama_tags_by_device_name.setdefault(f'{device_name}/{vsys_name}', [])
-                panorama_tags += [x.text for x in vsys_entry.findall(f"tags/member")]
-
-        return panorama_tags_by_device_name
+        """Uses panorama_tag_index if mgmt_device_entry_xml is None"""
+        return self.__get_panorama_tag_index(mgmt_device_entry_xml).get_tags_by_target()
 
     def get_panorama_tags_by_device_serial(self, device_serial: str, vsys_name: str = None) -> List[str]:
-        reply_xml, reply_status = self.xml_api_config_request(
-            ConfigAction.get, f"/config/mgt-config/devices/entry[@name='{device_serial}']",
-        )
-
-        if vsys_name:
-            tags = [x.text for x in reply_xml.findall(f".//vsys/entry[@name='{vsys_name}']/tags/member")]
-        else:
-            tags = [x.text for x in reply_xml.findall(f".//tags/member")]
-
-        return tags
+        """Uses panorama_tag_index"""
+        return self.panorama_tag_index.get_device_tags(device_serial, vsys_name)
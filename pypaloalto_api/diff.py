@@ -0,0 +1,292 @@
+import bisect
+import json
+import xml.etree.ElementTree as ET
+from typing import List, Optional, Dict, Tuple
+
+from pypaloalto_api.configuration_commands import ConfigAction
+from pypaloalto_api.devices import PaloAltoDevice
+from pypaloalto_api.hashing import IGNORED_ATTRIBUTES, ORDERED_CONTAINER_TAGS, canonical_xml
+from pypaloalto_api.security_rule import SecurityRule
+
+
+class ConfigChange:
+    """One xml api config request which can be replayed by PaloAltoDevice.xml_api_config_request"""
+
+    def __init__(self, action: ConfigAction, xpath: str, elements: Optional[List[ET.Element]] = None,
+                 params: Optional[dict] = None):
+        self.action = action
+        self.xpath = xpath
+        self.elements = elements or []
+        self.params = params or {}
+
+    def apply(self, device: PaloAltoDevice, request_timeout_seconds: int = None) -> Tuple[ET.Element, int]:
+        return device.xml_api_config_request(self.action, self.xpath, self.elements, dict(self.params) or None,
+                                             request_timeout_seconds=request_timeout_seconds)
+
+    def __eq__(self, other):
+        if not isinstance(other, ConfigChange):
+            return False
+
+        return self.action == other.action and self.xpath == other.xpath and self.params == other.params and \
+            [ET.tostring(x) for x in self.elements] == [ET.tostring(x) for x in other.elements]
+
+    def __repr__(self):
+        return json.dumps({
+            'action': self.action.value,
+            'xpath': self.xpath,
+            'elements': [ET.tostring(x).decode() for x in self.elements],
+            'params': self.params,
+        }, indent=2)
+
+
+def entry_xpath(parent_xpath: str, entry_name: str) -> str:
+    if "'" in entry_name:
+        return f'{parent_xpath}/entry[@name="{entry_name}"]'
+
+    return f"{parent_xpath}/entry[@name='{entry_name}']"
+
+
+def _longest_increasing_subsequence(sequence: List[int]) -> List[int]:
+    """Returns indexes of longest increasing subsequence items"""
+    _tails_values = []
+    _tails_indexes = []
+    _previous_indexes = [-1] * len(sequence)
+
+    for _index, _value in enumerate(sequence):
+        _position = bisect.bisect_left(_tails_values, _value)
+
+        if _position:
+            _previous_indexes[_index] = _tails_indexes[_position - 1]
+
+        if _position == len(_tails_values):
+            _tails_values.append(_value)
+            _tails_indexes.append(_index)
+        else:
+            _tails_values[_position] = _value
+            _tails_indexes[_position] = _index
+
+    _result = []
+    _index = _tails_indexes[-1] if _tails_indexes else -1
+
+    while _index != -1:
+        _result.append(_index)
+        _index = _previous_indexes[_index]
+
+    _result.reverse()
+    return _result
+
+
+def compute_move_changes(old_names: List[str], new_names: List[str], container_xpath: str) -> List[ConfigChange]:
+    """Returns the smallest list of moves which reorders entries to new_names order.
+    Expects that deleted entries are already deleted and added entries are appended to the end."""
+    _new_names_set = set(new_names)
+    _old_names_set = set(old_names)
+    _current_names = [x for x in old_names if x in _new_names_set] + [x for x in new_names if x not in _old_names_set]
+    _position_by_name = {_name: _index for _index, _name in enumerate(_current_names)}
+    _sequence = [_position_by_name[x] for x in new_names]
+    _kept_indexes = set(_longest_increasing_subsequence(_sequence))
+    _changes = []
+
+    for _index, _name in enumerate(new_names):
+        if _index in _kept_indexes:
+            continue
+
+        if _index == 0:
+            _params = {'where': 'top'}
+        else:
+            _params = {'where': 'after', 'dst': new_names[_index - 1]}
+
+        _changes.append(ConfigChange(ConfigAction.move, entry_xpath(container_xpath, _name), params=_params))
+
+    return _changes
+
+
+class ConfigDiffer:
+    """Structural diff of two config trees.
+    Subtrees are compared by hashes so identical branches are skipped without walking them twice.
+    Entries are matched by @name, other nodes by tag."""
+
+    def __init__(self):
+        self._hashes: Dict[ET.Element, int] = {}
+        self._deletes: List[ConfigChange] = []
+        self._sets: List[ConfigChange] = []
+        self._moves: List[ConfigChange] = []
+
+    def subtree_hash(self, element: ET.Element) -> int:
+        """In-process hash of element content. Order of children matters only in ordered containers"""
+        _hash = self._hashes.get(element)
+
+        if _hash is None:
+            _children_hashes = [self.subtree_hash(x) for x in element]
+
+            if element.tag not in ORDERED_CONTAINER_TAGS:
+                _children_hashes.sort()
+
+            _attributes = tuple(sorted(
+                (_key, _value) for _key, _value in element.attrib.items() if _key not in IGNORED_ATTRIBUTES
+            ))
+            _hash = hash((element.tag, _attributes, (element.text or '').strip(), tuple(_children_hashes)))
+            self._hashes[element] = _hash
+
+        return _hash
+
+    def diff(self, old_xml: ET.Element, new_xml: ET.Element, xpath: str) -> List[ConfigChange]:
+        """Takes two versions of the node located at xpath.
+        Returns ordered list of changes which turns old_xml to new_xml: deletes, sets and edits, moves."""
+        if old_xml.tag != new_xml.tag:
+            raise ValueError(f'Can\'t diff different nodes "{old_xml.tag}" and "{new_xml.tag}"')
+
+        self._deletes, self._sets, self._moves = [], [], []
+
+        if self.subtree_hash(old_xml) != self.subtree_hash(new_xml):
+            self._diff_node(old_xml, new_xml, xpath)
+
+        return self._deletes + self._sets + self._moves
+
+    def _diff_node(self, old_xml: ET.Element, new_xml: ET.Element, xpath: str):
+        if self._should_replace_whole_node(old_xml, new_xml):
+            self._sets.append(ConfigChange(ConfigAction.edit, xpath, [new_xml]))
+            return
+
+        _old_entries, _old_others = self._split_children(old_xml)
+        _new_entries, _new_others = self._split_children(new_xml)
+        _added_elements = []
+
+        for _tag, _old_child in _old_others.items():
+            _new_child = _new_others.get(_tag)
+
+            if _new_child is None:
+                self._deletes.append(ConfigChange(ConfigAction.delete, f'{xpath}/{_tag}'))
+
+            elif self.subtree_hash(_old_child) != self.subtree_hash(_new_child):
+                self._diff_node(_old_child, _new_child, f'{xpath}/{_tag}')
+
+        for _tag, _new_child in _new_others.items():
+            if _tag not in _old_others:
+                _added_elements.append(_new_child)
+
+        for _name, _old_entry in _old_entries.items():
+            _new_entry = _new_entries.get(_name)
+
+            if _new_entry is None:
+                self._deletes.append(ConfigChange(ConfigAction.delete, entry_xpath(xpath, _name)))
+
+            elif self.subtree_hash(_old_entry) != self.subtree_hash(_new_entry):
+                self._diff_node(_old_entry, _new_entry, entry_xpath(xpath, _name))
+
+        for _name, _new_entry in _new_entries.items():
+            if _name not in _old_entries:
+                _added_elements.append(_new_entry)
+
+        if _added_elements:
+            self._sets.append(ConfigChange(ConfigAction.set, xpath, _added_elements))
+
+        if new_xml.tag in ORDERED_CONTAINER_TAGS:
+            self._moves += compute_move_changes(list(_old_entries), list(_new_entries), xpath)
+
+    @staticmethod
+    def _should_replace_whole_node(old_xml: ET.Element, new_xml: ET.Element) -> bool:
+        if len(old_xml) == 0 or len(new_xml) == 0:
+            return True
+
+        # Member lists are replaced completely
+        if new_xml[0].tag == 'member' or old_xml[0].tag == 'member':
+            return True
+
+        _old_attributes = {k: v for k, v in old_xml.attrib.items() if k not in IGNORED_ATTRIBUTES}
+        _new_attributes = {k: v for k, v in new_xml.attrib.items() if k not in IGNORED_ATTRIBUTES}
+
+        if _old_attributes != _new_attributes:
+            return True
+
+        # Nodes with repeated non-entry children can't be matched by tag
+        for _xml in (old_xml, new_xml):
+            _tags = [x.tag for x in _xml if x.tag != 'entry']
+
+            if len(_tags) != len(set(_tags)):
+                return True
+
+        return False
+
+    @staticmethod
+    def _split_children(xml: ET.Element) -> Tuple[Dict[str, ET.Element], Dict[str, ET.Element]]:
+        """Returns entries by name and other children by tag keeping children order"""
+        _entries = {}
+        _others = {}
+
+        for _child in xml:
+            if _child.tag == 'entry':
+                _entries[_child.get('name')] = _child
+            else:
+                _others[_child.tag] = _child
+
+        return _entries, _others
+
+
+def diff_config_trees(old_xml: ET.Element, new_xml: ET.Element, xpath: str) -> List[ConfigChange]:
+    """Takes two versions of the node located at xpath. Returns changes which turns old_xml to new_xml"""
+    return ConfigDiffer().diff(old_xml, new_xml, xpath)
+
+
+def _rule_content(rule: SecurityRule) -> str:
+    """Name is not compared, rules are already matched by name or uuid"""
+    _xml = rule.to_canonical_xml()
+    _xml.attrib.pop('name', None)
+    return canonical_xml(_xml)
+
+
+def diff_security_rules(old_rules: List[SecurityRule], new_rules: List[SecurityRule],
+                        rules_xpath: str) -> List[ConfigChange]:
+    """Takes two versions of rulebase located at rules_xpath (.../security/rules).
+    Rules are matched by @uuid first (renamed rules become rename request) and then by @name.
+    Only changed rules are converted to XML and pushed with edit."""
+    _old_by_name = {x.name: x for x in old_rules}
+    _new_by_name = {x.name: x for x in new_rules}
+    _old_by_uuid = {x.uuid: x for x in old_rules if x.uuid}
+    _old_names = [x.name for x in old_rules]
+    _renames = []
+
+    for _new_rule in new_rules:
+        _old_rule = _old_by_uuid.get(_new_rule.uuid) if _new_rule.uuid else None
+
+        if _old_rule is None or _old_rule.name == _new_rule.name:
+            continue
+
+        if _new_rule.name in _old_by_name or _old_rule.name in _new_by_name:
+            continue
+
+        _renames.append(ConfigChange(ConfigAction.rename, entry_xpath(rules_xpath, _old_rule.name),
+                                     params={'newname': _new_rule.name}))
+        del _old_by_name[_old_rule.name]
+        _old_by_name[_new_rule.name] = _old_rule
+        _old_names[_old_names.index(_old_rule.name)] = _new_rule.name
+
+    _deletes = [
+        ConfigChange(ConfigAction.delete, entry_xpath(rules_xpath, x)) for x in _old_names if x not in _new_by_name
+    ]
+    _sets = []
+    _added_rules_xml = []
+
+    for _new_rule in new_rules:
+        _old_rule = _old_by_name.get(_new_rule.name)
+
+        if _old_rule is None:
+            _added_rules_xml.append(_new_rule.to_xml())
+
+        elif _rule_content(_old_rule) != _rule_content(_new_rule):
+            _sets.append(ConfigChange(ConfigAction.edit, entry_xpath(rules_xpath, _new_rule.name),
+                                      [_new_rule.to_xml()]))
+
+    if _added_rules_xml:
+        _sets.append(ConfigChange(ConfigAction.set, rules_xpath, _added_rules_xml))
+
+    _remaining_old_names = [x for x in _old_names if x in _new_by_name]
+    _moves = compute_move_changes(_remaining_old_names, [x.name for x in new_rules], rules_xpath)
+
+    return _deletes + _renames + _sets + _moves
+
+
+def apply_config_changes(device: PaloAltoDevice, changes: List[ConfigChange],
+                         request_timeout_seconds: int = None) -> List[Tuple[ET.Element, int]]:
+    """Replays changes in order through device.xml_api_config_request"""
+    return [x.apply(device, request_timeout_seconds) for x in changes]
@@ -74,3 +74,47 @@ class RuleType(Enum):
     decryption = 'decryption'
     authentication = 'authentication'
     application_override = 'application-override'
+
+
+class CircuitState(Enum):
+    closed = 'closed'  # Requests go to the device
+    open = 'open'  # Device is considered dead, requests fail fast
+    half_open = 'half-open'  # Reset timeout passed, limited probe requests check if device is back
+
+
+class UidAction(Enum):
+    login = 'login'  # Map IP to user
+    logout = 'logout'  # Remove IP to user mapping
+    register = 'register'  # Register IP with dynamic address group tags
+    unregister = 'unregister'  # Unregister tags from IP
+
+
+class LogType(Enum):
+    traffic = 'traffic'
+    threat = 'threat'
+    url = 'url'
+    wildfire = 'wildfire'
+    data = 'data'
+    config = 'config'
+    system = 'system'
+    hipmatch = 'hipmatch'
+    globalprotect = 'globalprotect'
+    auth = 'auth'
+    userid = 'userid'
+    decryption = 'decryption'
+    iptag = 'iptag'
+    tunnel = 'tunnel'
+    gtp = 'gtp'
+    sctp = 'sctp'
+
+
+class ReportType(Enum):
+    predefined = 'predefined'
+    dynamic = 'dynamic'
+    custom = 'custom'
+
+
+class SnapshotChangeType(Enum):
+    added = 'added'
+    changed = 'changed'
+    removed = 'removed'
@@ -15,16 +15,32 @@ class PaloAltoException(Exception):
 
 
 class _RequestExceptionBase:
-    def __init__(self, device_name: str, status_code: int = 0, content: str = '', description: str = ''):
+    def __init__(self, device_name: str, status_code: int = 0, content: str or bytes = '', description: str = ''):
+        """content - reply content, bytes are decoded on first access of content"""
         self.device_name = device_name
         self.status_code = status_code
-        self.content = content
+        self.raw_content = content
         self.description = description
 
+    @property
+    def content(self) -> str or bytes:
+        """Reply content as text, bytes if it isn't UTF-8 text"""
+        if isinstance(self.raw_content, bytes):
+            try:
+                return self.raw_content.decode()
+            except ValueError:
+                pass
+
+        return self.raw_content
+
+    @content.setter
+    def content(self, value: str or bytes):
+        self.raw_content = value
+
     @property
     def json(self) -> dict:
         try:
-            return json.loads(self.content)
+            return json.loads(self.raw_content)
         except:
             return {}
 
@@ -48,3 +64,13 @@ class EmptyReplyException(ReplyParsingException, PaloAltoException):
 
 class PaloAltoApiRequestException(_RequestExceptionBase, PaloAltoException):
     pass
+
+
+class DeviceUnavailableException(PaloAltoException):
+    """Raised without sending request when device circuit breaker is open"""
+    pass
+
+
+class JobTimeoutException(PaloAltoException):
+    """Device job wasn't finished in time"""
+    pass
@@ -0,0 +1,144 @@
+import json
+import time
+from collections import deque, OrderedDict
+from concurrent.futures import ThreadPoolExecutor, Future, wait, FIRST_COMPLETED
+from typing import Callable, Any, Iterable, Iterator, Optional, Dict
+
+from pypaloalto_api.devices import PaloAltoDevice
+from pypaloalto_api.exceptions import DeviceUnavailableException
+
+
+class FleetResult:
+    """Outcome of one task on one device. error is set instead of value if task raised"""
+
+    def __init__(self, device: PaloAltoDevice, value: Any = None, error: Optional[BaseException] = None,
+                 elapsed_seconds: float = 0.0, is_skipped: bool = False):
+        self.device = device
+        self.value = value
+        self.error = error
+        self.elapsed_seconds = elapsed_seconds
+        self.is_skipped = is_skipped
+
+    @property
+    def device_name(self) -> str:
+        return self.device.device_name
+
+    @property
+    def is_ok(self) -> bool:
+        return self.error is None
+
+    def __repr__(self):
+        return json.dumps({
+            'device_name': self.device_name,
+            'is_ok': self.is_ok,
+            'is_skipped': self.is_skipped,
+            'error': repr(self.error) if self.error else None,
+            'elapsed_seconds': self.elapsed_seconds,
+        }, indent=2)
+
+
+class FleetExecutor:
+    """Runs tasks on many devices in a thread pool and yields results as they complete.
+
+    max_workers - global cap of simultaneously running tasks.
+    per_device_concurrency - max simultaneously running tasks on one device (devices are matched by serial),
+    other tasks of this device wait in queue without holding a worker.
+    skip_unavailable - devices with open circuit breaker (see enable_health_tracking) are not called,
+    their results have is_skipped=True and DeviceUnavailableException error.
+    """
+
+    def __init__(self, max_workers: int = 16, per_device_concurrency: int = 1, skip_unavailable: bool = True):
+        if max_workers < 1 or per_device_concurrency < 1:
+            raise ValueError('max_workers and per_device_concurrency must be >= 1')
+
+        self._max_workers = max_workers
+        self._per_device_concurrency = per_device_concurrency
+        self._skip_unavailable = skip_unavailable
+
+    @staticmethod
+    def __device_key(device: PaloAltoDevice) -> str:
+        return device.serial if device.serial != 'unknown' else device.ipv4
+
+    @staticmethod
+    def __run_task(device: PaloAltoDevice, task: Callable[[PaloAltoDevice], Any]) -> FleetResult:
+        _started_at = time.perf_counter()
+
+        try:
+            _value = task(device)
+        except Exception as e:
+            return FleetResult(device, error=e, elapsed_seconds=time.perf_counter() - _started_at,
+                               is_skipped=isinstance(e, DeviceUnavailableException))
+
+        return FleetResult(device, _value, elapsed_seconds=time.perf_counter() - _started_at)
+
+    def run(self, devices: Iterable[PaloAltoDevice], task: Callable[[PaloAltoDevice], Any]) -> Iterator[FleetResult]:
+        """Runs task(device) for every device"""
+        return self.run_tasks((x, task) for x in devices)
+
+    def run_tasks(self, tasks: Iterable[tuple]) -> Iterator[FleetResult]:
+        """Takes (device, task) pairs, the same device may be listed many times"""
+        _queues: Dict[str, deque] = OrderedDict()
+        _running_by_key: Dict[str, int] = {}
+
+        for _device, _task in tasks:
+            if self._skip_unavailable and _device.health is not None and not _device.health.is_available:
+                yield FleetResult(_device, error=DeviceUnavailableException(
+                    f'Skipped, circuit breaker is {_device.health.state.value}', _device.device_name
+                ), is_skipped=True)
+                continue
+
+            _queues.setdefault(self.__device_key(_device), deque()).append((_device, _task))
+
+        _executor = ThreadPoolExecutor(max_workers=self._max_workers, thread_name_prefix='fleet')
+        _key_by_future: Dict[Future, str] = {}
+
+        def _submit_ready():
+            for _key, _queue in _queues.items():
+                while _queue and _running_by_key.get(_key, 0) < self._per_device_concurrency:
+                    _device, _task = _queue.popleft()
+                    _running_by_key[_key] = _running_by_key.get(_key, 0) + 1
+                    _key_by_future[_executor.submit(self.__run_task, _device, _task)] = _key
+
+        try:
+            _submit_ready()
+
+            while _key_by_future:
+                _done, _ = wait(list(_key_by_future), return_when=FIRST_COMPLETED)
+
+                for _future in _done:
+                    _running_by_key[_key_by_future.pop(_future)] -= 1
+
+                _submit_ready()
+
+                for _future in _done:
+                    yield _future.result()
+
+        finally:
+            # Consumer may stop iteration early, queued tasks must not run after that.
+            # Futures are cancelled one by one, shutdown(cancel_futures=True) needs python 3.9
+            for _future in _key_by_future:
+                _future.cancel()
+
+            _executor.shutdown(wait=False)
+
+    def run_operational_command(self, devices: Iterable[PaloAltoDevice], cmd: str,
+                                request_timeout_seconds: int = None) -> Iterator[FleetResult]:
+        """FleetResult.value is (reply xml, status code)"""
+        return self.run(devices, lambda x: x.xml_api_operational_request(
+            cmd, request_timeout_seconds=request_timeout_seconds
+        ))
+
+
+def summarize_fleet_results(results: Iterable[FleetResult]) -> dict:
+    """Returns device names which succeeded, failed with error repr and skipped as unavailable"""
+    _summary = {'succeeded': [], 'failed': {}, 'skipped': []}
+
+    for _result in results:
+        if _result.is_skipped:
+            _summary['skipped'].append(_result.device_name)
+        elif _result.is_ok:
+            _summary['succeeded'].append(_result.device_name)
+        else:
+            _summary['failed'][_result.device_name] = repr(_result.error)
+
+    return _summary
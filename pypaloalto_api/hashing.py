@@ -0,0 +1,110 @@
+import hashlib
+import json
+import os
+import xml.etree.ElementTree as ET
+from pathlib import Path
+from typing import Dict, Iterable, Tuple, Optional
+
+# Attributes which PaloAlto adds to the config by itself and which can't be pushed back
+IGNORED_ATTRIBUTES = ('uuid', 'loc', 'admin', 'dirtyId', 'time', 'ptpl', 'src', 'overrides')
+# Containers where order of entries matters
+ORDERED_CONTAINER_TAGS = ('rules',)
+
+
+def canonical_xml(element: ET.Element) -> str:
+    """Stable serialization of element content as JSON [tag, attributes, text, children].
+    Service attributes are skipped, texts are stripped and children are sorted except in ordered containers."""
+    _children = [canonical_xml(x) for x in element]
+
+    if element.tag not in ORDERED_CONTAINER_TAGS:
+        _children.sort()
+
+    _attributes = sorted((k, v) for k, v in element.attrib.items() if k not in IGNORED_ATTRIBUTES)
+
+    return f'[{json.dumps(element.tag)},{json.dumps(_attributes)},{json.dumps((element.text or "").strip())},' \
+           f'[{",".join(_children)}]]'
+
+
+def _canonical_value(value):
+    if isinstance(value, dict):
+        return {k: _canonical_value(v) for k, v in value.items()}
+
+    if isinstance(value, list):
+        return sorted((_canonical_value(x) for x in value), key=lambda x: json.dumps(x, sort_keys=True))
+
+    return value
+
+
+def canonical_json(value: dict) -> str:
+    """Stable serialization of dict with sorted keys and sorted lists"""
+    return json.dumps(_canonical_value(value), sort_keys=True, separators=(',', ':'))
+
+
+def content_hash(canonical_string: str) -> str:
+    return hashlib.sha256(canonical_string.encode()).hexdigest()
+
+
+def xml_content_hash(element: ET.Element) -> str:
+    """Returns sha256 of element canonical serialization. Equal for the same object built locally
+    with XmlApiElementsBuilder and fetched from device"""
+    return content_hash(canonical_xml(element))
+
+
+def xml_entries_content_hashes(xml: ET.Element) -> Dict[str, str]:
+    """Takes reply or container node. Returns content hash of every entry by its name"""
+    if xml.tag == 'response':
+        xml = xml.find('result')
+
+    _entries = xml.findall('entry') or xml.findall('*/entry')
+
+    return {x.get('name'): xml_content_hash(x) for x in _entries}
+
+
+class ContentHashStore:
+    """Content hashes of objects pushed by previous run. Kept as JSON file {key: hash}"""
+
+    def __init__(self, full_file_name: str or Path = ''):
+        self._full_file_name = full_file_name
+        self._hashes: Dict[str, str] = {}
+
+        if full_file_name and os.path.isfile(full_file_name):
+            with open(full_file_name, 'r', encoding='UTF-8') as _file:
+                self._hashes = json.load(_file)
+
+    def __len__(self):
+        return len(self._hashes)
+
+    def __contains__(self, key: str):
+        return key in self._hashes
+
+    def get(self, key: str) -> Optional[str]:
+        return self._hashes.get(key)
+
+    def is_changed(self, key: str, new_content_hash: str) -> bool:
+        return self._hashes.get(key) != new_content_hash
+
+    def update(self, key: str, new_content_hash: str):
+        self._hashes[key] = new_content_hash
+
+    def update_many(self, hashes: Dict[str, str]):
+        self._hashes.update(hashes)
+
+    def remove(self, key: str):
+        self._hashes.pop(key, None)
+
+    def filter_changed(self, hashes: Iterable[Tuple[str, str]]) -> Dict[str, str]:
+        """Takes (key, hash) pairs. Returns only pairs which differ from stored ones"""
+        return {k: v for k, v in hashes if self.is_changed(k, v)}
+
+    def save(self, full_file_name: str or Path = ''):
+        full_file_name = full_file_name or self._full_file_name
+
+        if not full_file_name:
+            raise ValueError('File name is not specified!')
+
+        _temp_file_name = f'{full_file_name}.tmp'
+
+        with open(_temp_file_name, 'w', encoding='UTF-8') as _file:
+            json.dump(self._hashes, _file, separators=(',', ':'))
+
+        os.replace(_temp_file_name, full_file_name)
@@ -0,0 +1,192 @@
+import threading
+import time
+from typing import Optional, Dict
+
+import requests
+
+from pypaloalto_api.enums import CircuitState
+from pypaloalto_api.exceptions import _RequestExceptionBase
+from pypaloalto_api.utils import SharedOnCopy
+
+
+def is_device_failure(error: BaseException) -> bool:
+    """Transport errors and 5xx replies mean device is unhealthy.
+    PAN-OS 'status is error' replies and parsing errors prove the device is alive."""
+    if isinstance(error, requests.RequestException):
+        return True
+
+    if isinstance(error, _RequestExceptionBase):
+        return error.status_code >= 500
+
+    return False
+
+
+class DeviceHealth(SharedOnCopy):
+    """Circuit breaker of one device. Shared by all copies of the device.
+
+    closed -> open after failure_threshold consecutive failures.
+    open -> half-open when reset_timeout_seconds passed since the last failure, then up to half_open_max_probes
+    requests are let through at once. Successful probe closes the circuit, failed probe opens it again.
+    """
+
+    def __init__(self, failure_threshold: int = 3, reset_timeout_seconds: float = 300.0,
+                 half_open_max_probes: int = 1):
+        if failure_threshold < 1:
+            raise ValueError('failure_threshold must be >= 1')
+
+        self._failure_threshold = failure_threshold
+        self._reset_timeout_seconds = reset_timeout_seconds
+        self._half_open_max_probes = half_open_max_probes
+        self._lock = threading.Lock()
+        self._state = CircuitState.closed
+        self._consecutive_failures = 0
+        self._probes_in_flight = 0
+        self._opened_at = 0.0
+        self._last_failure_at = 0.0
+        self._last_error: Optional[BaseException] = None
+        self._total_successes = 0
+        self._total_failures = 0
+        self._total_rejected = 0
+
+    def __get_state(self) -> CircuitState:
+        if self._state == CircuitState.open and \
+                time.monotonic() - self._last_failure_at >= self._reset_timeout_seconds:
+            self._state = CircuitState.half_open
+            self._probes_in_flight = 0
+
+        return self._state
+
+    @property
+    def state(self) -> CircuitState:
+        with self._lock:
+            return self.__get_state()
+
+    @property
+    def is_available(self) -> bool:
+        """True if request would be let through now. Doesn't take half-open probe slot"""
+        with self._lock:
+            _state = self.__get_state()
+
+            return _state == CircuitState.closed or \
+                (_state == CircuitState.half_open and self._probes_in_flight < self._half_open_max_probes)
+
+    @property
+    def consecutive_failures(self) -> int:
+        return self._consecutive_failures
+
+    @property
+    def last_error(self) -> Optional[BaseException]:
+        return self._last_error
+
+    def allow_request(self) -> bool:
+        """Must be followed by record_result() if True returned"""
+        with self._lock:
+            _state = self.__get_state()
+
+            if _state == CircuitState.closed:
+                return True
+
+            if _state == CircuitState.half_open and self._probes_in_flight < self._half_open_max_probes:
+                self._probes_in_flight += 1
+                return True
+
+            return False
+
+    def record_rejected(self):
+        """Request wasn't sent because circuit is open"""
+        with self._lock:
+            self._total_rejected += 1
+
+    def record_result(self, error: Optional[BaseException] = None):
+        with self._lock:
+            if self._state == CircuitState.half_open and self._probes_in_flight:
+                self._probes_in_flight -= 1
+
+            if error is not None and not isinstance(error, Exception):
+                # Interrupted by KeyboardInterrupt and alike, nothing is known about the device
+                return
+
+            if error is not None and is_device_failure(error):
+                self.__record_failure(error)
+
+            else:
+                self._total_successes += 1
+                self._consecutive_failures = 0
+                self._state = CircuitState.closed
+
+    def record_failed_attempt(self, error: BaseException) -> bool:
+        """Failed attempt of request which is going to be repeated. Returns False without recording the failure
+        if it would open the circuit (or circuit is already open): request must not be repeated then,
+        its failure is recorded by record_result()"""
+        with self._lock:
+            if self.__get_state() == CircuitState.open:
+                return False
+
+            if not is_device_failure(error):
+                return True
+
+            if self._state == CircuitState.half_open or self._consecutive_failures + 1 >= self._failure_threshold:
+                return False
+
+            self.__record_failure(error)
+            return True
+
+    def __record_failure(self, error: BaseException):
+        self._total_failures += 1
+        self._consecutive_failures += 1
+        self._last_error = error
+        self._last_failure_at = time.monotonic()
+
+        if self._state == CircuitState.half_open or self._consecutive_failures >= self._failure_threshold:
+            if self._state != CircuitState.open:
+                self._opened_at = time.time()
+
+            self._state = CircuitState.open
+
+    def reset(self):
+        with self._lock:
+            self._state = CircuitState.closed
+            self._consecutive_failures = 0
+            self._probes_in_flight = 0
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            return {
+                'state': self.__get_state().value,
+                'consecutive_failures': self._consecutive_failures,
+                'opened_at': self._opened_at if self._state != CircuitState.closed else None,
+                'last_error': repr(self._last_error) if self._last_error else None,
+                'total_successes': self._total_successes,
+                'total_failures': self._total_failures,
+                'total_rejected': self._total_rejected,
+            }
+
+    def __repr__(self):
+        return str(self.to_dict())
+
+
+class DeviceHealthRegistry(SharedOnCopy):
+    """DeviceHealth by device serial with the same settings. Survives reload of Panorama managed devices"""
+
+    def __init__(self, failure_threshold: int = 3, reset_timeout_seconds: float = 300.0,
+                 half_open_max_probes: int = 1):
+        self._failure_threshold = failure_threshold
+        self._reset_timeout_seconds = reset_timeout_seconds
+        self._half_open_max_probes = half_open_max_probes
+        self._lock = threading.Lock()
+        self._health_by_serial: Dict[str, DeviceHealth] = {}
+
+    def get(self, serial: str) -> DeviceHealth:
+        with self._lock:
+            _health = self._health_by_serial.get(serial)
+
+            if _health is None:
+                _health = DeviceHealth(self._failure_threshold, self._reset_timeout_seconds,
+                                       self._half_open_max_probes)
+                self._health_by_serial[serial] = _health
+
+            return _health
+
+    def items(self):
+        with self._lock:
+            return list(self._health_by_serial.items())
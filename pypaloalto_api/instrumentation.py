@@ -0,0 +1,359 @@
+import bisect
+import threading
+import time
+from typing import Optional, List, Dict, Tuple
+
+from pypaloalto_api.configuration_commands import XmlApiRequestType
+from pypaloalto_api.enums import HttpRequestMethod
+from pypaloalto_api.utils import SharedOnCopy
+
+
+class RequestInfo:
+    """Everything known about one device request. Filled in while request goes through the device.
+
+    timings (seconds):
+        server - from sending the request till response headers (includes DNS, TCP connect and TLS handshake,
+                 requests does not expose them separately)
+        transfer - reading of response body
+        parse - XML/JSON reply parsing
+        total - whole call including retries and parsing
+
+    bytes_received - reply payload after decompression, wire_bytes_received - reply body as it came over the wire
+    (compressed if device used content_encoding)
+    """
+
+    def __init__(self, device_name: str, request_method: HttpRequestMethod, url: str, data: dict or str or None,
+                 params: Optional[dict] = None):
+        self.device_name = device_name
+        self.request_method = request_method
+        self.url = url
+        self.request_type: Optional[XmlApiRequestType] = None
+        self.action = ''
+        self.xpath = ''
+        self.cmd = ''
+        self.route = ''
+        _fields = {}
+
+        if isinstance(params, dict):
+            _fields.update(params)
+
+        if isinstance(data, dict):
+            _fields.update(data)
+
+        if 'type' in _fields:
+            try:
+                self.request_type = XmlApiRequestType(_fields['type'])
+            except ValueError:
+                pass
+
+            self.action = _fields.get('action', '')
+            self.xpath = _fields.get('xpath', '')
+            self.cmd = _fields.get('cmd', '')
+
+        elif '/restapi/' in url:
+            self.route = url.split('/restapi/', 1)[1].split('/', 1)[-1]
+
+        self.attempts = 0
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.wire_bytes_received = 0
+        self.content_encoding = ''
+        self.status_code = 0
+        self.error: Optional[BaseException] = None
+        self.timings: Dict[str, float] = {'server': 0.0, 'transfer': 0.0, 'parse': 0.0, 'total': 0.0}
+        self.context: dict = {}
+        self.started_at = time.time()
+        self._started_at_perf_counter = time.perf_counter()
+
+    @property
+    def request_type_name(self) -> str:
+        if self.request_type:
+            return self.request_type.value
+
+        return 'restapi' if self.route else 'http'
+
+    @property
+    def compression_ratio(self) -> float:
+        """payload bytes per wire byte, 1.0 for not compressed replies"""
+        return self.bytes_received / self.wire_bytes_received if self.wire_bytes_received else 1.0
+
+    def add_response(self, response, request_seconds: float):
+        """Accounts one http attempt. Doesn't touch reply content, so streamed reply isn't read by it"""
+        self.attempts += 1
+        self.status_code = response.status_code
+        self.content_encoding = response.headers.get('Content-Encoding', '')
+        _body = response.request.body if response.request is not None else None
+        self.bytes_sent += len(_body) if _body else 0
+        _server_seconds = response.elapsed.total_seconds()
+        self.timings['server'] += _server_seconds
+        self.timings['transfer'] += max(request_seconds - _server_seconds, 0.0)
+
+    def add_reply_bytes(self, response, payload_bytes: int):
+        """Accounts reply content read from response"""
+        self.bytes_received += payload_bytes
+        _tell = getattr(response.raw, 'tell', None)
+        self.wire_bytes_received += _tell() if callable(_tell) else payload_bytes
+
+    def add_transfer_time(self, transfer_seconds: float):
+        self.timings['transfer'] += transfer_seconds
+
+    def add_parse_time(self, parse_seconds: float):
+        self.timings['parse'] += parse_seconds
+
+    def finish(self, error: Optional[BaseException] = None):
+        self.error = error
+        self.timings['total'] = time.perf_counter() - self._started_at_perf_counter
+
+    def __repr__(self):
+        return str({
+            'device_name': self.device_name,
+            'request_type': self.request_type_name,
+            'action': self.action,
+            'xpath': self.xpath,
+            'cmd': self.cmd,
+            'route': self.route,
+            'attempts': self.attempts,
+            'bytes_sent': self.bytes_sent,
+            'bytes_received': self.bytes_received,
+            'wire_bytes_received': self.wire_bytes_received,
+            'content_encoding': self.content_encoding,
+            'status_code': self.status_code,
+            'error': repr(self.error) if self.error else None,
+            'timings': self.timings,
+        })
+
+
+class RequestHook:
+    """Base class of request hooks. Override any of methods.
+    Hooks are called synchronously in the thread which makes the request, so keep them fast and thread safe."""
+
+    def before_request(self, request_info: RequestInfo):
+        pass
+
+    def after_request(self, request_info: RequestInfo):
+        pass
+
+
+class RequestHooks(SharedOnCopy):
+    """Hooks of one device. Shared by all copies of the device"""
+
+    def __init__(self):
+        self._hooks: List[RequestHook] = []
+
+    def __bool__(self):
+        return bool(self._hooks)
+
+    def __iter__(self):
+        return iter(list(self._hooks))
+
+    def add(self, hook: RequestHook):
+        if hook not in self._hooks:
+            self._hooks = self._hooks + [hook]
+
+    def remove(self, hook: RequestHook):
+        self._hooks = [x for x in self._hooks if x is not hook]
+
+    def before_request(self, request_info: RequestInfo):
+        for _hook in self._hooks:
+            _hook.before_request(request_info)
+
+    def after_request(self, request_info: RequestInfo):
+        for _hook in self._hooks:
+            _hook.after_request(request_info)
+
+
+DEFAULT_DURATION_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+
+class PrometheusMetricsHook(RequestHook):
+    """Collects Prometheus style counters and request duration histogram by device and request type.
+    Use render() to get metrics in Prometheus text exposition format."""
+
+    def __init__(self, namespace: str = 'pypaloalto', duration_buckets: Tuple[float, ...] = DEFAULT_DURATION_BUCKETS):
+        self._namespace = namespace
+        self._buckets = tuple(sorted(duration_buckets))
+        self._lock = threading.Lock()
+        self._requests_total: Dict[tuple, int] = {}
+        self._bytes_sent_total: Dict[tuple, int] = {}
+        self._bytes_received_total: Dict[tuple, int] = {}
+        self._wire_bytes_received_total: Dict[tuple, int] = {}
+        self._duration_seconds_total: Dict[tuple, Dict[str, float]] = {}
+        self._duration_buckets: Dict[tuple, List[int]] = {}
+        self._duration_sum: Dict[tuple, float] = {}
+
+    def after_request(self, request_info: RequestInfo):
+        _labels = (request_info.device_name, request_info.request_type_name)
+        _status = 'exception' if request_info.error else str(request_info.status_code)
+        _total_seconds = request_info.timings['total']
+
+        with self._lock:
+            _key = _labels + (request_info.action, _status)
+            self._requests_total[_key] = self._requests_total.get(_key, 0) + 1
+            self._bytes_sent_total[_labels] = self._bytes_sent_total.get(_labels, 0) + request_info.bytes_sent
+            self._bytes_received_total[_labels] = \
+                self._bytes_received_total.get(_labels, 0) + request_info.bytes_received
+            self._wire_bytes_received_total[_labels] = \
+                self._wire_bytes_received_total.get(_labels, 0) + request_info.wire_bytes_received
+
+            _phases = self._duration_seconds_total.setdefault(_labels, {})
+
+            for _phase, _seconds in request_info.timings.items():
+                _phases[_phase] = _phases.get(_phase, 0.0) + _seconds
+
+            _buckets = self._duration_buckets.setdefault(_labels, [0] * (len(self._buckets) + 1))
+            _buckets[bisect.bisect_left(self._buckets, _total_seconds)] += 1
+            self._duration_sum[_labels] = self._duration_sum.get(_labels, 0.0) + _total_seconds
+
+    @staticmethod
+    def _format_labels(names: Tuple[str, ...], values: tuple) -> str:
+        _pairs = []
+
+        for _name, _value in zip(names, values):
+            _value = str(_value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+            _pairs.append(f'{_name}="{_value}"')
+
+        return '{' + ','.join(_pairs) + '}'
+
+    def render(self) -> str:
+        _ns = self._namespace
+        _labels = ('device', 'type')
+        _lines = []
+
+        with self._lock:
+            _lines.append(f'# TYPE {_ns}_requests_total counter')
+
+            for _key, _value in sorted(self._requests_total.items()):
+                _lines.append(f'{_ns}_requests_total{self._format_labels(_labels + ("action", "status"), _key)} '
+                              f'{_value}')
+
+            for _name, _values in (('bytes_sent_total', self._bytes_sent_total),
+                                   ('bytes_received_total', self._bytes_received_total),
+                                   ('wire_bytes_received_total', self._wire_bytes_received_total)):
+                _lines.append(f'# TYPE {_ns}_{_name} counter')
+
+                for _key, _value in sorted(_values.items()):
+                    _lines.append(f'{_ns}_{_name}{self._format_labels(_labels, _key)} {_value}')
+
+            _lines.append(f'# TYPE {_ns}_request_phase_seconds_total counter')
+
+            for _key, _phases in sorted(self._duration_seconds_total.items()):
+                for _phase, _seconds in sorted(_phases.items()):
+                    _lines.append(f'{_ns}_request_phase_seconds_total'
+                                  f'{self._format_labels(_labels + ("phase",), _key + (_phase,))} {_seconds}')
+
+            _lines.append(f'# TYPE {_ns}_request_duration_seconds histogram')
+
+            for _key, _buckets in sorted(self._duration_buckets.items()):
+                _cumulative = 0
+
+                for _bound, _count in zip(self._buckets + (float('inf'),), _buckets):
+                    _cumulative += _count
+                    _le = '+Inf' if _bound == float('inf') else str(_bound)
+                    _lines.append(f'{_ns}_request_duration_seconds_bucket'
+                                  f'{self._format_labels(_labels + ("le",), _key + (_le,))} {_cumulative}')
+
+                _lines.append(f'{_ns}_request_duration_seconds_sum{self._format_labels(_labels, _key)} '
+                              f'{self._duration_sum[_key]}')
+                _lines.append(f'{_ns}_request_duration_seconds_count{self._format_labels(_labels, _key)} '
+                              f'{_cumulative}')
+
+        return '\n'.join(_lines) + '\n'
+
+
+class TransferStatsHook(RequestHook):
+    """Reply bytes over the wire against payload bytes by device and request type ('op', 'config/get', ..),
+    shows how much reply compression saves on every site. Use get_report() to get the numbers"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats: Dict[tuple, Dict[str, int]] = {}
+
+    def after_request(self, request_info: RequestInfo):
+        _request_type = request_info.request_type_name
+
+        if request_info.action:
+            _request_type = f'{_request_type}/{request_info.action}'
+
+        with self._lock:
+            _stats = self._stats.setdefault((request_info.device_name, _request_type), {
+                'requests': 0, 'compressed_requests': 0, 'wire_bytes': 0, 'payload_bytes': 0
+            })
+            _stats['requests'] += 1
+            _stats['compressed_requests'] += 1 if request_info.content_encoding else 0
+            _stats['wire_bytes'] += request_info.wire_bytes_received
+            _stats['payload_bytes'] += request_info.bytes_received
+
+    def get_report(self, device_name: Optional[str] = None) -> Dict[str, dict]:
+        """Stats by request type of all devices or of device_name only"""
+        _report: Dict[str, dict] = {}
+
+        with self._lock:
+            for (_device_name, _request_type), _stats in self._stats.items():
+                if device_name is not None and _device_name != device_name:
+                    continue
+
+                _type_report = _report.setdefault(_request_type, dict.fromkeys(_stats, 0))
+
+                for _key, _value in _stats.items():
+                    _type_report[_key] += _value
+
+        for _type_report in _report.values():
+            _type_report['saved_bytes'] = _type_report['payload_bytes'] - _type_report['wire_bytes']
+            _type_report['compression_ratio'] = round(_type_report['payload_bytes'] / _type_report['wire_bytes'], 2) \
+                if _type_report['wire_bytes'] else 1.0
+
+        return _report
+
+    def reset(self):
+        with self._lock:
+            self._stats = {}
+
+
+class OpenTelemetryHook(RequestHook):
+    """Creates OpenTelemetry span for every request. Requires opentelemetry-api package."""
+
+    def __init__(self, tracer=None):
+        try:
+            from opentelemetry import trace
+        except ImportError as e:
+            raise ImportError('OpenTelemetryHook requires opentelemetry-api package: pip install opentelemetry-api') \
+                from e
+
+        self._trace = trace
+        self._tracer = tracer or trace.get_tracer('pypaloalto_api')
+
+    def before_request(self, request_info: RequestInfo):
+        _span = self._tracer.start_span(
+            f'paloalto {request_info.request_type_name} {request_info.action or request_info.route}'.strip(),
+            kind=self._trace.SpanKind.CLIENT,
+            attributes={
+                'paloalto.device_name': request_info.device_name,
+                'paloalto.request_type': request_info.request_type_name,
+                'paloalto.action': request_info.action,
+                'paloalto.xpath': request_info.xpath,
+                'paloalto.cmd': request_info.cmd,
+                'http.method': request_info.request_method.value,
+            },
+        )
+        request_info.context['otel_span'] = _span
+
+    def after_request(self, request_info: RequestInfo):
+        _span = request_info.context.pop('otel_span', None)
+
+        if _span is None:
+            return
+
+        _span.set_attribute('http.status_code', request_info.status_code)
+        _span.set_attribute('paloalto.attempts', request_info.attempts)
+        _span.set_attribute('paloalto.bytes_sent', request_info.bytes_sent)
+        _span.set_attribute('paloalto.bytes_received', request_info.bytes_received)
+        _span.set_attribute('paloalto.wire_bytes_received', request_info.wire_bytes_received)
+
+        for _phase, _seconds in request_info.timings.items():
+            _span.set_attribute(f'paloalto.timings.{_phase}_seconds', _seconds)
+
+        if request_info.error is not None:
+            _span.record_exception(request_info.error)
+            _span.set_status(self._trace.Status(self._trace.StatusCode.ERROR, str(request_info.error)))
+
+        _span.end()
@@ -0,0 +1,130 @@
+import json
+import sqlite3
+import threading
+import time
+from contextlib import closing
+from pathlib import Path
+from typing import Optional, Callable, Dict, Iterable
+
+from pypaloalto_api import logger
+from pypaloalto_api.hashing import canonical_json, content_hash
+from pypaloalto_api.results import ConnectedDevice
+from pypaloalto_api.utils import SharedOnCopy
+
+
+def get_connected_devices_fingerprint(devices: Iterable[ConnectedDevice]) -> str:
+    """Hash of connected devices serials, addresses, names, HA states and vsys"""
+    return content_hash(canonical_json({'devices': [
+        [x.serial, x.ip_address, x.hostname, x.ha_state_name, sorted(x.vsys_display_name_by_vsys_name.items())]
+        for x in devices
+    ]}))
+
+
+class InventoryCacheEntry:
+    def __init__(self, data: dict, saved_at: float, version: str, fingerprint: str = ''):
+        self.data = data
+        self.saved_at = saved_at
+        self.version = version
+        self.fingerprint = fingerprint
+
+    @property
+    def age_seconds(self) -> float:
+        return time.time() - self.saved_at
+
+
+class InventoryCache(SharedOnCopy):
+    """sqlite file with Panorama inventory (managed devices, vsys, device groups and hierarchy)
+    keyed by Panorama serial.
+
+    Entry is used if it's younger than max_age_seconds, was saved by the same Panorama software version
+    and has the same fingerprint (connected devices, checked by one request on start),
+    otherwise inventory is loaded from Panorama and saved. Device groups changes without connected devices changes
+    are not detected by fingerprint: entries older than revalidate_after_seconds are used and reloaded
+    in a background thread, call wait_revalidation() before process exit to keep the fresh entry for the next start."""
+
+    def __init__(self, full_file_name: str or Path, max_age_seconds: float = 86400.0,
+                 revalidate_after_seconds: float = 0.0):
+        self._full_file_name = str(full_file_name)
+        self._max_age_seconds = max_age_seconds
+        self._revalidate_after_seconds = revalidate_after_seconds
+        self._lock = threading.Lock()
+        self._revalidations: Dict[str, threading.Thread] = {}
+
+        with closing(self.__connect()) as _connection, _connection:
+            _connection.execute(
+                'CREATE TABLE IF NOT EXISTS inventory (serial TEXT PRIMARY KEY, saved_at REAL NOT NULL, '
+                'version TEXT NOT NULL, data TEXT NOT NULL, fingerprint TEXT NOT NULL)'
+            )
+
+    @property
+    def revalidate_after_seconds(self) -> float:
+        return self._revalidate_after_seconds
+
+    def __connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self._full_file_name, timeout=30)
+
+    def get(self, serial: str, version: str, fingerprint: Optional[str] = None) -> Optional[InventoryCacheEntry]:
+        """Returns None if there is no fresh entry for serial, version and fingerprint (not checked if None)"""
+        with closing(self.__connect()) as _connection:
+            _row = _connection.execute('SELECT saved_at, version, data, fingerprint FROM inventory WHERE serial = ?',
+                                       (serial,)).fetchone()
+
+        if _row is None:
+            return None
+
+        _entry = InventoryCacheEntry(json.loads(_row[2]), _row[0], _row[1], _row[3])
+
+        if _entry.version != version or _entry.age_seconds >= self._max_age_seconds:
+            return None
+
+        if fingerprint is not None and _entry.fingerprint != fingerprint:
+            return None
+
+        return _entry
+
+    def put(self, serial: str, version: str, data: dict, fingerprint: str = ''):
+        with closing(self.__connect()) as _connection, _connection:
+            _connection.execute('INSERT OR REPLACE INTO inventory (serial, saved_at, version, data, fingerprint) '
+                                'VALUES (?, ?, ?, ?, ?)',
+                                (serial, time.time(), version, json.dumps(data, separators=(',', ':')), fingerprint))
+
+    def invalidate(self, serial: Optional[str] = None):
+        """All entries if serial is None"""
+        with closing(self.__connect()) as _connection, _connection:
+            if serial is None:
+                _connection.execute('DELETE FROM inventory')
+            else:
+                _connection.execute('DELETE FROM inventory WHERE serial = ?', (serial,))
+
+    def revalidate(self, serial: str, reload: Callable[[], None]):
+        """Runs reload in background thread, one at a time per serial"""
+        with self._lock:
+            _thread = self._revalidations.get(serial)
+
+            if _thread is not None and _thread.is_alive():
+                return
+
+            _thread = threading.Thread(target=self.__revalidate, args=(serial, reload), daemon=True,
+                                       name=f'inventory-revalidation-{serial}')
+            self._revalidations[serial] = _thread
+
+        _thread.start()
+
+    @staticmethod
+    def __revalidate(serial: str, reload: Callable[[], None]):
+        try:
+            reload()
+        except Exception as e:
+            logger.warning(f'[{serial}]:Inventory revalidation failed: {e!r}')
+
+    def wait_revalidation(self, timeout_seconds: Optional[float] = None) -> bool:
+        """Returns False if some revalidation is still running after timeout"""
+        _deadline = None if timeout_seconds is None else time.monotonic() + timeout_seconds
+
+        with self._lock:
+            _threads = list(self._revalidations.values())
+
+        for _thread in _threads:
+            _thread.join(None if _deadline is None else max(0.0, _deadline - time.monotonic()))
+
+        return not any(x.is_alive() for x in _threads)
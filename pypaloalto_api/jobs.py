@@ -0,0 +1,143 @@
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Optional, TypeVar, Dict, Hashable
+
+from pypaloalto_api.exceptions import JobTimeoutException
+from pypaloalto_api.utils import SharedOnCopy
+
+T = TypeVar('T')
+
+
+def poll_until_done(check: Callable[[], Optional[T]], timeout_seconds: Optional[float] = 300.0,
+                    initial_interval_seconds: float = 0.5, max_interval_seconds: float = 5.0,
+                    backoff: float = 1.5, description: str = 'job', device_name: Optional[str] = None) -> T:
+    """Calls check() until it returns not None. Interval between calls grows from initial_interval_seconds
+    to max_interval_seconds, so short jobs are picked up fast and long jobs don't flood the device.
+    Raises JobTimeoutException after timeout_seconds (None - wait forever)."""
+    _started_at = time.monotonic()
+    _interval = initial_interval_seconds
+
+    while True:
+        _result = check()
+
+        if _result is not None:
+            return _result
+
+        if timeout_seconds is not None and time.monotonic() - _started_at + _interval > timeout_seconds:
+            raise JobTimeoutException(f'{description} is not finished in {timeout_seconds} seconds', device_name)
+
+        time.sleep(_interval)
+        _interval = min(_interval * backoff, max_interval_seconds)
+
+
+class _TrackedJob:
+    __slots__ = ('check', 'future', 'deadline', 'description', 'device_name', 'next_poll_at', 'interval')
+
+    def __init__(self, check: Callable[[], Optional[T]], deadline: Optional[float], description: str,
+                 device_name: Optional[str], interval: float):
+        self.check = check
+        self.future = Future()
+        self.deadline = deadline
+        self.description = description
+        self.device_name = device_name
+        self.interval = interval
+        self.next_poll_at = time.monotonic() + interval
+
+
+class JobTracker(SharedOnCopy):
+    """Polls device jobs of many workers from one background thread.
+    track() returns Future resolved with not None check() result. Jobs with the same key are polled once,
+    all callers get the same Future. Poll interval of every job grows from initial_interval_seconds
+    to max_interval_seconds, checks run in a pool of max_workers threads."""
+
+    def __init__(self, initial_interval_seconds: float = 0.5, max_interval_seconds: float = 5.0,
+                 backoff: float = 1.5, max_workers: int = 8):
+        self._initial_interval_seconds = initial_interval_seconds
+        self._max_interval_seconds = max_interval_seconds
+        self._backoff = backoff
+        self._max_workers = max_workers
+        self._jobs: Dict[Hashable, _TrackedJob] = {}
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._thread: Optional[threading.Thread] = None
+
+    def __len__(self):
+        return len(self._jobs)
+
+    def track(self, key: Hashable, check: Callable[[], Optional[T]], timeout_seconds: Optional[float] = 300.0,
+              description: str = 'job', device_name: Optional[str] = None) -> Future:
+        """key - unique job key, e.g. (device serial, job id)"""
+        with self._lock:
+            _job = self._jobs.get(key)
+
+            if _job is None:
+                _deadline = time.monotonic() + timeout_seconds if timeout_seconds is not None else None
+                _job = _TrackedJob(check, _deadline, description, device_name, self._initial_interval_seconds)
+                self._jobs[key] = _job
+
+            if self._thread is None or not self._thread.is_alive():
+                self._executor = ThreadPoolExecutor(max_workers=self._max_workers, thread_name_prefix='job-check')
+                self._thread = threading.Thread(target=self.__run, name='job-tracker', daemon=True)
+                self._thread.start()
+
+        self._wakeup.set()
+        return _job.future
+
+    def wait(self, key: Hashable, check: Callable[[], Optional[T]], timeout_seconds: Optional[float] = 300.0,
+             description: str = 'job', device_name: Optional[str] = None) -> T:
+        return self.track(key, check, timeout_seconds, description, device_name).result()
+
+    def __check(self, key: Hashable, job: _TrackedJob):
+        try:
+            _result = job.check()
+        except Exception as e:
+            _result = None
+            job.future.set_exception(e)
+
+        if _result is not None:
+            job.future.set_result(_result)
+
+        elif not job.future.done():
+            if job.deadline is not None and time.monotonic() + job.interval > job.deadline:
+                job.future.set_exception(JobTimeoutException(f'{job.description} is not finished in time',
+                                                             job.device_name))
+            else:
+                job.interval = min(job.interval * self._backoff, self._max_interval_seconds)
+                job.next_poll_at = time.monotonic() + job.interval
+                return
+
+        with self._lock:
+            self._jobs.pop(key, None)
+
+    def __run(self):
+        _checking = set()
+
+        while True:
+            with self._lock:
+                if not self._jobs:
+                    self._executor.shutdown(wait=False)
+                    self._thread = None
+                    return
+
+                _now = time.monotonic()
+                _due = [(k, v) for k, v in self._jobs.items() if v.next_poll_at <= _now and k not in _checking]
+                _next_poll_at = min(x.next_poll_at for x in self._jobs.values())
+
+            for _key, _job in _due:
+                _checking.add(_key)
+                self._executor.submit(self.__check, _key, _job).add_done_callback(
+                    lambda _, _key=_key: _checking.discard(_key)
+                )
+
+            self._wakeup.wait(max(_next_poll_at - time.monotonic(), 0.05))
+            self._wakeup.clear()
+
+
+_default_job_tracker = JobTracker()
+
+
+def get_default_job_tracker() -> JobTracker:
+    """Job tracker shared by all helpers of the process"""
+    return _default_job_tracker
@@ -0,0 +1,374 @@
+import io
+import json
+import queue
+import threading
+import xml.etree.ElementTree as ET
+from pathlib import Path
+from typing import Optional, Iterator, List, Tuple, Dict, Iterable, BinaryIO
+
+from pypaloalto_api import logger
+from pypaloalto_api.configuration_commands import XmlApiRequestType
+from pypaloalto_api.devices import PaloAltoDevice
+from pypaloalto_api.enums import LogType
+from pypaloalto_api.exceptions import PaloAltoApiRequestException
+from pypaloalto_api.jobs import poll_until_done
+
+MAX_LOGS_PER_JOB = 5000
+
+
+class LogQuery:
+    """query - log filter in PAN-OS syntax, e.g. (addr.src in 10.0.0.0/8) and (action eq deny)
+    max_logs - stop after this count of logs, None - read all matching logs page by page.
+    direction - 'backward' (newest first) or 'forward'."""
+
+    def __init__(self, log_type: LogType, query: str = '', max_logs: Optional[int] = None,
+                 page_size: int = MAX_LOGS_PER_JOB, direction: str = 'backward'):
+        if not 0 < page_size <= MAX_LOGS_PER_JOB:
+            raise ValueError(f'page_size must be in 1..{MAX_LOGS_PER_JOB}')
+
+        self.log_type = log_type
+        self.query = query
+        self.max_logs = max_logs
+        self.page_size = page_size
+        self.direction = direction
+
+    def __repr__(self):
+        return f'LogQuery({self.log_type.value}, {self.query!r}, max_logs={self.max_logs})'
+
+
+def log_entry_to_dict(entry: ET.Element) -> dict:
+    """Attributes are prefixed by @, member lists become lists"""
+    _dict = {f'@{k}': v for k, v in entry.attrib.items()}
+
+    for _child in entry:
+        _dict[_child.tag] = [x.text for x in _child] if len(_child) else _child.text
+
+    return _dict
+
+
+def _reply_source(content: str or bytes) -> io.BytesIO:
+    return io.BytesIO(content.encode() if isinstance(content, str) else content)
+
+
+class LogClient:
+    """Two phase log retrieval of one device: submit log job, poll it, read logs.
+    Logs are read page by page (one job per page_size logs) and parsed by iterparse while reply is received,
+    so reply isn't kept whole.
+    Next page starts from receive_time of the last read entry, skipping only already read entries of that second,
+    so logs which arrive while reading don't shift pages."""
+
+    def __init__(self, device: PaloAltoDevice, job_timeout_seconds: Optional[float] = 300.0,
+                 initial_poll_interval_seconds: float = 0.5, max_poll_interval_seconds: float = 5.0,
+                 request_timeout_seconds: int = None):
+        self._device = device
+        self._job_timeout_seconds = job_timeout_seconds
+        self._initial_poll_interval_seconds = initial_poll_interval_seconds
+        self._max_poll_interval_seconds = max_poll_interval_seconds
+        self._request_timeout_seconds = request_timeout_seconds
+
+    @property
+    def device(self) -> PaloAltoDevice:
+        return self._device
+
+    def submit(self, query: LogQuery, skip: int = 0, nlogs: int = MAX_LOGS_PER_JOB,
+               receive_time_boundary: Optional[str] = None) -> str:
+        """Returns job id. receive_time_boundary - read only logs not newer (backward direction)
+        or not older (forward direction) than this receive_time"""
+        _query = query.query
+
+        if receive_time_boundary:
+            _operator = 'leq' if query.direction == 'backward' else 'geq'
+            _boundary_query = f"(receive_time {_operator} '{receive_time_boundary}')"
+            _query = f'({_query}) and {_boundary_query}' if _query else _boundary_query
+
+        _request_data = {
+            'type': XmlApiRequestType.log.value,
+            'log-type': query.log_type.value,
+            'nlogs': str(nlogs),
+            'skip': str(skip),
+            'dir': query.direction,
+        }
+
+        if _query:
+            _request_data['query'] = _query
+
+        _reply, _status_code = self._device.xml_api_request(_request_data,
+                                                            request_timeout_seconds=self._request_timeout_seconds)
+
+        return _reply.findtext('result/job')
+
+    def __get_job_reply(self, job_id: str) -> Optional[Tuple[Iterator[Tuple[str, ET.Element]], BinaryIO]]:
+        """Returns (parser events after job status, reply stream) if job is finished"""
+        _reply, _status_code = self._device.xml_api_stream_request(
+            {'type': XmlApiRequestType.log.value, 'action': 'get', 'job-id': job_id},
+            request_timeout_seconds=self._request_timeout_seconds,
+        )
+        _events = ET.iterparse(_reply, events=('start', 'end'))
+
+        try:
+            for _event, _element in _events:
+                if _event == 'start' and _element.tag == 'response' and _element.get('status') != 'success':
+                    # Error reply is small, it's read whole for the exception
+                    for _ in _events:
+                        pass
+
+                    raise PaloAltoApiRequestException(self._device.device_name, _status_code,
+                                                      ET.tostring(_element), f'log job {job_id} failed')
+
+                if _event == 'end' and _element.tag == 'status':
+                    if _element.text == 'FIN':
+                        return _events, _reply
+
+                    break
+
+        except BaseException:
+            _reply.close()
+            raise
+
+        _reply.close()
+        return None
+
+    def wait_job(self, job_id: str) -> Iterator[dict]:
+        """Waits for job on the first next() and yields its logs. Reply is parsed while it's received,
+        close the iterator if it isn't read to the end"""
+        _events, _reply = poll_until_done(lambda: self.__get_job_reply(job_id), self._job_timeout_seconds,
+                                          self._initial_poll_interval_seconds, self._max_poll_interval_seconds,
+                                          description=f'Log job {job_id}', device_name=self._device.device_name)
+
+        with _reply:
+            for _event, _element in _events:
+                if _event == 'end' and _element.tag == 'entry' and 'logid' in _element.attrib:
+                    yield log_entry_to_dict(_element)
+                    _element.clear()
+
+    def delete_job(self, job_id: str):
+        self._device.xml_api_request({'type': XmlApiRequestType.log.value, 'action': 'finish', 'job-id': job_id},
+                                     request_timeout_seconds=self._request_timeout_seconds)
+
+    @staticmethod
+    def iter_reply_logs(content: str or bytes) -> Iterator[dict]:
+        for _event, _element in ET.iterparse(_reply_source(content), events=('end',)):
+            if _element.tag == 'entry' and 'logid' in _element.attrib:
+                yield log_entry_to_dict(_element)
+                _element.clear()
+
+    def iter_logs(self, query: LogQuery) -> Iterator[dict]:
+        """Yields log entries of all pages. Log jobs are deleted even if iteration is stopped"""
+        _count = 0
+        _receive_time = None
+        _receive_time_count = 0  # Already read entries of _receive_time
+
+        while query.max_logs is None or _count < query.max_logs:
+            _nlogs = query.page_size if query.max_logs is None else min(query.page_size, query.max_logs - _count)
+            _job_id = self.submit(query, _receive_time_count, _nlogs, _receive_time)
+            _logs = self.wait_job(_job_id)
+            _page_count = 0
+
+            try:
+                for _entry in _logs:
+                    if _entry.get('receive_time') == _receive_time:
+                        _receive_time_count += 1
+                    else:
+                        _receive_time = _entry.get('receive_time')
+                        _receive_time_count = 1
+
+                    _page_count += 1
+                    _count += 1
+                    yield _entry
+
+            finally:
+                _logs.close()
+
+                try:
+                    self.delete_job(_job_id)
+                except Exception as e:
+                    logger.warning(f'[{self._device.device_name}]:Log job {_job_id} was not deleted: {e!r}')
+
+            if _page_count < _nlogs:
+                break
+
+
+class ParallelLogReader:
+    """Runs log queries of many devices in parallel threads and yields (device name, log entry)
+    as they come. Not consumed entries are limited by max_buffered_entries, readers wait for consumer.
+    Errors don't stop other queries, they are available in errors after iteration."""
+
+    _DONE = object()
+
+    def __init__(self, queries: Iterable[Tuple[PaloAltoDevice, LogQuery]], max_workers: int = 8,
+                 max_buffered_entries: int = 10000, **log_client_kwargs):
+        self._queries = list(queries)
+        self._max_workers = max_workers
+        self._max_buffered_entries = max_buffered_entries
+        self._log_client_kwargs = log_client_kwargs
+        self._errors: Dict[str, BaseException] = {}
+
+    @property
+    def errors(self) -> Dict[str, BaseException]:
+        """Error by device name"""
+        return dict(self._errors)
+
+    def __iter__(self) -> Iterator[Tuple[str, dict]]:
+        _queue = queue.Queue(self._max_buffered_entries)
+        _tasks = queue.Queue()
+        _stop = threading.Event()
+        _errors = self._errors = {}
+
+        for _task in self._queries:
+            _tasks.put(_task)
+
+        def _put(item) -> bool:
+            """Returns False if consumer stopped iteration"""
+            while not _stop.is_set():
+                try:
+                    _queue.put(item, timeout=0.5)
+                    return True
+                except queue.Full:
+                    pass
+
+            return False
+
+        def _worker():
+            while not _stop.is_set():
+                try:
+                    _device, _query = _tasks.get_nowait()
+                except queue.Empty:
+                    break
+
+                _logs = LogClient(_device, **self._log_client_kwargs).iter_logs(_query)
+
+                try:
+                    for _entry in _logs:
+                        if not _put((_device.device_name, _entry)):
+                            return
+
+                except Exception as e:
+                    _errors[_device.device_name] = e
+
+                finally:
+                    # Deletes log job of stopped iteration
+                    _logs.close()
+
+            _put(self._DONE)
+
+        _workers = [threading.Thread(target=_worker, daemon=True, name='log-reader')
+                    for _ in range(min(self._max_workers, len(self._queries)))]
+
+        for _thread in _workers:
+            _thread.start()
+
+        _running = len(_workers)
+
+        try:
+            while _running:
+                _item = _queue.get()
+
+                if _item is self._DONE:
+                    _running -= 1
+                    continue
+
+                yield _item
+
+        finally:
+            _stop.set()
+
+
+class NdjsonLogWriter:
+    """Writes log entries as newline delimited JSON"""
+
+    def __init__(self, full_file_name: str or Path):
+        self._file = open(full_file_name, 'w', encoding='UTF-8')
+        self.count = 0
+
+    def write(self, entry: dict):
+        self._file.write(json.dumps(entry, separators=(',', ':')))
+        self._file.write('\n')
+        self.count += 1
+
+    def write_many(self, entries: Iterable[dict]) -> int:
+        for _entry in entries:
+            self.write(_entry)
+
+        return self.count
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+class ParquetLogWriter:
+    """Writes log entries into Parquet file by row groups of row_group_size. Requires pyarrow package.
+    All columns are strings. Columns are taken from the first row group if not specified, other keys are dropped."""
+
+    def __init__(self, full_file_name: str or Path, columns: Optional[List[str]] = None,
+                 row_group_size: int = 50000):
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError as e:
+            raise ImportError('ParquetLogWriter requires pyarrow package: pip install pyarrow') from e
+
+        self._pyarrow = pyarrow
+        self._parquet = pyarrow.parquet
+        self._full_file_name = str(full_file_name)
+        self._columns = columns
+        self._row_group_size = row_group_size
+        self._rows: List[dict] = []
+        self._writer = None
+        self.count = 0
+
+    def write(self, entry: dict):
+        self._rows.append(entry)
+        self.count += 1
+
+        if len(self._rows) >= self._row_group_size:
+            self.__write_row_group()
+
+    def write_many(self, entries: Iterable[dict]) -> int:
+        for _entry in entries:
+            self.write(_entry)
+
+        return self.count
+
+    def __write_row_group(self):
+        if not self._rows:
+            return
+
+        if self._columns is None:
+            self._columns = list(dict.fromkeys(k for x in self._rows for k in x))
+
+        _table = self._pyarrow.table({
+            _column: self._pyarrow.array([self.__to_str(x.get(_column)) for x in self._rows],
+                                         type=self._pyarrow.string())
+            for _column in self._columns
+        })
+
+        if self._writer is None:
+            self._writer = self._parquet.ParquetWriter(self._full_file_name, _table.schema)
+
+        self._writer.write_table(_table)
+        self._rows = []
+
+    @staticmethod
+    def __to_str(value) -> Optional[str]:
+        if value is None or isinstance(value, str):
+            return value
+
+        return json.dumps(value)
+
+    def close(self):
+        self.__write_row_group()
+
+        if self._writer is not None:
+            self._writer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
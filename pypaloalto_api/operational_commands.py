@@ -448,3 +448,54 @@ class OPCmdBuilder:
     </dg-hierarchy>
 </result>"""
         return '<show><dg-hierarchy></dg-hierarchy></show>'
+
+    @staticmethod
+    def show_config_audit_info() -> str:
+        """Committed config versions, version grows with every commit
+<result>
+    <entry>
+        <version>12</version>
+        <date>2024/01/01 10:00:00</date>
+        <admin>admin</admin>
+    </entry>
+    ......
+</result>"""
+        return '<show><config><audit><info></info></audit></config></show>'
+
+    @staticmethod
+    def show_config_change_summary() -> str:
+        """Panorama only! Locations with not committed candidate changes of all admins
+<result>
+    <summary>
+        <device-group>
+            <member>DG1</member>
+        </device-group>
+        <shared/>
+    </summary>
+</result>"""
+        return '<show><config><list><change-summary></change-summary></list></config></show>'
+
+    @staticmethod
+    def show_registered_ip(tag: str = '', start_point: int = 0, limit: int = 0) -> str:
+        """Use 'vsys' request parameter for multi-vsys devices. start_point starts from 1, limit is up to 500
+<result>
+    <entry ip="10.10.10.10" from_agent="0" persistent="1">
+        <tag>
+            <member>tag1</member>
+            <member>tag2</member>
+        </tag>
+    </entry>
+    <count>1</count>
+</result>"""
+        _page = ''
+
+        if start_point:
+            _page += f'<start-point>{start_point}</start-point>'
+
+        if limit:
+            _page += f'<limit>{limit}</limit>'
+
+        if tag:
+            return f'<show><object><registered-ip>{_page}<tag><entry name="{tag}"/></tag></registered-ip></object></show>'
+        else:
+            return f'<show><object><registered-ip>{_page}<all></all></registered-ip></object></show>'
@@ -0,0 +1,60 @@
+import xml.etree.ElementTree as ET
+from typing import List, Tuple
+
+from pypaloalto_api.configuration_commands import XmlApiRequestType
+from pypaloalto_api.devices import PaloAltoDevice
+
+
+class RequestPipeline:
+    """Queues XML API requests of one device and sends them by execute() back-to-back over one keep-alive
+    connection. request_delay_seconds is waited once per pipeline, device rate limiter (if enabled) is respected.
+    Config modifications invalidate config cache and are recorded by change tracker of the device.
+
+    pipeline = RequestPipeline(device)
+    pipeline.add_operational_command(OPCmdBuilder.show_system_info())
+    pipeline.add_operational_command(OPCmdBuilder.show_ha_state())
+    (system_info, _), (ha_state, _) = pipeline.execute()
+    """
+
+    def __init__(self, device: PaloAltoDevice, request_timeout_seconds: int = None, return_exceptions: bool = False):
+        """return_exceptions - put request errors into results instead of raising the first one"""
+        self._device = device
+        self._request_timeout_seconds = request_timeout_seconds
+        self._return_exceptions = return_exceptions
+        self._requests_data: List[dict] = []
+
+    @property
+    def device(self) -> PaloAltoDevice:
+        return self._device
+
+    def __len__(self):
+        return len(self._requests_data)
+
+    def add_request(self, request_data: dict) -> int:
+        """Returns index of the request result"""
+        self._requests_data.append(dict(request_data))
+        return len(self._requests_data) - 1
+
+    def add_cmd(self, request_type: XmlApiRequestType, cmd: str, **additional_request_data) -> int:
+        _request_data = {
+            'type': request_type.value,
+            'cmd': cmd
+        }
+
+        _request_data.update(additional_request_data)
+
+        return self.add_request(_request_data)
+
+    def add_operational_command(self, cmd: str, **additional_request_data) -> int:
+        return self.add_cmd(XmlApiRequestType.op, cmd, **additional_request_data)
+
+    def clear(self):
+        self._requests_data = []
+
+    def execute(self) -> List[Tuple[ET.Element, int] or BaseException]:
+        """Sends queued requests, returns (reply xml, status code) in order of adding. The queue is cleared"""
+        _requests_data = self._requests_data
+        self._requests_data = []
+
+        return self._device.xml_api_batch_request(_requests_data, request_timeout_seconds=self._request_timeout_seconds,
+                                                  return_exceptions=self._return_exceptions)
@@ -0,0 +1,135 @@
+from typing import List, Optional, Iterable, Iterator
+
+from pypaloalto_api import logger
+from pypaloalto_api.devices import PaloAltoDevice, Panorama
+from pypaloalto_api.enums import HaPeerState, HttpRequestMethod
+from pypaloalto_api.exceptions import PaloAltoException
+from pypaloalto_api.fleet import FleetExecutor, FleetResult
+from pypaloalto_api.operational_commands import OPCmdBuilder
+from pypaloalto_api.utils import SharedOnCopy
+
+
+class ProxiedDevice(SharedOnCopy, PaloAltoDevice):
+    """Panorama managed device reached through Panorama XML API with target=<serial> parameter.
+    Works for isolated networks and uses Panorama connections. REST API is not available this way."""
+
+    def __init__(self, panorama: Panorama, serial: str, device_name: str = '',
+                 ha_state: HaPeerState = HaPeerState.ha_not_enabled):
+        self._panorama = panorama
+        self._self_config_file = {}
+        self._ipv4 = panorama.ipv4
+        self._primary_ip = self._ipv4
+        self._restapi_version = panorama.restapi_version
+        self._serial = serial
+        self._device_name = device_name or serial
+        self._hostname = self._device_name
+        self._cached_ha_peer_state = ha_state
+        self._exception_on_request_error = panorama._exception_on_request_error
+        self.request_delay_seconds = 0
+
+    @property
+    def panorama(self) -> Panorama:
+        return self._panorama
+
+    def xml_api_request(self, request_data: dict, params: dict = None, ssl_verify=False,
+                        request_timeout_seconds: int = None):
+        _request_data = dict(request_data)
+        _request_data['target'] = self._serial
+
+        return self._panorama.xml_api_request(_request_data, params, ssl_verify, request_timeout_seconds)
+
+    def xml_api_raw_request(self, request_data: dict, params: dict = None, ssl_verify=False,
+                            request_timeout_seconds: int = None):
+        _request_data = dict(request_data)
+        _request_data['target'] = self._serial
+
+        return self._panorama.xml_api_raw_request(_request_data, params, ssl_verify, request_timeout_seconds)
+
+    def xml_api_stream_request(self, request_data: dict, params: dict = None, ssl_verify=False,
+                               request_timeout_seconds: int = None):
+        _request_data = dict(request_data)
+        _request_data['target'] = self._serial
+
+        return self._panorama.xml_api_stream_request(_request_data, params, ssl_verify, request_timeout_seconds)
+
+    def xml_api_batch_request(self, requests_data: List[dict], params: dict = None, ssl_verify=False,
+                              request_timeout_seconds: int = None, return_exceptions: bool = False):
+        _requests_data = [dict(x, target=self._serial) for x in requests_data]
+
+        try:
+            _replies = self._panorama.xml_api_batch_request(_requests_data, params, ssl_verify,
+                                                            request_timeout_seconds, return_exceptions)
+        except BaseException:
+            # Replies of requests sent before the failed one are lost
+            self._apply_config_changes(requests_data, [None] * len(requests_data))
+            raise
+
+        self._apply_config_changes(requests_data, _replies)
+
+        return _replies
+
+    def xml_api_export_request(self, params: dict, ssl_verify=False, request_timeout_seconds: int = None):
+        return self._panorama.xml_api_export_request(dict(params, target=self._serial), ssl_verify,
+                                                     request_timeout_seconds)
+
+    def restapi_request(self, route: str, request_method: HttpRequestMethod,
+                        data: dict or str = None, params: dict = None, ssl_verify=False,
+                        request_timeout_seconds: int = None):
+        raise PaloAltoException('REST API requests can not be proxied through Panorama!', self.device_name)
+
+
+class PanoramaProxy:
+    """Runs XML API requests of many managed devices through one Panorama.
+
+    max_concurrency - max simultaneous requests to Panorama.
+    Panorama connection pooling is enabled with max_concurrency pool size only if Panorama has no pool,
+    so N firewalls cost max_concurrency connections. Pool enabled by caller is used as is and never replaced,
+    connections above its size are opened per request."""
+
+    def __init__(self, panorama: Panorama, max_concurrency: int = 8):
+        self._panorama = panorama
+        self._max_concurrency = max_concurrency
+
+        if panorama.http_session is None:
+            panorama.enable_connection_pooling(max_concurrency)
+        elif panorama.http_session.pool_maxsize < max_concurrency:
+            logger.warning(f'[{panorama.device_name}]:Connection pool size {panorama.http_session.pool_maxsize} '
+                           f'is less than proxy max_concurrency {max_concurrency}.')
+
+    def get_devices(self, serials: Optional[Iterable[str]] = None) -> List[ProxiedDevice]:
+        """All connected devices if serials is None"""
+        _reply, _status_code = self._panorama.xml_api_operational_request(OPCmdBuilder.show_devices_connected())
+        _devices = []
+        _serials = set(serials) if serials is not None else None
+
+        for _device_info in _reply.findall('result/devices/entry'):
+            _serial = _device_info.findtext('serial')
+
+            if _serials is not None and _serial not in _serials:
+                continue
+
+            _ha_state = _device_info.findtext('ha/state')
+            _devices.append(ProxiedDevice(
+                self._panorama, _serial, _device_info.findtext('hostname') or _serial,
+                HaPeerState(_ha_state) if _ha_state else HaPeerState.ha_not_enabled,
+            ))
+
+        if _serials is not None:
+            _found_serials = {x.serial for x in _devices}
+            _devices += [ProxiedDevice(self._panorama, x) for x in sorted(_serials - _found_serials)]
+
+        return _devices
+
+    def run(self, devices: Iterable[ProxiedDevice], task) -> Iterator[FleetResult]:
+        """Runs task(device) for every device, yields results as they complete"""
+        _executor = FleetExecutor(max_workers=self._max_concurrency, per_device_concurrency=1,
+                                  skip_unavailable=False)
+
+        return _executor.run(devices, task)
+
+    def run_operational_command(self, cmd: str, serials: Optional[Iterable[str]] = None,
+                                request_timeout_seconds: int = None) -> Iterator[FleetResult]:
+        """FleetResult.value is (reply xml, status code). All connected devices if serials is None"""
+        return self.run(self.get_devices(serials), lambda x: x.xml_api_operational_request(
+            cmd, request_timeout_seconds=request_timeout_seconds
+        ))
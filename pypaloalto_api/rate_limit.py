@@ -0,0 +1,50 @@
+import threading
+import time
+
+from pypaloalto_api.utils import SharedOnCopy
+
+
+class RateLimiter(SharedOnCopy):
+    """Token bucket shared by all copies of the device and all threads using it.
+    requests_per_second - sustained rate, burst - requests allowed back-to-back without waiting."""
+
+    def __init__(self, requests_per_second: float, burst: int = 1):
+        if requests_per_second <= 0:
+            raise ValueError('requests_per_second must be positive')
+
+        if burst < 1:
+            raise ValueError('burst must be at least 1')
+
+        self._requests_per_second = float(requests_per_second)
+        self._burst = burst
+        self._tokens = float(burst)
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    @property
+    def requests_per_second(self) -> float:
+        return self._requests_per_second
+
+    @property
+    def burst(self) -> int:
+        return self._burst
+
+    def __reserve(self) -> float:
+        """Takes a token, returns seconds to wait until it's available"""
+        with self._lock:
+            _now = time.monotonic()
+            self._tokens = min(float(self._burst),
+                               self._tokens + (_now - self._updated_at) * self._requests_per_second)
+            self._updated_at = _now
+            self._tokens -= 1
+
+            return -self._tokens / self._requests_per_second if self._tokens < 0 else 0.0
+
+    def acquire(self) -> float:
+        """Waits for a request slot, returns waited seconds"""
+        _wait_seconds = self.__reserve()
+
+        if _wait_seconds > 0:
+            time.sleep(_wait_seconds)
+
+        return _wait_seconds
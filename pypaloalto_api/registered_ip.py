@@ -0,0 +1,123 @@
+import json
+from typing import Dict, Set, Iterable, Optional, List
+
+from pypaloalto_api.configuration_commands import XmlApiRequestType
+from pypaloalto_api.devices import PaloAltoDevice
+from pypaloalto_api.enums import UidAction
+from pypaloalto_api.exceptions import PaloAltoException
+from pypaloalto_api.operational_commands import OPCmdBuilder
+from pypaloalto_api.user_id import UidEntry, UidMessageBuilder
+
+
+class RegisteredIpSyncResult:
+    def __init__(self, registered: int = 0, unregistered: int = 0, unchanged: int = 0, messages_sent: int = 0):
+        self.registered = registered
+        self.unregistered = unregistered
+        self.unchanged = unchanged
+        self.messages_sent = messages_sent
+
+    @property
+    def has_changes(self) -> bool:
+        return bool(self.registered or self.unregistered)
+
+    def __repr__(self):
+        return json.dumps({
+            'registered': self.registered,
+            'unregistered': self.unregistered,
+            'unchanged': self.unchanged,
+            'messages_sent': self.messages_sent,
+        }, indent=2)
+
+
+class RegisteredIpManager:
+    """Keeps device registered IP tags (dynamic address groups members) equal to desired IP -> tags mapping.
+    Current table is fetched once per sync, only differences are sent as batched uid-messages.
+
+    Only managed tags are unregistered: tags present in desired mapping and tags passed as managed_tags.
+    Pass tag in managed_tags to remove it from all IPs when it's no longer in desired mapping.
+
+    page_size - registered IPs per 'show' request, device limit is 500.
+    """
+
+    def __init__(self, device: PaloAltoDevice, vsys: Optional[str] = None, max_entries_per_message: int = 1000,
+                 request_timeout_seconds: int = None, page_size: int = 500):
+        self._device = device
+        self._page_size = page_size
+        self._additional_request_data = {'vsys': vsys} if vsys else {}
+        self._max_entries_per_message = max_entries_per_message
+        self._request_timeout_seconds = request_timeout_seconds
+
+    def get_registered_ips(self, tag: str = '') -> Dict[str, Set[str]]:
+        """Returns tags by IP. Table is fetched in pages of page_size entries"""
+        _registered_ips = {}
+        _start_point = 1
+
+        while True:
+            _reply, _status_code = self._device.xml_api_operational_request(
+                OPCmdBuilder.show_registered_ip(tag, _start_point, self._page_size),
+                request_timeout_seconds=self._request_timeout_seconds, **self._additional_request_data
+            )
+            _entries = _reply.findall('result/entry')
+
+            for _entry in _entries:
+                _registered_ips[_entry.get('ip')] = {x.text for x in _entry.findall('tag/member')}
+
+            if len(_entries) < self._page_size:
+                break
+
+            _start_point += len(_entries)
+
+        _count = _reply.findtext('result/count')
+
+        if _count and _count.isdigit() and int(_count) > len(_registered_ips):
+            raise PaloAltoException(f'Registered IPs table is incomplete: {len(_registered_ips)} of {_count} '
+                                    f'entries received', self._device.device_name)
+
+        return _registered_ips
+
+    @staticmethod
+    def compute_changes(desired: Dict[str, Iterable[str]], current: Dict[str, Set[str]],
+                        managed_tags: Iterable[str] = (), timeout_seconds: Optional[int] = None,
+                        persistent: bool = True) -> List[UidEntry]:
+        """Returns unregister entries first, then register entries"""
+        desired = {k: set(v) for k, v in desired.items()}
+        _managed_tags = set(managed_tags)
+
+        for _tags in desired.values():
+            _managed_tags.update(_tags)
+
+        _unregister = []
+        _register = []
+
+        for _ip, _tags in current.items():
+            _desired_tags = desired.get(_ip, set())
+
+            for _tag in sorted((_tags & _managed_tags) - _desired_tags):
+                _unregister.append(UidEntry(UidAction.unregister, _ip, tag=_tag))
+
+        for _ip, _tags in desired.items():
+            _current_tags = current.get(_ip, set())
+
+            for _tag in sorted(_tags - _current_tags):
+                _register.append(UidEntry(UidAction.register, _ip, tag=_tag, timeout=timeout_seconds,
+                                          persistent=persistent))
+
+        return _unregister + _register
+
+    def sync(self, desired: Dict[str, Iterable[str]], managed_tags: Iterable[str] = (),
+             timeout_seconds: Optional[int] = None, persistent: bool = True) -> RegisteredIpSyncResult:
+        _current = self.get_registered_ips()
+        _changes = self.compute_changes(desired, _current, managed_tags, timeout_seconds, persistent)
+        _result = RegisteredIpSyncResult()
+        _result.unchanged = sum(len(set(v) & _current.get(k, set())) for k, v in desired.items())
+
+        for _builder in UidMessageBuilder.split(_changes, self._max_entries_per_message):
+            self._device.xml_api_cmd_request(XmlApiRequestType.user_id, _builder.build(),
+                                             request_timeout_seconds=self._request_timeout_seconds,
+                                             **self._additional_request_data)
+            _result.messages_sent += 1
+
+        _result.registered = sum(1 for x in _changes if x.action == UidAction.register)
+        _result.unregistered = len(_changes) - _result.registered
+
+        return _result
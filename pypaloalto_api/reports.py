@@ -0,0 +1,175 @@
+import xml.etree.ElementTree as ET
+from typing import Optional, List, Dict, Iterator, Any
+
+from pypaloalto_api.cache import TtlLruCache
+from pypaloalto_api.configuration_commands import XmlApiRequestType
+from pypaloalto_api.devices import PaloAltoDevice
+from pypaloalto_api.enums import ReportType
+from pypaloalto_api.jobs import JobTracker, get_default_job_tracker
+
+
+class ReportQuery:
+    """period - dynamic report period like 'last-hour', 'last-24-hrs', 'last-7-days'
+    start_time/end_time - 'YYYY/MM/DD HH:MM:SS' window of dynamic report instead of period"""
+
+    def __init__(self, report_type: ReportType, report_name: str, period: Optional[str] = None,
+                 start_time: Optional[str] = None, end_time: Optional[str] = None, topn: Optional[int] = None,
+                 vsys: Optional[str] = None):
+        self.report_type = report_type
+        self.report_name = report_name
+        self.period = period
+        self.start_time = start_time
+        self.end_time = end_time
+        self.topn = topn
+        self.vsys = vsys
+
+    @property
+    def key(self) -> tuple:
+        return (self.report_type.value, self.report_name, self.period, self.start_time, self.end_time, self.topn,
+                self.vsys)
+
+    def to_request_data(self) -> dict:
+        _request_data = {
+            'type': XmlApiRequestType.report.value,
+            'reporttype': self.report_type.value,
+            'reportname': self.report_name,
+        }
+
+        for _name, _value in (('period', self.period), ('starttime', self.start_time), ('endtime', self.end_time),
+                              ('topn', self.topn), ('vsys', self.vsys)):
+            if _value is not None:
+                _request_data[_name] = str(_value)
+
+        return _request_data
+
+    def __repr__(self):
+        return f'ReportQuery{self.key}'
+
+
+class ReportTable:
+    """Report rows kept by columns"""
+
+    def __init__(self, columns: Dict[str, List[Optional[str]]], attributes: Optional[Dict[str, str]] = None):
+        self._columns = columns
+        self._attributes = attributes or {}
+        self._length = len(next(iter(columns.values()))) if columns else 0
+
+    @staticmethod
+    def from_xml(report: Optional[ET.Element]) -> 'ReportTable':
+        """Takes <report> node. Columns are in order of first appearance, missing values are None"""
+        if report is None:
+            return ReportTable({})
+
+        _columns: Dict[str, List[Optional[str]]] = {}
+        _entries = report.findall('entry')
+
+        for _index, _entry in enumerate(_entries):
+            for _child in _entry:
+                _column = _columns.get(_child.tag)
+
+                if _column is None:
+                    _column = [None] * len(_entries)
+                    _columns[_child.tag] = _column
+
+                _column[_index] = _child.text
+
+        return ReportTable(_columns, dict(report.attrib))
+
+    @property
+    def column_names(self) -> List[str]:
+        return list(self._columns)
+
+    @property
+    def attributes(self) -> Dict[str, str]:
+        """Report node attributes: name, start, end, generated-at..."""
+        return dict(self._attributes)
+
+    def __len__(self):
+        return self._length
+
+    def column(self, name: str) -> List[Optional[str]]:
+        return list(self._columns[name])
+
+    def rows(self) -> Iterator[Dict[str, Any]]:
+        _names = self.column_names
+
+        for _index in range(self._length):
+            yield {x: self._columns[x][_index] for x in _names}
+
+    def to_dict(self) -> Dict[str, List[Optional[str]]]:
+        return {k: list(v) for k, v in self._columns.items()}
+
+    def __repr__(self):
+        return f'ReportTable(rows={len(self)}, columns={self.column_names})'
+
+
+_default_report_cache = TtlLruCache(max_size=1024, ttl_seconds=60)
+
+
+class ReportClient:
+    """Runs predefined, dynamic and custom reports.
+
+    Dynamic and custom reports are run as async jobs polled by job_tracker (shared process tracker by default).
+    Results are cached by (device, report query) in cache (shared process cache with 60 seconds TTL by default),
+    concurrent requests of the same report wait for one fetch. cache=None disables caching."""
+
+    _NOT_SET = object()
+
+    def __init__(self, device: PaloAltoDevice, cache: Optional[TtlLruCache] = _NOT_SET,
+                 job_tracker: Optional[JobTracker] = None, job_timeout_seconds: Optional[float] = 600.0,
+                 request_timeout_seconds: int = None):
+        self._device = device
+        self._cache = _default_report_cache if cache is self._NOT_SET else cache
+        self._job_tracker = job_tracker or get_default_job_tracker()
+        self._job_timeout_seconds = job_timeout_seconds
+        self._request_timeout_seconds = request_timeout_seconds
+
+    def get_report(self, query: ReportQuery, ttl_seconds: Optional[float] = None) -> ReportTable:
+        if self._cache is None:
+            return self.__fetch_report(query)
+
+        _key = (self._device.serial, self._device.ipv4) + query.key
+
+        return self._cache.get_or_load(_key, lambda: self.__fetch_report(query), ttl_seconds)
+
+    def predefined(self, report_name: str, vsys: Optional[str] = None) -> ReportTable:
+        return self.get_report(ReportQuery(ReportType.predefined, report_name, vsys=vsys))
+
+    def dynamic(self, report_name: str, period: Optional[str] = 'last-24-hrs', start_time: Optional[str] = None,
+                end_time: Optional[str] = None, topn: Optional[int] = None) -> ReportTable:
+        if start_time or end_time:
+            period = None
+
+        return self.get_report(ReportQuery(ReportType.dynamic, report_name, period, start_time, end_time, topn))
+
+    def custom(self, report_name: str, vsys: Optional[str] = None) -> ReportTable:
+        return self.get_report(ReportQuery(ReportType.custom, report_name, vsys=vsys))
+
+    def __fetch_report(self, query: ReportQuery) -> ReportTable:
+        _request_data = query.to_request_data()
+
+        if query.report_type == ReportType.predefined:
+            _reply, _status_code = self._device.xml_api_request(
+                _request_data, request_timeout_seconds=self._request_timeout_seconds
+            )
+            # Predefined report reply is <report> node without <response> wrapper
+            return ReportTable.from_xml(_reply if _reply.tag == 'report' else _reply.find('result/report'))
+
+        _request_data['async'] = 'yes'
+        _reply, _status_code = self._device.xml_api_request(_request_data,
+                                                            request_timeout_seconds=self._request_timeout_seconds)
+        _job_id = _reply.findtext('result/job')
+        _reply = self._job_tracker.wait(
+            (self._device.serial, self._device.ipv4, 'report', _job_id), lambda: self.__get_job_reply(_job_id),
+            self._job_timeout_seconds, f'Report job {_job_id}', self._device.device_name,
+        )
+
+        return ReportTable.from_xml(_reply.find('result/report'))
+
+    def __get_job_reply(self, job_id: str) -> Optional[ET.Element]:
+        _reply, _status_code = self._device.xml_api_request(
+            {'type': XmlApiRequestType.report.value, 'action': 'get', 'job-id': job_id},
+            request_timeout_seconds=self._request_timeout_seconds,
+        )
+
+        return _reply if _reply.findtext('result/job/status') == 'FIN' else None
@@ -0,0 +1,308 @@
+import xml.etree.ElementTree as ET
+from typing import Optional, List, Dict, Callable, Tuple
+
+from pypaloalto_api.enums import HaPeerState
+
+# Split field paths shared by all result objects
+_PATH_PARTS_CACHE: Dict[str, Tuple[str, ...]] = {}
+
+
+def _get_path_parts(path: str) -> Tuple[str, ...]:
+    _parts = _PATH_PARTS_CACHE.get(path)
+
+    if _parts is None:
+        _parts = tuple(path.split('/'))
+        _PATH_PARTS_CACHE[path] = _parts
+
+    return _parts
+
+
+def _is_yes(value: str) -> bool:
+    return value in ('yes', 'on')
+
+
+class _Field:
+    """Text of node child by path, converted by parse and cached in the result object on first access"""
+
+    __slots__ = ('_path', '_parse', '_default', '_name')
+
+    def __init__(self, path: str, parse: Optional[Callable] = None, default=None):
+        self._path = path
+        self._parse = parse
+        self._default = default
+        self._name = path
+
+    def __set_name__(self, owner, name):
+        self._name = name
+
+    def __get__(self, instance: Optional['_LazyResult'], owner):
+        if instance is None:
+            return self
+
+        _values = instance._values
+
+        try:
+            return _values[self._name]
+        except KeyError:
+            pass
+
+        _text = instance._find_text(self._path)
+
+        if _text is None:
+            _value = self._default
+        else:
+            _value = self._parse(_text) if self._parse is not None else _text
+
+        _values[self._name] = _value
+        return _value
+
+
+class _LazyResult:
+    """Wraps reply node. Direct children are indexed by tag once on first field access,
+    so field access doesn't search the whole tree."""
+
+    __slots__ = ('_node', '_values', '_children')
+    _fields: Tuple[str, ...] = ()
+
+    def __init__(self, node: ET.Element):
+        self._node = node
+        self._values = {}
+        self._children: Optional[Dict[str, ET.Element]] = None
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._fields = tuple(k for _class in reversed(cls.__mro__) for k, v in vars(_class).items()
+                            if isinstance(v, _Field))
+
+    @property
+    def node(self) -> ET.Element:
+        return self._node
+
+    def _find(self, path: str) -> Optional[ET.Element]:
+        _parts = _get_path_parts(path)
+
+        if self._children is None:
+            _children = {}
+
+            for _child in self._node:
+                _children.setdefault(_child.tag, _child)
+
+            self._children = _children
+
+        _node = self._children.get(_parts[0])
+
+        for _part in _parts[1:]:
+            if _node is None:
+                return None
+
+            _node = _node.find(_part)
+
+        return _node
+
+    def _find_text(self, path: str) -> Optional[str]:
+        _node = self._find(path)
+
+        if _node is None:
+            return None
+
+        return _node.text or ''
+
+    def to_dict(self) -> dict:
+        return {x: getattr(self, x) for x in self._fields}
+
+    def __repr__(self):
+        return f'{self.__class__.__name__}({self.to_dict()})'
+
+
+def _get_result_node(reply: ET.Element, path: str) -> ET.Element:
+    """reply - <response> node of request, its <result> node or the node itself"""
+    _parts = _get_path_parts(path)
+
+    if reply.tag == _parts[-1]:
+        return reply
+
+    _node = reply.find(path) if reply.tag == 'response' else reply.find('/'.join(_parts[1:]))
+
+    return _node if _node is not None else ET.Element(_parts[-1])
+
+
+class SystemInfo(_LazyResult):
+    """show system info"""
+
+    __slots__ = ()
+
+    hostname = _Field('hostname')
+    devicename = _Field('devicename')
+    serial = _Field('serial')
+    ip_address = _Field('ip-address')
+    model = _Field('model')
+    family = _Field('family')
+    sw_version = _Field('sw-version')
+    app_version = _Field('app-version')
+    threat_version = _Field('threat-version')
+    av_version = _Field('av-version')
+    uptime = _Field('uptime')
+    is_multi_vsys = _Field('multi-vsys', _is_yes, False)
+    operational_mode = _Field('operational-mode')
+    system_mode = _Field('system-mode')
+
+    @staticmethod
+    def from_reply(reply: ET.Element) -> 'SystemInfo':
+        return SystemInfo(_get_result_node(reply, 'result/system'))
+
+
+class HaState(_LazyResult):
+    """show high-availability state. Local and peer info are under <group> on some models"""
+
+    __slots__ = ()
+
+    is_enabled = _Field('enabled', _is_yes, False)
+
+    @staticmethod
+    def from_reply(reply: ET.Element) -> 'HaState':
+        return HaState(_get_result_node(reply, 'result'))
+
+    def __info_text(self, name: str) -> Optional[str]:
+        _text = self._find_text(name)
+        return _text if _text is not None else self._find_text(f'group/{name}')
+
+    @property
+    def local_state(self) -> Optional[str]:
+        return self.__info_text('local-info/state')
+
+    @property
+    def peer_state(self) -> Optional[str]:
+        return self.__info_text('peer-info/state')
+
+    @property
+    def peer_connection_status(self) -> Optional[str]:
+        return self.__info_text('peer-info/conn-status')
+
+    @property
+    def running_sync(self) -> Optional[str]:
+        return self.__info_text('running-sync')
+
+    @property
+    def ha_peer_state(self) -> HaPeerState:
+        if not self.is_enabled:
+            return HaPeerState.ha_not_enabled
+
+        return HaPeerState(self.local_state)
+
+    def to_dict(self) -> dict:
+        _dict = super().to_dict()
+        _dict.update(local_state=self.local_state, peer_state=self.peer_state,
+                     peer_connection_status=self.peer_connection_status, running_sync=self.running_sync)
+        return _dict
+
+
+class ConnectedDevice(_LazyResult):
+    """Entry of show devices connected/all (Panorama only!)"""
+
+    __slots__ = ()
+
+    serial = _Field('serial')
+    hostname = _Field('hostname')
+    ip_address = _Field('ip-address')
+    model = _Field('model')
+    family = _Field('family')
+    sw_version = _Field('sw-version')
+    app_version = _Field('app-version')
+    threat_version = _Field('threat-version')
+    uptime = _Field('uptime')
+    is_connected = _Field('connected', _is_yes, False)
+    is_multi_vsys = _Field('multi-vsys', _is_yes, False)
+    ha_state_name = _Field('ha/state')
+    ha_peer_serial = _Field('ha/peer/serial')
+    connected_at = _Field('connected-at')
+
+    @staticmethod
+    def list_from_reply(reply: ET.Element) -> List['ConnectedDevice']:
+        return [ConnectedDevice(x) for x in _get_result_node(reply, 'result/devices').findall('entry')]
+
+    @property
+    def ha_state(self) -> HaPeerState:
+        return HaPeerState(self.ha_state_name) if self.ha_state_name else HaPeerState.ha_not_enabled
+
+    @property
+    def vsys_display_name_by_vsys_name(self) -> Dict[str, Optional[str]]:
+        _vsys = self._find('vsys')
+
+        if _vsys is None:
+            return {}
+
+        return {x.get('name'): x.findtext('display-name') for x in _vsys.findall('entry')}
+
+
+class DeviceGroupInfo(_LazyResult):
+    """Entry of show devicegroups (Panorama only!)"""
+
+    __slots__ = ()
+
+    shared_policy_md5sum = _Field('shared-policy-md5sum')
+
+    @staticmethod
+    def list_from_reply(reply: ET.Element) -> List['DeviceGroupInfo']:
+        return [DeviceGroupInfo(x) for x in _get_result_node(reply, 'result/devicegroups').findall('entry')]
+
+    @property
+    def name(self) -> str:
+        return self._node.get('name')
+
+    @property
+    def devices(self) -> List[ConnectedDevice]:
+        _devices = self._find('devices')
+        return [ConnectedDevice(x) for x in _devices.findall('entry')] if _devices is not None else []
+
+    @property
+    def serials(self) -> List[str]:
+        _devices = self._find('devices')
+        return [x.findtext('serial') or x.get('name') for x in _devices.findall('entry')] if _devices is not None \
+            else []
+
+    def get_vsys_names(self, serial: str) -> List[str]:
+        """Vsys of device attached to the device group, empty list if the whole device is attached"""
+        _devices = self._find('devices')
+
+        if _devices is None:
+            return []
+
+        return [x.get('name') for x in _devices.findall(f'entry[@name="{serial}"]/vsys/entry')]
+
+    def to_dict(self) -> dict:
+        _dict = super().to_dict()
+        _dict.update(name=self.name, serials=self.serials)
+        return _dict
+
+
+class JobInfo(_LazyResult):
+    """Entry of show jobs"""
+
+    __slots__ = ()
+
+    id = _Field('id')
+    type = _Field('type')
+    user = _Field('user')
+    status = _Field('status')
+    result = _Field('result')
+    progress = _Field('progress', lambda x: int(x) if x.isdigit() else 0, 0)
+    enqueued_at = _Field('tenq')
+    finished_at = _Field('tfin')
+    description = _Field('description')
+
+    @staticmethod
+    def list_from_reply(reply: ET.Element) -> List['JobInfo']:
+        return [JobInfo(x) for x in _get_result_node(reply, 'result').findall('job')]
+
+    @property
+    def is_finished(self) -> bool:
+        return self.status == 'FIN'
+
+    @property
+    def is_ok(self) -> bool:
+        return self.result == 'OK'
+
+    @property
+    def details(self) -> List[str]:
+        _details = self._find('details')
+        return [x.text for x in _details.iter('line') if x.text] if _details is not None else []
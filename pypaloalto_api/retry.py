@@ -0,0 +1,157 @@
+import random
+import threading
+from typing import Tuple, Optional, Dict
+
+import requests
+
+from pypaloalto_api.cache import CONFIG_READ_ACTIONS
+from pypaloalto_api.configuration_commands import XmlApiRequestType
+from pypaloalto_api.enums import HttpRequestMethod
+
+CONFIG_LOCK_TIMEOUT_MESSAGE = 'Timed out while getting config lock. Please try again.'
+CONFIG_LOCK_RETRY_REASON = 'Timed out while getting config lock'
+
+
+class RetryPolicy:
+    """When and how long to wait before repeating failed request.
+
+    Delay grows exponentially from base_delay_seconds up to max_delay_seconds. With jitter every delay is random
+    in [0, delay] (full jitter), so concurrent workers don't retry at the same moment.
+    Request is not repeated after max_attempts or if the next attempt would start after max_elapsed_seconds.
+
+    Config lock timeouts are always safe to repeat, the request wasn't executed. They are repeated up to
+    config_lock_max_attempts with delays growing from config_lock_base_delay_seconds, because the lock is usually
+    held by a commit for a while.
+    retry_status_codes (5xx), connection errors and read timeouts are repeated only for read-only requests
+    (config get/show, show commands, job results), unless retry_write_requests=True: a write or a commit could be
+    already executed by the device. Connection errors and read timeouts are not repeated by default,
+    connect timeouts are repeated only with retry_on_connect_timeout=True, every attempt can take the whole timeout.
+    """
+
+    def __init__(self, max_attempts: int = 3, base_delay_seconds: float = 1.0, max_delay_seconds: float = 30.0,
+                 max_elapsed_seconds: Optional[float] = 300.0, jitter: bool = True,
+                 retry_on_config_lock: bool = True, config_lock_max_attempts: int = 4,
+                 config_lock_base_delay_seconds: float = 10.0,
+                 retry_on_connection_errors: bool = False, retry_on_connect_timeout: bool = False,
+                 retry_on_read_timeout: bool = False,
+                 retry_status_codes: Tuple[int, ...] = (502, 503, 504),
+                 retry_write_requests: bool = False):
+        if max_attempts < 1 or config_lock_max_attempts < 1:
+            raise ValueError('max_attempts and config_lock_max_attempts must be >= 1')
+
+        self.max_attempts = max_attempts
+        self.base_delay_seconds = base_delay_seconds
+        self.max_delay_seconds = max_delay_seconds
+        self.max_elapsed_seconds = max_elapsed_seconds
+        self.jitter = jitter
+        self.retry_on_config_lock = retry_on_config_lock
+        self.config_lock_max_attempts = config_lock_max_attempts
+        self.config_lock_base_delay_seconds = config_lock_base_delay_seconds
+        self.retry_on_connection_errors = retry_on_connection_errors
+        self.retry_on_connect_timeout = retry_on_connect_timeout
+        self.retry_on_read_timeout = retry_on_read_timeout
+        self.retry_status_codes = retry_status_codes
+        self.retry_write_requests = retry_write_requests
+
+    def get_delay_seconds(self, attempt: int, retry_reason: str = '') -> float:
+        """attempt - number of failed attempt starting from 1"""
+        _base_delay_seconds = self.config_lock_base_delay_seconds if retry_reason == CONFIG_LOCK_RETRY_REASON \
+            else self.base_delay_seconds
+        _delay = min(self.max_delay_seconds, _base_delay_seconds * 2 ** (attempt - 1))
+
+        if self.jitter:
+            return random.uniform(0, _delay)
+
+        return _delay
+
+    def can_retry(self, attempt: int, elapsed_seconds: float, delay_seconds: float, retry_reason: str = '') -> bool:
+        _max_attempts = self.config_lock_max_attempts if retry_reason == CONFIG_LOCK_RETRY_REASON \
+            else self.max_attempts
+
+        if attempt >= _max_attempts:
+            return False
+
+        if self.max_elapsed_seconds is not None and elapsed_seconds + delay_seconds > self.max_elapsed_seconds:
+            return False
+
+        return True
+
+    def get_response_retry_reason(self, status_code: int, content: str or bytes,
+                                  is_read_only: bool = False) -> Optional[str]:
+        """Returns None if response must not be repeated"""
+        if status_code == 200:
+            return None
+
+        if self.retry_on_config_lock:
+            _message = CONFIG_LOCK_TIMEOUT_MESSAGE if isinstance(content, str) else CONFIG_LOCK_TIMEOUT_MESSAGE.encode()
+
+            if _message in content:
+                return CONFIG_LOCK_RETRY_REASON
+
+        if status_code in self.retry_status_codes and (is_read_only or self.retry_write_requests):
+            return f'Status code {status_code}'
+
+        return None
+
+    def is_retryable_exception(self, exception: Exception, is_read_only: bool = False) -> bool:
+        if not is_read_only and not self.retry_write_requests:
+            return False
+
+        if isinstance(exception, requests.ConnectTimeout):
+            return self.retry_on_connect_timeout
+
+        if isinstance(exception, requests.ReadTimeout):
+            return self.retry_on_read_timeout
+
+        if isinstance(exception, requests.ConnectionError):
+            return self.retry_on_connection_errors
+
+        return False
+
+
+def is_read_only_request(request_method: HttpRequestMethod, data: dict or str or None,
+                         params: Optional[dict] = None) -> bool:
+    """True if repeating the request can't change anything on the device"""
+    _fields = {}
+
+    if isinstance(params, dict):
+        _fields.update(params)
+
+    if isinstance(data, dict):
+        _fields.update(data)
+
+    _request_type = _fields.get('type')
+
+    if _request_type is None:
+        return request_method == HttpRequestMethod.get
+
+    if _request_type == XmlApiRequestType.config.value:
+        return _fields.get('action') in CONFIG_READ_ACTIONS
+
+    if _request_type == XmlApiRequestType.op.value:
+        return str(_fields.get('cmd', '')).lstrip().startswith('<show>')
+
+    if _request_type in (XmlApiRequestType.log.value, XmlApiRequestType.report.value):
+        return _fields.get('action') == 'get'
+
+    return _request_type in (XmlApiRequestType.version.value, XmlApiRequestType.export_files.value)
+
+
+NO_RETRY_POLICY = RetryPolicy(max_attempts=1)
+DEFAULT_RETRY_POLICY = RetryPolicy()
+
+_config_locks: Dict[str, threading.Lock] = {}
+_config_locks_guard = threading.Lock()
+
+
+def get_local_config_lock(device_address: str) -> threading.Lock:
+    """Returns process wide lock of device config. All objects of the same device get the same lock,
+    so workers of this process queue for it locally instead of fighting for the device config lock."""
+    with _config_locks_guard:
+        _lock = _config_locks.get(device_address)
+
+        if _lock is None:
+            _lock = threading.Lock()
+            _config_locks[device_address] = _lock
+
+        return _lock
@@ -0,0 +1,412 @@
+import json
+import mmap
+import os
+import struct
+import xml.etree.ElementTree as ET
+from array import array
+from enum import Enum
+from pathlib import Path
+from typing import Dict, List, Optional, Iterator, Iterable
+
+from pypaloalto_api.security_rule import SecurityRule, parse_paloalto_xml_to_json
+from pypaloalto_api.utils import get_current_date_time_as_string
+
+_MAGIC = b'PARA'
+_ARCHIVE_FORMAT_VERSION = 1
+# magic, format version, reserved, directory offset, directory length
+_HEADER = struct.Struct('<4sHHQQ')
+RULES_SECTION = 'security-rules'
+
+# Value word: kind in 2 low bits, string id or items count in the rest
+_KIND_STRING = 0
+_KIND_LIST = 1
+_KIND_DICT = 2
+_KIND_NONE = 3
+_MAX_WORD_ARGUMENT = (1 << 30) - 1
+
+
+class _ArchiveWriter:
+    """Builds archive in memory: string table, value words of all entries and per section tables"""
+
+    def __init__(self):
+        self._string_ids: Dict[str, int] = {}
+        self._words = array('I')
+        self._sections: Dict[str, dict] = {}
+
+    def _string_id(self, value: str) -> int:
+        _string_id = self._string_ids.get(value)
+
+        if _string_id is None:
+            _string_id = len(self._string_ids)
+
+            if _string_id > _MAX_WORD_ARGUMENT:
+                raise ValueError('Too many distinct strings for archive')
+
+            self._string_ids[value] = _string_id
+
+        return _string_id
+
+    def _encode(self, value):
+        if isinstance(value, Enum):
+            value = value.value
+
+        if isinstance(value, str):
+            self._words.append(self._string_id(value) << 2 | _KIND_STRING)
+
+        elif isinstance(value, dict):
+            self._words.append(len(value) << 2 | _KIND_DICT)
+
+            for _key, _value in value.items():
+                self._words.append(self._string_id(_key))
+                self._encode(_value)
+
+        elif isinstance(value, (list, tuple)):
+            self._words.append(len(value) << 2 | _KIND_LIST)
+
+            for _value in value:
+                self._encode(_value)
+
+        elif value is None:
+            self._words.append(_KIND_NONE)
+
+        else:
+            raise TypeError(f'Unsupported archive value type {type(value)}')
+
+    def add_section(self, section_name: str, entries: Iterable[dict]):
+        """entries - dicts with '@name', kept in given order"""
+        _bounds = array('Q')
+        _names = array('I')
+
+        for _entry in entries:
+            _bounds.append(len(self._words))
+            _names.append(self._string_id(_entry['@name']))
+            self._encode(_entry)
+
+        _bounds.append(len(self._words))
+        self._sections[section_name] = {'bounds': _bounds, 'names': _names}
+
+    def write(self, full_file_name: str or Path, metadata: dict) -> int:
+        _strings = [x.encode() for x in self._string_ids]
+        _string_offsets = array('Q', [0])
+
+        for _string in _strings:
+            _string_offsets.append(_string_offsets[-1] + len(_string))
+
+        _temp_file_name = f'{full_file_name}.tmp'
+
+        with open(_temp_file_name, 'wb') as _file:
+            _file.write(b'\0' * _HEADER.size)
+
+            def _write_block(data: bytes) -> int:
+                _offset = _file.tell()
+                _file.write(data)
+                # Blocks are 8 bytes aligned for memoryview casts
+                _file.write(b'\0' * (-_file.tell() % 8))
+                return _offset
+
+            _directory = dict(metadata)
+            _directory['format_version'] = _ARCHIVE_FORMAT_VERSION
+            _directory['strings'] = {
+                'count': len(_strings),
+                'offsets_offset': _write_block(_string_offsets.tobytes()),
+                'data_offset': _write_block(b''.join(_strings)),
+            }
+            _directory['words_offset'] = _write_block(self._words.tobytes())
+            _directory['words_count'] = len(self._words)
+            _directory['sections'] = {}
+
+            for _section_name, _section in self._sections.items():
+                _names = _section['names']
+                _sorted = array('I', sorted(range(len(_names)), key=lambda x: _strings[_names[x]]))
+                _directory['sections'][_section_name] = {
+                    'count': len(_names),
+                    'bounds_offset': _write_block(_section['bounds'].tobytes()),
+                    'names_offset': _write_block(_names.tobytes()),
+                    'sorted_offset': _write_block(_sorted.tobytes()),
+                }
+
+            _directory_data = json.dumps(_directory, separators=(',', ':')).encode()
+            _directory_offset = _write_block(_directory_data)
+            _size = _file.tell()
+            _file.seek(0)
+            _file.write(_HEADER.pack(_MAGIC, _ARCHIVE_FORMAT_VERSION, 0, _directory_offset, len(_directory_data)))
+
+        os.replace(_temp_file_name, full_file_name)
+        return _size
+
+
+def _get_entry_dicts(entries: List[dict] or ET.Element) -> List[dict]:
+    """Object entries as dicts. xml node with entries (like <address>) is converted like rule entries"""
+    if not isinstance(entries, ET.Element):
+        return entries
+
+    _dicts = []
+
+    for _entry in entries.findall('entry'):
+        _dict = parse_paloalto_xml_to_json(_entry, list_element_tags=['member', 'entry'])
+        _dict['@name'] = _entry.get('name')
+        _dicts.append(_dict)
+
+    return _dicts
+
+
+def _get_archived_rule_dict(rule: SecurityRule) -> dict:
+    _dict = rule.to_dict()
+
+    if rule.uuid is not None:
+        _dict['@uuid'] = rule.uuid
+
+    if rule.real_location is not None:
+        _dict['@loc'] = rule.real_location
+
+    return _dict
+
+
+class _Section:
+    __slots__ = ('count', 'bounds', 'names', 'sorted')
+
+    def __init__(self, count: int, bounds: memoryview, names: memoryview, sorted_indexes: memoryview):
+        self.count = count
+        self.bounds = bounds
+        self.names = names
+        self.sorted = sorted_indexes
+
+
+class RuleArchive:
+    """Memory mapped binary archive of security rules (in rulebase order) and named objects sections
+    ('address', 'service', ..). Member names and all other strings are kept once in the string table,
+    entries are length-prefixed trees of 32 bit words referencing it.
+
+    Opening doesn't read entries: lookup by name is a binary search over sorted name index,
+    entries are decoded into SecurityRule/dict only when asked.
+
+    RuleArchive.write('rules-2024-01-01.para', rules, {'address': address_entries_xml})
+    with RuleArchive('rules-2024-01-01.para') as archive:
+        rule = archive.get_rule('allow-dns')
+    """
+
+    def __init__(self, full_file_name: str or Path):
+        self._full_file_name = str(full_file_name)
+        self._strings_cache: Dict[int, str] = {}
+
+        with open(self._full_file_name, 'rb') as _file:
+            self._mmap = mmap.mmap(_file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        try:
+            _magic, _version, _, _directory_offset, _directory_length = _HEADER.unpack_from(self._mmap, 0)
+
+            if _magic != _MAGIC:
+                raise ValueError(f'{self._full_file_name} is not a rule archive')
+
+            if _version != _ARCHIVE_FORMAT_VERSION:
+                raise ValueError(f'Unsupported rule archive format version {_version}')
+
+            _directory = json.loads(self._mmap[_directory_offset:_directory_offset + _directory_length])
+        except Exception:
+            self._mmap.close()
+            raise
+
+        _view = memoryview(self._mmap)
+        _strings = _directory['strings']
+        self._directory = _directory
+        self._string_offsets = self.__cast(_view, _strings['offsets_offset'], _strings['count'] + 1, 'Q')
+        self._string_data = _view[_strings['data_offset']:]
+        self._words = self.__cast(_view, _directory['words_offset'], _directory['words_count'], 'I')
+        self._sections: Dict[str, _Section] = {}
+
+        for _section_name, _section in _directory['sections'].items():
+            _count = _section['count']
+            self._sections[_section_name] = _Section(_count,
+                                                     self.__cast(_view, _section['bounds_offset'], _count + 1, 'Q'),
+                                                     self.__cast(_view, _section['names_offset'], _count, 'I'),
+                                                     self.__cast(_view, _section['sorted_offset'], _count, 'I'))
+
+    @staticmethod
+    def __cast(view: memoryview, offset: int, count: int, item_format: str) -> memoryview:
+        return view[offset:offset + count * struct.calcsize(item_format)].cast(item_format)
+
+    @staticmethod
+    def write(full_file_name: str or Path, rules: List[SecurityRule],
+              objects: Optional[Dict[str, List[dict] or ET.Element]] = None,
+              device_serial: str = '', created_at: str = '') -> int:
+        """objects - {section name: entry dicts with '@name' or xml node with entries}
+        Returns archive size in bytes"""
+        _writer = _ArchiveWriter()
+        _writer.add_section(RULES_SECTION, (_get_archived_rule_dict(x) for x in rules))
+
+        for _section_name, _entries in (objects or {}).items():
+            if _section_name == RULES_SECTION:
+                raise ValueError(f'Section name {RULES_SECTION} is reserved for rules')
+
+            _writer.add_section(_section_name, _get_entry_dicts(_entries))
+
+        return _writer.write(full_file_name, {
+            'device_serial': device_serial,
+            'created_at': created_at or get_current_date_time_as_string(),
+        })
+
+    @property
+    def device_serial(self) -> str:
+        return self._directory['device_serial']
+
+    @property
+    def created_at(self) -> str:
+        return self._directory['created_at']
+
+    @property
+    def object_sections(self) -> List[str]:
+        return [x for x in self._sections if x != RULES_SECTION]
+
+    def __len__(self):
+        return self._sections[RULES_SECTION].count
+
+    def __contains__(self, rule_name: str):
+        return self.__find(self._sections[RULES_SECTION], rule_name) is not None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def close(self):
+        """Entries taken from archive stay valid after closing"""
+        for _section in self._sections.values():
+            _section.bounds.release()
+            _section.names.release()
+            _section.sorted.release()
+
+        self._sections = {}
+        self._string_offsets.release()
+        self._string_data.release()
+        self._words.release()
+        self._mmap.close()
+
+    def __get_string_bytes(self, string_id: int) -> bytes:
+        return bytes(self._string_data[self._string_offsets[string_id]:self._string_offsets[string_id + 1]])
+
+    def _get_string(self, string_id: int) -> str:
+        _string = self._strings_cache.get(string_id)
+
+        if _string is None:
+            _string = self.__get_string_bytes(string_id).decode()
+            self._strings_cache[string_id] = _string
+
+        return _string
+
+    def _decode(self, words: List[int], index: int) -> (object, int):
+        """Decodes value starting at words[index], returns value and index of the next word"""
+        _word = words[index]
+        _kind = _word & 3
+        _argument = _word >> 2
+        index += 1
+
+        if _kind == _KIND_STRING:
+            return self._get_string(_argument), index
+
+        if _kind == _KIND_LIST:
+            _list = []
+
+            for _ in range(_argument):
+                _value, index = self._decode(words, index)
+                _list.append(_value)
+
+            return _list, index
+
+        if _kind == _KIND_DICT:
+            _dict = {}
+
+            for _ in range(_argument):
+                _key = self._get_string(words[index])
+                _dict[_key], index = self._decode(words, index + 1)
+
+            return _dict, index
+
+        return None, index
+
+    def __find(self, section: _Section, name: str) -> Optional[int]:
+        """Entry index by name, binary search over names sorted by their utf-8 bytes"""
+        _name = name.encode()
+        _low = 0
+        _high = section.count
+
+        while _low < _high:
+            _middle = (_low + _high) // 2
+            _index = section.sorted[_middle]
+
+            if self.__get_string_bytes(section.names[_index]) < _name:
+                _low = _middle + 1
+            else:
+                _high = _middle
+
+        if _low < section.count:
+            _index = section.sorted[_low]
+
+            if self.__get_string_bytes(section.names[_index]) == _name:
+                return _index
+
+        return None
+
+    def __get_section(self, section_name: str) -> _Section:
+        _section = self._sections.get(section_name)
+
+        if _section is None:
+            raise KeyError(f'No section {section_name} in archive')
+
+        return _section
+
+    def __get_entry_dict(self, section: _Section, index: int) -> dict:
+        # Words of one entry are copied to list at once, it's faster than item by item access to mmap
+        return self._decode(self._words[section.bounds[index]:section.bounds[index + 1]].tolist(), 0)[0]
+
+    @property
+    def rule_names(self) -> List[str]:
+        """In rulebase order"""
+        _section = self._sections[RULES_SECTION]
+        return [self._get_string(x) for x in _section.names]
+
+    def get_rule_dict(self, rule_name: str) -> Optional[dict]:
+        """Rule like SecurityRule.to_dict() with '@uuid' and '@loc'"""
+        _section = self._sections[RULES_SECTION]
+        _index = self.__find(_section, rule_name)
+        return self.__get_entry_dict(_section, _index) if _index is not None else None
+
+    def get_rule(self, rule_name: str) -> Optional[SecurityRule]:
+        _rule_dict = self.get_rule_dict(rule_name)
+        return SecurityRule(_rule_dict) if _rule_dict is not None else None
+
+    def get_rule_by_position(self, position: int) -> SecurityRule:
+        _section = self._sections[RULES_SECTION]
+
+        if not -_section.count <= position < _section.count:
+            raise IndexError('Rule position out of range')
+
+        return SecurityRule(self.__get_entry_dict(_section, position % _section.count))
+
+    def iter_rules(self) -> Iterator[SecurityRule]:
+        """In rulebase order, every rule is decoded when it's taken"""
+        _section = self._sections[RULES_SECTION]
+
+        for _index in range(_section.count):
+            yield SecurityRule(self.__get_entry_dict(_section, _index))
+
+    def get_object_names(self, section_name: str) -> List[str]:
+        return [self._get_string(x) for x in self.__get_section(section_name).names]
+
+    def get_object(self, section_name: str, name: str) -> Optional[dict]:
+        _section = self.__get_section(section_name)
+        _index = self.__find(_section, name)
+        return self.__get_entry_dict(_section, _index) if _index is not None else None
+
+    def get_objects(self, section_name: str) -> List[dict]:
+        _section = self.__get_section(section_name)
+        return [self.__get_entry_dict(_section, x) for x in range(_section.count)]
+
+    def __repr__(self):
+        return json.dumps({
+            'full_file_name': self._full_file_name,
+            'device_serial': self.device_serial,
+            'created_at': self.created_at,
+            'rules_count': len(self) if self._sections else None,
+            'object_sections': self.object_sections,
+        }, indent=2)
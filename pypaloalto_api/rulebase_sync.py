@@ -0,0 +1,230 @@
+import json
+import os
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Set
+
+from pypaloalto_api import logger
+from pypaloalto_api.configuration_commands import ConfigAction, CCXPathBuilder
+from pypaloalto_api.devices import Panorama
+from pypaloalto_api.enums import RulebaseType, RuleType
+from pypaloalto_api.hashing import xml_content_hash
+from pypaloalto_api.operational_commands import OPCmdBuilder
+from pypaloalto_api.security_rule import SecurityRule, SecurityRuleBuilder
+
+_CACHE_FORMAT_VERSION = 3
+SHARED_LOCATION = 'shared'
+
+
+def _get_rule_content_hash(rule: SecurityRule) -> str:
+    """Name is not included, renamed rules are matched by uuid"""
+    _xml = rule.to_canonical_xml()
+    _xml.attrib.pop('name', None)
+    return xml_content_hash(_xml)
+
+
+class RulebaseSyncResult:
+    """What happened with one rulebase of one device group during incremental fetch.
+    Rules are matched with the cached ones by uuid (by name for rules without uuid), renamed - [old name, new name]"""
+
+    def __init__(self, device_group_name: str, rulebase_type: RulebaseType, is_fetched: bool,
+                 added: List[str] = None, removed: List[str] = None, changed: List[str] = None,
+                 renamed: List[List[str]] = None):
+        self.device_group_name = device_group_name
+        self.rulebase_type = rulebase_type
+        self.is_fetched = is_fetched
+        self.added = added or []
+        self.removed = removed or []
+        self.changed = changed or []
+        self.renamed = renamed or []
+
+    @property
+    def has_changes(self) -> bool:
+        return bool(self.added or self.removed or self.changed or self.renamed)
+
+    def __repr__(self):
+        return json.dumps({
+            'device_group_name': self.device_group_name,
+            'rulebase_type': self.rulebase_type.value,
+            'is_fetched': self.is_fetched,
+            'added': self.added,
+            'removed': self.removed,
+            'changed': self.changed,
+            'renamed': self.renamed,
+        }, indent=2)
+
+
+class IncrementalRulebaseFetcher:
+    """Keeps device groups (and 'shared') rulebases in local JSON cache between runs.
+    Every fetch asks Panorama for committed config version and for locations with not committed candidate changes.
+    Cached rulebases of a location are used while config version is the same and the location had no
+    candidate changes neither now nor when it was cached. Otherwise its rulebases are re-downloaded and
+    patched against the cache: rules are matched by uuid, unchanged rules are kept as cached.
+
+    Commit to Panorama changes config version, so all locations are re-downloaded once after every commit.
+    Devices and pushed policy don't matter, device groups without devices are cached like the others."""
+
+    def __init__(self, panorama: Panorama, cache_file: str or Path, rule_type: RuleType = RuleType.security,
+                 rulebase_types: Tuple[RulebaseType, ...] = (RulebaseType.pre_rule, RulebaseType.post_rule)):
+        self._panorama = panorama
+        self._cache_file = cache_file
+        self._rule_type = rule_type
+        self._rulebase_types = rulebase_types
+        self._cache = {'format_version': _CACHE_FORMAT_VERSION, 'device_groups': {}}
+        self._last_results: List[RulebaseSyncResult] = []
+
+        if os.path.isfile(cache_file):
+            with open(cache_file, 'r', encoding='UTF-8') as _file:
+                _cache = json.load(_file)
+
+            if _cache.get('format_version') == _CACHE_FORMAT_VERSION and _cache.get('rule_type') == rule_type.value:
+                self._cache = _cache
+            else:
+                logger.warning(f'[{panorama.device_name}]:Rulebase cache {cache_file} is incompatible and ignored.')
+
+        self._cache['rule_type'] = rule_type.value
+
+    @property
+    def last_results(self) -> List[RulebaseSyncResult]:
+        return list(self._last_results)
+
+    def get_device_group_names(self) -> List[str]:
+        _reply, _status_code = self._panorama.xml_api_operational_request(OPCmdBuilder.show_devicegroups())
+        return [x.get('name') for x in _reply.findall('result/devicegroups/entry')]
+
+    def get_config_version(self) -> str:
+        """The latest committed config version of Panorama, empty string if it's unknown"""
+        _reply, _status_code = self._panorama.xml_api_operational_request(OPCmdBuilder.show_config_audit_info())
+        _versions = [int(x.text) for x in _reply.findall('result/entry/version') if (x.text or '').strip().isdigit()]
+        return str(max(_versions)) if _versions else ''
+
+    def get_changed_locations(self) -> Set[str]:
+        """Device group names (and 'shared') with not committed candidate changes"""
+        _reply, _status_code = self._panorama.xml_api_operational_request(OPCmdBuilder.show_config_change_summary())
+        _locations = {x.text for x in _reply.findall('result/summary/device-group/member') if x.text}
+
+        if _reply.find('result/summary/shared') is not None:
+            _locations.add(SHARED_LOCATION)
+
+        return _locations
+
+    def invalidate(self, device_group_names: Optional[List[str]] = None):
+        """Forces re-download of device groups on the next fetch. All device groups if device_group_names is None"""
+        if device_group_names is None:
+            self._cache['device_groups'].clear()
+            return
+
+        for _device_group_name in device_group_names:
+            self._cache['device_groups'].pop(_device_group_name, None)
+
+    def fetch(self, device_group_names: Optional[List[str]] = None
+              ) -> Dict[str, Dict[RulebaseType, List[SecurityRule]]]:
+        """Returns rules by rulebase type by device group name ('shared' can be given too).
+        All device groups if device_group_names is None. Details of what was re-downloaded are in last_results."""
+        if device_group_names is None:
+            device_group_names = self.get_device_group_names()
+
+        _config_version = self.get_config_version()
+        _changed_locations = self.get_changed_locations()
+        _cached_device_groups = self._cache['device_groups']
+        _rules_by_device_group = {}
+        self._last_results = []
+
+        for _device_group_name in device_group_names:
+            _is_changed = _device_group_name in _changed_locations
+            _cached_device_group = _cached_device_groups.get(_device_group_name)
+            _is_fresh = _config_version and not _is_changed and _cached_device_group and \
+                _cached_device_group['config_version'] == _config_version and \
+                not _cached_device_group['is_changed'] and \
+                all(x.value in _cached_device_group['rulebases'] for x in self._rulebase_types)
+
+            if _is_fresh:
+                _rules_by_device_group[_device_group_name] = {
+                    x: self.__rules_from_cache(_cached_device_group['rulebases'][x.value]) for x in self._rulebase_types
+                }
+                self._last_results += [RulebaseSyncResult(_device_group_name, x, False) for x in self._rulebase_types]
+                continue
+
+            _previous_rulebases = _cached_device_group['rulebases'] if _cached_device_group else {}
+            _cached_device_group = {'config_version': _config_version, 'is_changed': _is_changed, 'rulebases': {}}
+            _rules_by_device_group[_device_group_name] = {}
+
+            for _rulebase_type in self._rulebase_types:
+                _rules = self.__fetch_rulebase(_device_group_name, _rulebase_type)
+                _cached_rulebase, _result = self.__patch_rulebase(
+                    _previous_rulebases.get(_rulebase_type.value), _rules,
+                    RulebaseSyncResult(_device_group_name, _rulebase_type, True)
+                )
+                _cached_device_group['rulebases'][_rulebase_type.value] = _cached_rulebase
+                _rules_by_device_group[_device_group_name][_rulebase_type] = _rules
+                self._last_results.append(_result)
+
+            _cached_device_groups[_device_group_name] = _cached_device_group
+
+        return _rules_by_device_group
+
+    def __patch_rulebase(self, cached_rulebase: Optional[dict], rules: List[SecurityRule],
+                         result: RulebaseSyncResult) -> Tuple[dict, RulebaseSyncResult]:
+        """Matches downloaded rules with cached ones by uuid (by name for rules without uuid).
+        Cached dicts of unchanged rules are reused"""
+        _previous_rules = cached_rulebase['rules'] if cached_rulebase else []
+        _previous_hashes = cached_rulebase['content_hashes'] if cached_rulebase else []
+        _previous_by_key = {
+            self.__cached_rule_key(x): (x, _hash) for x, _hash in zip(_previous_rules, _previous_hashes)
+        }
+        _cached_rules = []
+        _hashes = []
+
+        for _rule in rules:
+            _key = _rule.uuid or _rule.name
+            _previous_rule, _previous_hash = _previous_by_key.pop(_key, (None, None))
+            _hash = _get_rule_content_hash(_rule)
+            _is_renamed = _previous_rule is not None and _previous_rule['@name'] != _rule.name
+
+            if _previous_rule is None:
+                result.added.append(_rule.name)
+            elif _previous_hash != _hash:
+                result.changed.append(_rule.name)
+
+            if _is_renamed:
+                result.renamed.append([_previous_rule['@name'], _rule.name])
+
+            if _previous_rule is not None and _previous_hash == _hash and not _is_renamed:
+                _cached_rules.append(_previous_rule)
+            else:
+                _cached_rules.append(self.__rule_to_cache(_rule))
+
+            _hashes.append(_hash)
+
+        result.removed = [x['@name'] for x, _ in _previous_by_key.values()]
+        return {'content_hashes': _hashes, 'rules': _cached_rules}, result
+
+    @staticmethod
+    def __cached_rule_key(cached_rule: dict) -> str:
+        return cached_rule.get('@uuid') or cached_rule['@name']
+
+    def __fetch_rulebase(self, device_group_name: str, rulebase_type: RulebaseType) -> List[SecurityRule]:
+        _xpath = CCXPathBuilder.location(device_group_name) + CCXPathBuilder.rule(rulebase_type, self._rule_type)
+        _reply, _status_code = self._panorama.xml_api_config_request(ConfigAction.get, _xpath)
+
+        return SecurityRuleBuilder.create_security_rules_list(_reply.findall('result/rules/entry'))
+
+    @staticmethod
+    def __rule_to_cache(rule: SecurityRule) -> dict:
+        _rule_dict = rule.to_dict()
+
+        if rule.uuid:
+            _rule_dict['@uuid'] = rule.uuid
+
+        return _rule_dict
+
+    @staticmethod
+    def __rules_from_cache(cached_rulebase: dict) -> List[SecurityRule]:
+        return [SecurityRule(x) for x in cached_rulebase['rules']]
+
+    def save(self):
+        _temp_file_name = f'{self._cache_file}.tmp'
+
+        with open(_temp_file_name, 'w', encoding='UTF-8') as _file:
+            json.dump(self._cache, _file, separators=(',', ':'))
+
+        os.replace(_temp_file_name, self._cache_file)
@@ -1,11 +1,15 @@
 import copy
 import json
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Tuple
+from xml.parsers import expat
 from enum import Enum
 from abc import ABC
 from pypaloalto_api import utils
 from pypaloalto_api.enums import YesNo
 import xml.etree.ElementTree as ET
 from pypaloalto_api import dicttoxml
+from pypaloalto_api.hashing import IGNORED_ATTRIBUTES, xml_content_hash
 
 
 class CompositeType(ABC):
@@ -161,6 +165,12 @@ DEFAULT_VALUES_BY_KEY = {
 
 NONE_CLASSES = (NoneProfileSettings, NoneTargetDeviceEntry)
 
+# Rule flags which PaloAlto doesn't return when they have default value
+_DEFAULT_FLAG_VALUES = {
+    _key.value: _value.value for _key, _value in DEFAULT_VALUES_BY_KEY.items()
+    if isinstance(_value, YesNo) and '/' not in _key.value
+}
+
 
 class SecurityRule:
     __is_modified = False
@@ -179,6 +189,8 @@ class SecurityRule:
                 _entry = rule.find('.//entry')
 
             _rule_name = _entry.get('name')
+            self.__uuid = _entry.get('uuid')
+            self.__real_location = _entry.get('loc')
 
             target_node = _entry.find('.//target')
 
@@ -190,7 +202,6 @@ class SecurityRule:
             if target_node:
                 self._set_target_xml_to_rule_json(target_node)
 
-            print('test', self.__rule)
             self.__rule['@name'] = _rule_name
         else:
             raise TypeError(
@@ -200,6 +211,10 @@ class SecurityRule:
     def real_location(self) -> str or None:
         return self.__real_location
 
+    @property
+    def uuid(self) -> str or None:
+        return self.__uuid
+
     @property
     def is_modified(self) -> bool:
         return self.__is_modified
@@ -385,6 +400,22 @@ class SecurityRule:
     def clear_is_modified_flag(self):
         self.__is_modified = False
 
+    def to_canonical_xml(self) -> ET.Element:
+        """to_xml() without empty nodes and flags with default values.
+        The same for rule built locally and fetched from device"""
+        _xml = self.to_xml()
+        _remove_empty_nodes(_xml)
+
+        for _child in list(_xml):
+            if len(_child) == 0 and _DEFAULT_FLAG_VALUES.get(_child.tag) == (_child.text or '').strip():
+                _xml.remove(_child)
+
+        return _xml
+
+    def content_hash(self) -> str:
+        """Stable hash of rule content. Location and uuid are not included, members order does not matter"""
+        return xml_content_hash(self.to_canonical_xml())
+
     def to_dict(self) -> dict:
         _rule = copy.deepcopy(self.__rule)
         return _rule
@@ -457,14 +488,69 @@ class SecurityRule:
         return str(self.__rule)
 
 
+def _create_security_rules_from_chunk(chunk: bytes) -> list:
+    """Process pool worker. chunk - serialized rule entries wrapped by <rules> node"""
+    return [SecurityRule(x) for x in ET.fromstring(chunk)]
+
+
+def _find_rule_entries_byte_ranges(content: bytes) -> List[Tuple[int, int]]:
+    """(start, end) offsets of <entry> nodes which are children of <rules> nodes. Reply isn't built as tree"""
+    _parser = expat.ParserCreate()
+    _path = []
+    _ranges = []
+    _starts = []
+
+    def _start_element(name, attributes):
+        if name == 'entry' and _path and _path[-1] == 'rules':
+            _starts.append(_parser.CurrentByteIndex)
+
+        _path.append(name)
+
+    def _end_element(name):
+        _path.pop()
+
+        if name == 'entry' and _path and _path[-1] == 'rules':
+            # Index of the end tag, or index right after empty element <entry .../>
+            _index = _parser.CurrentByteIndex
+
+            if content.startswith(b'</entry', _index):
+                _index = content.index(b'>', _index) + 1
+
+            _ranges.append((_starts.pop(), _index))
+
+    _parser.StartElementHandler = _start_element
+    _parser.EndElementHandler = _end_element
+    _parser.Parse(content, True)
+
+    return _ranges
+
+
 class SecurityRuleBuilder:
     @staticmethod
-    def create_security_rules_list(rules) -> list:
+    def create_security_rules_list(rules, max_workers: int = 1, chunk_size: int = 500) -> list:
         """Takes json or xml reply from PaloAlto device
-        Returns list of SecurityRules"""
+        Returns list of SecurityRules
+
+        rules can be raw reply content (str or bytes, e.g. from xml_api_raw_request), then entries of <rules> nodes
+        are taken.
+        max_workers > 1 - parse xml rules by chunks of chunk_size in process pool. Chunks are sent to workers
+        as bytes: slices of raw reply content or serialized elements. It pays off for thousands of rules only."""
         _rules_list = []
 
-        if isinstance(rules, list):
+        if isinstance(rules, (str, bytes)):
+            _content = rules.encode() if isinstance(rules, str) else rules
+
+            if max_workers > 1:
+                _ranges = _find_rule_entries_byte_ranges(_content)
+                _chunks = [
+                    b'<rules>' + b''.join(_content[x:y] for x, y in _ranges[_index:_index + chunk_size]) + b'</rules>'
+                    for _index in range(0, len(_ranges), chunk_size)
+                ]
+                return SecurityRuleBuilder.__create_security_rules_list_in_processes(_chunks, max_workers)
+
+            rules = [x for _rules_node in ET.fromstring(_content).iter('rules') for x in _rules_node.findall('entry')]
+
+        elif isinstance(rules, list):
             pass
 
         elif isinstance(rules, ET.Element):
@@ -473,11 +559,38 @@ class SecurityRuleBuilder:
         else:
             raise TypeError("This class supports initializing only from dict and xml-element types!")
 
+        if max_workers > 1 and len(rules) > chunk_size and all(isinstance(x, ET.Element) for x in rules):
+            _chunks = [
+                b'<rules>' + b''.join(ET.tostring(x) for x in rules[_index:_index + chunk_size]) + b'</rules>'
+                for _index in range(0, len(rules), chunk_size)
+            ]
+            return SecurityRuleBuilder.__create_security_rules_list_in_processes(_chunks, max_workers)
+
         for _rule in rules:
             _rules_list.append(SecurityRule(_rule))
 
         return _rules_list
 
+    @staticmethod
+    def __create_security_rules_list_in_processes(chunks: List[bytes], max_workers: int) -> list:
+        """Results are merged in order of chunks"""
+        _rules_list = []
+
+        if not chunks:
+            return _rules_list
+
+        with ProcessPoolExecutor(min(max_workers, len(chunks))) as _executor:
+            for _chunk_rules in _executor.map(_create_security_rules_from_chunk, chunks):
+                _rules_list += _chunk_rules
+
+        return _rules_list
+
+    @staticmethod
+    def content_hashes(rules: list) -> dict:
+        """Takes list of SecurityRules
+        Returns dict {rule name: rule content hash}"""
+        return {x.name: x.content_hash() for x in rules}
+
     @staticmethod
     def security_rule_from_json(json_string: str):
         """Takes json as string
@@ -558,6 +671,15 @@ def parse_paloalto_xml_to_json(xml: ET.Element, list_element_tags=[], empty_valu
     return _result
 
 
+def _remove_empty_nodes(xml: ET.Element):
+    for _child in list(xml):
+        _remove_empty_nodes(_child)
+
+        if len(_child) == 0 and not (_child.text or '').strip() and \
+                not any(x not in IGNORED_ATTRIBUTES for x in _child.attrib):
+            xml.remove(_child)
+
+
 def _set_target_json_to_rule_xml(target_json: dict, rule_xml: ET.Element):
     if 'devices' in target_json or 'tags' in target_json:
         target_root_element = ET.SubElement(rule_xml, 'target')
@@ -0,0 +1,88 @@
+import io
+import time
+from typing import Callable, List, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from pypaloalto_api.utils import SharedOnCopy
+
+
+class PooledHttpSession(SharedOnCopy):
+    """requests.Session with keep-alive connection pool. Shared by all copies of the device.
+    pool_maxsize - max kept connections, set it not less than the number of threads using the device."""
+
+    def __init__(self, pool_maxsize: int = 10):
+        self._pool_maxsize = pool_maxsize
+        self._session = requests.Session()
+        _adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_maxsize, max_retries=0)
+        self._session.mount('https://', _adapter)
+        self._session.mount('http://', _adapter)
+
+    @property
+    def pool_maxsize(self) -> int:
+        return self._pool_maxsize
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        return self._session.request(method, url, **kwargs)
+
+    def close(self):
+        self._session.close()
+
+
+class ReplyStream(io.RawIOBase):
+    """Read-only file-like object over reply body. Body is received and decompressed while it's read,
+    so it isn't kept whole. Close it or use it as context manager to release the connection.
+    Close callbacks get the stream when it's closed: payload_bytes, transfer_seconds and read error are known then."""
+
+    def __init__(self, response: requests.Response, chunk_size: int = 64 * 1024):
+        self._response = response
+        self._chunks = response.iter_content(chunk_size)
+        self._buffer = b''
+        self._close_callbacks: List[Callable[['ReplyStream'], None]] = []
+        self.payload_bytes = 0
+        self.transfer_seconds = 0.0
+        self.error: Optional[BaseException] = None
+
+    @property
+    def status_code(self) -> int:
+        return self._response.status_code
+
+    def add_close_callback(self, callback: Callable[['ReplyStream'], None]):
+        self._close_callbacks.append(callback)
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        while not self._buffer:
+            _started_at = time.perf_counter()
+
+            try:
+                self._buffer = next(self._chunks)
+            except StopIteration:
+                return 0
+            except BaseException as e:
+                self.error = e
+                raise
+            finally:
+                self.transfer_seconds += time.perf_counter() - _started_at
+
+            self.payload_bytes += len(self._buffer)
+
+        _size = min(len(buffer), len(self._buffer))
+        buffer[:_size] = self._buffer[:_size]
+        self._buffer = self._buffer[_size:]
+
+        return _size
+
+    def close(self):
+        if not self.closed:
+            self._response.close()
+
+            try:
+                for _callback in self._close_callbacks:
+                    _callback(self)
+            finally:
+                self._close_callbacks = []
+                super().close()
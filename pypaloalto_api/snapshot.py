@@ -0,0 +1,197 @@
+import copy
+import gzip
+import json
+import xml.etree.ElementTree as ET
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from pypaloalto_api.configuration_commands import XmlApiConfigAction, ConfigAction, split_xpath
+from pypaloalto_api.devices import PaloAltoDevice
+from pypaloalto_api.exceptions import PaloAltoException
+from pypaloalto_api.utils import get_current_date_time_as_string
+
+_SNAPSHOT_FORMAT_VERSION = 1
+
+
+class _ChildrenIndex:
+    __slots__ = ('by_tag', 'entry_by_name')
+
+    def __init__(self, parent: ET.Element):
+        self.by_tag: Dict[str, List[ET.Element]] = {}
+        self.entry_by_name: Dict[str, ET.Element] = {}
+
+        for _child in parent:
+            self.by_tag.setdefault(_child.tag, []).append(_child)
+
+            if _child.tag == 'entry':
+                self.entry_by_name.setdefault(_child.get('name'), _child)
+
+
+class ConfigSnapshot:
+    """Full candidate or running config fetched once and queried locally with xml api xpaths.
+    Children of every node are indexed by tag and entries by @name on first access,
+    so every step of xpath like .../entry[@name='X'] is resolved in O(1)."""
+
+    def __init__(self, config_xml: ET.Element, is_running: bool = False, device_serial: str = '',
+                 created_at: str = ''):
+        if config_xml.tag != 'config':
+            _config_xml = config_xml.find('.//config')
+
+            if _config_xml is None:
+                raise ValueError(f'Expected "config" element, got "{config_xml.tag}"')
+
+            config_xml = _config_xml
+
+        self._config_xml = config_xml
+        self._is_running = is_running
+        self._device_serial = device_serial
+        self._created_at = created_at or get_current_date_time_as_string()
+        self._children_index: Dict[ET.Element, _ChildrenIndex] = {}
+
+    @staticmethod
+    def fetch(device: PaloAltoDevice, running: bool = False,
+              request_timeout_seconds: int = None) -> 'ConfigSnapshot':
+        """Fetches full candidate (or running if running=True) config from PaloAltoDevice with one request"""
+        _action = ConfigAction.show if running else ConfigAction.get
+        _reply_xml, _status_code = device.xml_api_config_request(
+            _action, '/config', request_timeout_seconds=request_timeout_seconds
+        )
+        _config_xml = _reply_xml.find('result/config')
+
+        if _config_xml is None:
+            raise PaloAltoException(f'Config not found in reply: {ET.tostring(_reply_xml)[:1024]}', device.device_name)
+
+        return ConfigSnapshot(_config_xml, running, device.serial)
+
+    @property
+    def config_xml(self) -> ET.Element:
+        """Live config tree. Do not modify it, indexes will not be updated"""
+        return self._config_xml
+
+    @property
+    def is_running(self) -> bool:
+        return self._is_running
+
+    @property
+    def device_serial(self) -> str:
+        return self._device_serial
+
+    @property
+    def created_at(self) -> str:
+        return self._created_at
+
+    def _get_children_index(self, parent: ET.Element) -> _ChildrenIndex:
+        _index = self._children_index.get(parent)
+
+        if _index is None:
+            _index = _ChildrenIndex(parent)
+            self._children_index[parent] = _index
+
+        return _index
+
+    def findall(self, xpath: str) -> List[ET.Element]:
+        """Returns live elements matched by absolute xpath starting with /config"""
+        _steps = split_xpath(xpath)
+
+        if _steps is None:
+            return self.__findall_by_element_path(xpath)
+
+        _first_tag, _first_name = _steps[0]
+
+        if _first_tag != self._config_xml.tag or _first_name is not None:
+            return []
+
+        _nodes = [self._config_xml]
+
+        for _tag, _name in _steps[1:]:
+            _next_nodes = []
+
+            for _node in _nodes:
+                _index = self._get_children_index(_node)
+
+                if _name is not None and _tag == 'entry':
+                    _entry = _index.entry_by_name.get(_name)
+
+                    if _entry is not None:
+                        _next_nodes.append(_entry)
+
+                elif _name is not None:
+                    _next_nodes += [x for x in _index.by_tag.get(_tag, []) if x.get('name') == _name]
+
+                else:
+                    _next_nodes += _index.by_tag.get(_tag, [])
+
+            if not _next_nodes:
+                return []
+
+            _nodes = _next_nodes
+
+        return _nodes
+
+    def find(self, xpath: str) -> Optional[ET.Element]:
+        _nodes = self.findall(xpath)
+        return _nodes[0] if _nodes else None
+
+    def __findall_by_element_path(self, xpath: str) -> List[ET.Element]:
+        """Fallback for xpaths with predicates unsupported by index"""
+        _root_prefix = f'/{self._config_xml.tag}'
+
+        if xpath == _root_prefix:
+            return [self._config_xml]
+
+        if not xpath.startswith(_root_prefix + '/'):
+            return []
+
+        try:
+            return self._config_xml.findall(f'.{xpath[len(_root_prefix):]}')
+        except SyntaxError:
+            return []
+
+    def xml_api_config_request(self, action: XmlApiConfigAction or ConfigAction, xpath: str,
+                               *args, **kwargs) -> Tuple[ET.Element, int]:
+        """Drop-in replacement of PaloAltoDevice.xml_api_config_request for 'get' and 'show' actions.
+        Returns reply built from snapshot like device does"""
+        if action.value not in (ConfigAction.get.value, ConfigAction.show.value):
+            raise PaloAltoException(f'Config snapshot supports only get and show actions, got {action.value}')
+
+        _nodes = self.findall(xpath)
+        _reply = ET.Element('response', {'status': 'success'})
+        _result = ET.SubElement(_reply, 'result', {'total-count': str(len(_nodes)), 'count': str(len(_nodes))})
+
+        for _node in _nodes:
+            _result.append(copy.deepcopy(_node))
+
+        return _reply, 200
+
+    def save(self, full_file_name: str or Path, compress_level: int = 6):
+        """Saves snapshot as gzip compressed json header line followed by config xml"""
+        _header = json.dumps({
+            'format_version': _SNAPSHOT_FORMAT_VERSION,
+            'is_running': self._is_running,
+            'device_serial': self._device_serial,
+            'created_at': self._created_at,
+        })
+
+        with gzip.open(full_file_name, 'wb', compresslevel=compress_level) as _file:
+            _file.write(_header.encode())
+            _file.write(b'\n')
+            _file.write(ET.tostring(self._config_xml))
+
+    @staticmethod
+    def load(full_file_name: str or Path) -> 'ConfigSnapshot':
+        with gzip.open(full_file_name, 'rb') as _file:
+            _header = json.loads(_file.readline())
+
+            if _header.get('format_version') != _SNAPSHOT_FORMAT_VERSION:
+                raise ValueError(f'Unsupported snapshot format version {_header.get("format_version")}')
+
+            _config_xml = ET.fromstring(_file.read())
+
+        return ConfigSnapshot(_config_xml, _header['is_running'], _header['device_serial'], _header['created_at'])
+
+    def __repr__(self):
+        return json.dumps({
+            'device_serial': self._device_serial,
+            'is_running': self._is_running,
+            'created_at': self._created_at,
+        }, indent=2)
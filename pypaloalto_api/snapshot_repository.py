@@ -0,0 +1,536 @@
+import datetime
+import hashlib
+import html
+import json
+import re
+import sqlite3
+import xml.etree.ElementTree as ET
+import zlib
+from array import array
+from contextlib import closing
+from pathlib import Path
+from typing import Dict, List, Optional, Iterable
+
+from pypaloalto_api.diff import entry_xpath
+from pypaloalto_api.enums import SnapshotChangeType
+from pypaloalto_api.snapshot import ConfigSnapshot, split_xpath
+from pypaloalto_api.utils import format_datetime_as_string
+
+# sqlite limit of query parameters is 999 in old versions
+_QUERY_PARAMETERS_LIMIT = 900
+ROOT_KEY = '/config'
+# Tags of ET.tostring output, '<' and '>' are always escaped there in texts and attribute values
+_TAG_PATTERN = re.compile(rb'<(/?)([^\s/>]+)([^>]*?)(/?)>')
+_NAME_ATTRIBUTE_PATTERN = re.compile(rb'\sname="([^"]*)"')
+_STUB_PATTERN = re.compile(rb'<entry name="[^"]*" />')
+
+
+def flatten_config(config_xml: ET.Element) -> Dict[str, bytes]:
+    """Splits config to items keyed by xpath: every named entry and the config root.
+    Item is serialized node where nested named entries are replaced by <entry name=".." /> stubs keeping order.
+    Config is serialized once and split by tags"""
+    _content = ET.tostring(config_xml)
+    _items = {}
+    # [key, parts, start of not yet taken content, depth of item node]
+    _open_items = []
+    _paths = []
+
+    for _match in _TAG_PATTERN.finditer(_content):
+        _is_closing, _tag, _attributes, _is_empty = _match.groups()
+
+        if _is_closing:
+            _paths.pop()
+
+            if len(_paths) == _open_items[-1][3]:
+                _key, _parts, _start, _ = _open_items.pop()
+                _parts.append(_content[_start:_match.end()])
+                _items[_key] = b''.join(_parts)
+
+                if _open_items:
+                    _open_items[-1][2] = _match.end()
+
+            continue
+
+        if not _paths:
+            _open_items.append([ROOT_KEY, [], _match.start(), 0])
+            _paths.append(ROOT_KEY)
+            continue
+
+        _name_match = _NAME_ATTRIBUTE_PATTERN.search(_attributes) if _tag == b'entry' else None
+
+        if _name_match is None:
+            if not _is_empty:
+                _paths.append(f'{_paths[-1]}/{_tag.decode()}')
+
+            continue
+
+        _key = entry_xpath(_paths[-1], html.unescape(_name_match.group(1).decode()))
+        _parent = _open_items[-1]
+        _parent[1].append(_content[_parent[2]:_match.start()])
+        _parent[1].append(b'<entry name="' + _name_match.group(1) + b'" />')
+
+        if _is_empty:
+            _items[_key] = _match.group(0)
+            _parent[2] = _match.end()
+        else:
+            _open_items.append([_key, [], _match.start(), len(_paths)])
+            _paths.append(_key)
+
+    return _items
+
+
+def _assemble_item(key: str, items: Dict[str, bytes], parts: List[bytes]):
+    """Appends item content to parts replacing stubs by nested items. Config is parsed once after assembling
+    instead of parsing every item"""
+    _content = items[key]
+
+    # Most of items (rules, objects) have no nested entries
+    if _STUB_PATTERN.search(_content, 1) is None:
+        parts.append(_content)
+        return
+
+    _paths = []
+    _position = 0
+
+    for _match in _TAG_PATTERN.finditer(_content):
+        _is_closing, _tag, _attributes, _is_empty = _match.groups()
+
+        if _is_closing:
+            _paths.pop()
+            continue
+
+        if not _paths:
+            _path = key
+        else:
+            _name_match = _NAME_ATTRIBUTE_PATTERN.search(_attributes) if _tag == b'entry' else None
+
+            if _name_match is not None:
+                parts.append(_content[_position:_match.start()])
+                _assemble_item(entry_xpath(_paths[-1], html.unescape(_name_match.group(1).decode())), items, parts)
+                _position = _match.end()
+                continue
+
+            _path = f'{_paths[-1]}/{_tag.decode()}'
+
+        if not _is_empty:
+            _paths.append(_path)
+
+    parts.append(_content[_position:])
+
+
+def build_config_node(key: str, items: Dict[str, bytes]) -> ET.Element:
+    """Reverse of flatten_config for item key and all nested items"""
+    _parts = []
+    _assemble_item(key, items, _parts)
+    return ET.fromstring(b''.join(_parts))
+
+
+def normalize_xpath(xpath: str) -> str:
+    """Item key of entry xpath: /config/devices/entry[@name="X"] -> /config/devices/entry[@name='X']"""
+    _steps = split_xpath(xpath)
+
+    if _steps is None:
+        raise ValueError(f'Only tags and [@name=".."] predicates are supported in xpath, got {xpath}')
+
+    _key = ''
+
+    for _tag, _name in _steps:
+        if _name is None:
+            _key = f'{_key}/{_tag}'
+        elif _tag == 'entry':
+            _key = entry_xpath(_key, _name)
+        else:
+            raise ValueError(f'Only entries can be selected by name in xpath, got {xpath}')
+
+    return _key
+
+
+def _get_item_name(key: str) -> Optional[str]:
+    _steps = split_xpath(key)
+    return _steps[-1][1] if _steps else None
+
+
+def _get_content_hash(content: bytes) -> bytes:
+    return hashlib.blake2b(content, digest_size=16).digest()
+
+
+def _pack_ids(content_id_by_key_id: Dict[int, int]) -> bytes:
+    _ids = array('I')
+
+    for _key_id in sorted(content_id_by_key_id):
+        _ids.append(_key_id)
+        _ids.append(content_id_by_key_id[_key_id])
+
+    return zlib.compress(_ids.tobytes())
+
+
+def _unpack_ids(data: bytes) -> Dict[int, int]:
+    _ids = array('I')
+    _ids.frombytes(zlib.decompress(data))
+    return dict(zip(_ids[::2], _ids[1::2]))
+
+
+def _chunks(values: list, size: int = _QUERY_PARAMETERS_LIMIT) -> Iterable[list]:
+    for _index in range(0, len(values), size):
+        yield values[_index:_index + size]
+
+
+class SnapshotInfo:
+    def __init__(self, snapshot_id: int, created_at: str, device_serial: str, is_running: bool, base_id: int):
+        self.snapshot_id = snapshot_id
+        self.created_at = created_at
+        self.device_serial = device_serial
+        self.is_running = is_running
+        self.base_id = base_id
+
+    @property
+    def is_base(self) -> bool:
+        return self.snapshot_id == self.base_id
+
+    def __repr__(self):
+        return json.dumps({
+            'snapshot_id': self.snapshot_id,
+            'created_at': self.created_at,
+            'device_serial': self.device_serial,
+            'is_running': self.is_running,
+            'base_id': self.base_id,
+        }, indent=2)
+
+
+class EntryChange:
+    def __init__(self, snapshot_id: int, created_at: str, xpath: str, change_type: SnapshotChangeType):
+        self.snapshot_id = snapshot_id
+        self.created_at = created_at
+        self.xpath = xpath
+        self.change_type = change_type
+
+    def __repr__(self):
+        return json.dumps({
+            'snapshot_id': self.snapshot_id,
+            'created_at': self.created_at,
+            'xpath': self.xpath,
+            'change_type': self.change_type.value,
+        }, indent=2)
+
+
+class SnapshotRepository:
+    """Time-series of config snapshots in sqlite file.
+
+    Config is split to items: every named entry (rule, address, device group, ..) keyed by its xpath.
+    Snapshot is stored as delta to the previous snapshot of the same device: added, changed and removed items.
+    Every rebase_every snapshots a base is written: ids of all items and their contents.
+    Item contents are kept once per distinct content, new contents of every snapshot are compressed together.
+
+    Snapshot is restored from its base and the latest change of every item since the base,
+    deltas are not replayed day by day. Changes are indexed by item xpath and entry name for history queries.
+
+    repository = SnapshotRepository('panorama_snapshots.sqlite')
+    repository.add(ConfigSnapshot.fetch(panorama))
+    snapshot = repository.get_snapshot_at('2024-03-01 00:00:00', panorama.serial)
+    history = repository.get_rule_history('allow-dns')
+    """
+
+    def __init__(self, full_file_name: str or Path, rebase_every: int = 30):
+        if rebase_every < 1:
+            raise ValueError('rebase_every must be >= 1')
+
+        self._full_file_name = str(full_file_name)
+        self._rebase_every = rebase_every
+
+        with closing(self.__connect()) as _connection, _connection:
+            _connection.executescript(
+                'CREATE TABLE IF NOT EXISTS snapshots (id INTEGER PRIMARY KEY, created_at TEXT NOT NULL, '
+                'device_serial TEXT NOT NULL, is_running INTEGER NOT NULL, base_id INTEGER NOT NULL);'
+                'CREATE INDEX IF NOT EXISTS snapshots_chain ON snapshots (device_serial, is_running, created_at);'
+                'CREATE TABLE IF NOT EXISTS keys (id INTEGER PRIMARY KEY, key TEXT NOT NULL UNIQUE, name TEXT);'
+                'CREATE INDEX IF NOT EXISTS keys_name ON keys (name);'
+                'CREATE TABLE IF NOT EXISTS packs (id INTEGER PRIMARY KEY, data BLOB NOT NULL);'
+                'CREATE TABLE IF NOT EXISTS contents (id INTEGER PRIMARY KEY, hash BLOB NOT NULL UNIQUE, '
+                'pack_id INTEGER NOT NULL, offset INTEGER NOT NULL, length INTEGER NOT NULL);'
+                'CREATE TABLE IF NOT EXISTS bases (snapshot_id INTEGER PRIMARY KEY, items BLOB NOT NULL);'
+                'CREATE TABLE IF NOT EXISTS changes (snapshot_id INTEGER NOT NULL, key_id INTEGER NOT NULL, '
+                'change_type TEXT NOT NULL, content_id INTEGER, PRIMARY KEY (snapshot_id, key_id)) WITHOUT ROWID;'
+                'CREATE INDEX IF NOT EXISTS changes_key ON changes (key_id);'
+            )
+
+    def __connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self._full_file_name, timeout=30)
+
+    @property
+    def rebase_every(self) -> int:
+        return self._rebase_every
+
+    @staticmethod
+    def __get_snapshot_info(connection: sqlite3.Connection, snapshot_id: int) -> SnapshotInfo:
+        _row = connection.execute('SELECT id, created_at, device_serial, is_running, base_id FROM snapshots '
+                                  'WHERE id = ?', (snapshot_id,)).fetchone()
+
+        if _row is None:
+            raise KeyError(f'No snapshot {snapshot_id}')
+
+        return SnapshotInfo(_row[0], _row[1], _row[2], bool(_row[3]), _row[4])
+
+    @staticmethod
+    def __get_last_snapshot_info(connection: sqlite3.Connection, device_serial: str, is_running: bool,
+                                 created_before: Optional[str] = None) -> Optional[SnapshotInfo]:
+        _query = 'SELECT id, created_at, device_serial, is_running, base_id FROM snapshots ' \
+                 'WHERE device_serial = ? AND is_running = ?'
+        _parameters = [device_serial, int(is_running)]
+
+        if created_before is not None:
+            _query += ' AND created_at <= ?'
+            _parameters.append(created_before)
+
+        _row = connection.execute(f'{_query} ORDER BY created_at DESC, id DESC LIMIT 1', _parameters).fetchone()
+        return SnapshotInfo(_row[0], _row[1], _row[2], bool(_row[3]), _row[4]) if _row is not None else None
+
+    @staticmethod
+    def __select_by_ids(connection: sqlite3.Connection, query: str, ids: Iterable) -> list:
+        """query with {} in place of ids list"""
+        _rows = []
+
+        for _chunk in _chunks(list(ids)):
+            _rows += connection.execute(query.format(','.join('?' * len(_chunk))), _chunk).fetchall()
+
+        return _rows
+
+    def __get_key_ids(self, connection: sqlite3.Connection, keys: Iterable[str]) -> Dict[str, int]:
+        """Adds missing keys"""
+        _key_ids = dict(self.__select_by_ids(connection, 'SELECT key, id FROM keys WHERE key IN ({})', keys))
+
+        for _key in keys:
+            if _key not in _key_ids:
+                _key_ids[_key] = connection.execute('INSERT INTO keys (key, name) VALUES (?, ?)',
+                                                    (_key, _get_item_name(_key))).lastrowid
+
+        return _key_ids
+
+    def __get_content_ids(self, connection: sqlite3.Connection, items: Dict[str, bytes]) -> Dict[str, int]:
+        """Content id of every item. New contents are compressed together into one pack"""
+        _hashes = {k: _get_content_hash(v) for k, v in items.items()}
+        _content_ids = dict(self.__select_by_ids(connection, 'SELECT hash, id FROM contents WHERE hash IN ({})',
+                                                 set(_hashes.values())))
+        _new_contents: Dict[bytes, bytes] = {}
+
+        for _key, _hash in _hashes.items():
+            if _hash not in _content_ids:
+                _new_contents.setdefault(_hash, items[_key])
+
+        if _new_contents:
+            _pack_id = connection.execute('INSERT INTO packs (data) VALUES (?)',
+                                          (zlib.compress(b''.join(_new_contents.values())),)).lastrowid
+            _offset = 0
+
+            for _hash, _content in _new_contents.items():
+                _content_ids[_hash] = connection.execute(
+                    'INSERT INTO contents (hash, pack_id, offset, length) VALUES (?, ?, ?, ?)',
+                    (_hash, _pack_id, _offset, len(_content))
+                ).lastrowid
+                _offset += len(_content)
+
+        return {k: _content_ids[v] for k, v in _hashes.items()}
+
+    @staticmethod
+    def __get_item_content_ids(connection: sqlite3.Connection, snapshot_info: SnapshotInfo,
+                               key_ids: Optional[set] = None) -> Dict[int, int]:
+        """Content ids by key ids of snapshot items: base items overridden by the latest change of every item
+        since the base. key_ids - only these items"""
+        _content_ids = _unpack_ids(connection.execute('SELECT items FROM bases WHERE snapshot_id = ?',
+                                                      (snapshot_info.base_id,)).fetchone()[0])
+
+        if key_ids is not None:
+            _content_ids = {k: v for k, v in _content_ids.items() if k in key_ids}
+
+        # sqlite takes bare columns from the row with MAX()
+        for _key_id, _content_id, _ in connection.execute(
+                'SELECT key_id, content_id, MAX(snapshot_id) FROM changes WHERE snapshot_id > ? AND snapshot_id <= ? '
+                'AND snapshot_id IN (SELECT id FROM snapshots WHERE base_id = ?) GROUP BY key_id',
+                (snapshot_info.base_id, snapshot_info.snapshot_id, snapshot_info.base_id)):
+            if key_ids is not None and _key_id not in key_ids:
+                continue
+
+            if _content_id is None:
+                _content_ids.pop(_key_id, None)
+            else:
+                _content_ids[_key_id] = _content_id
+
+        return _content_ids
+
+    def __get_items(self, connection: sqlite3.Connection, content_id_by_key_id: Dict[int, int],
+                    key_by_key_id: Dict[int, str]) -> Dict[str, bytes]:
+        _locations = {x[0]: x[1:] for x in self.__select_by_ids(
+            connection, 'SELECT id, pack_id, offset, length FROM contents WHERE id IN ({})',
+            set(content_id_by_key_id.values())
+        )}
+        _packs = {x[0]: zlib.decompress(x[1]) for x in self.__select_by_ids(
+            connection, 'SELECT id, data FROM packs WHERE id IN ({})', {x[0] for x in _locations.values()}
+        )}
+        _items = {}
+
+        for _key_id, _content_id in content_id_by_key_id.items():
+            _pack_id, _offset, _length = _locations[_content_id]
+            _items[key_by_key_id[_key_id]] = _packs[_pack_id][_offset:_offset + _length]
+
+        return _items
+
+    def add(self, snapshot: ConfigSnapshot) -> SnapshotInfo:
+        """Snapshots of one device (and running or candidate) must be added in order of their creation"""
+        _items = flatten_config(snapshot.config_xml)
+
+        with closing(self.__connect()) as _connection, _connection:
+            _previous = self.__get_last_snapshot_info(_connection, snapshot.device_serial, snapshot.is_running)
+
+            if _previous is not None and snapshot.created_at < _previous.created_at:
+                raise ValueError(f'Snapshot created at {snapshot.created_at} is older than the last one '
+                                 f'created at {_previous.created_at}')
+
+            _previous_content_ids = self.__get_item_content_ids(_connection, _previous) \
+                if _previous is not None else {}
+            _key_ids = self.__get_key_ids(_connection, list(_items))
+            _content_ids = self.__get_content_ids(_connection, _items)
+            _content_id_by_key_id = {_key_ids[k]: v for k, v in _content_ids.items()}
+            _changes = []
+
+            for _key_id, _content_id in _content_id_by_key_id.items():
+                _previous_content_id = _previous_content_ids.get(_key_id)
+
+                if _previous_content_id is None:
+                    _changes.append((_key_id, SnapshotChangeType.added.value, _content_id))
+                elif _previous_content_id != _content_id:
+                    _changes.append((_key_id, SnapshotChangeType.changed.value, _content_id))
+
+            _changes += [(x, SnapshotChangeType.removed.value, None) for x in _previous_content_ids
+                         if x not in _content_id_by_key_id]
+
+            _is_base = _previous is None or _connection.execute(
+                'SELECT COUNT(*) FROM snapshots WHERE base_id = ?', (_previous.base_id,)
+            ).fetchone()[0] >= self._rebase_every
+
+            _snapshot_id = _connection.execute(
+                'INSERT INTO snapshots (created_at, device_serial, is_running, base_id) VALUES (?, ?, ?, ?)',
+                (snapshot.created_at, snapshot.device_serial, int(snapshot.is_running),
+                 0 if _is_base else _previous.base_id)
+            ).lastrowid
+            _base_id = _snapshot_id if _is_base else _previous.base_id
+
+            if _is_base:
+                _connection.execute('UPDATE snapshots SET base_id = ? WHERE id = ?', (_base_id, _snapshot_id))
+                _connection.execute('INSERT INTO bases (snapshot_id, items) VALUES (?, ?)',
+                                    (_snapshot_id, _pack_ids(_content_id_by_key_id)))
+
+            _connection.executemany(
+                'INSERT INTO changes (snapshot_id, key_id, change_type, content_id) VALUES (?, ?, ?, ?)',
+                ((_snapshot_id,) + x for x in _changes)
+            )
+
+        return SnapshotInfo(_snapshot_id, snapshot.created_at, snapshot.device_serial, snapshot.is_running,
+                            _base_id)
+
+    def get_snapshots(self, device_serial: Optional[str] = None) -> List[SnapshotInfo]:
+        """All snapshots or snapshots of device_serial in order of creation"""
+        _query = 'SELECT id, created_at, device_serial, is_running, base_id FROM snapshots'
+        _parameters = ()
+
+        if device_serial is not None:
+            _query += ' WHERE device_serial = ?'
+            _parameters = (device_serial,)
+
+        with closing(self.__connect()) as _connection:
+            _rows = _connection.execute(f'{_query} ORDER BY created_at, id', _parameters).fetchall()
+
+        return [SnapshotInfo(x[0], x[1], x[2], bool(x[3]), x[4]) for x in _rows]
+
+    def get_snapshot(self, snapshot_id: int) -> ConfigSnapshot:
+        with closing(self.__connect()) as _connection:
+            _snapshot_info = self.__get_snapshot_info(_connection, snapshot_id)
+            _content_ids = self.__get_item_content_ids(_connection, _snapshot_info)
+            _keys = dict(self.__select_by_ids(_connection, 'SELECT id, key FROM keys WHERE id IN ({})', _content_ids))
+            _items = self.__get_items(_connection, _content_ids, _keys)
+
+        return ConfigSnapshot(build_config_node(ROOT_KEY, _items), _snapshot_info.is_running,
+                              _snapshot_info.device_serial, _snapshot_info.created_at)
+
+    def get_snapshot_at(self, date_time: str or datetime.datetime, device_serial: str = '',
+                        is_running: bool = False) -> Optional[ConfigSnapshot]:
+        """The last snapshot created not later than date_time ('YYYY-MM-DD HH:MM:SS')"""
+        _snapshot_info = self.get_snapshot_info_at(date_time, device_serial, is_running)
+        return self.get_snapshot(_snapshot_info.snapshot_id) if _snapshot_info is not None else None
+
+    def get_snapshot_info_at(self, date_time: str or datetime.datetime, device_serial: str = '',
+                             is_running: bool = False) -> Optional[SnapshotInfo]:
+        if isinstance(date_time, datetime.datetime):
+            date_time = format_datetime_as_string(date_time)
+
+        with closing(self.__connect()) as _connection:
+            return self.__get_last_snapshot_info(_connection, device_serial, is_running, date_time)
+
+    def get_entry(self, xpath: str, snapshot_id: int) -> Optional[ET.Element]:
+        """Entry (or whole config for /config) as it was in snapshot. Only items of the entry are read"""
+        _key = normalize_xpath(xpath)
+
+        with closing(self.__connect()) as _connection:
+            # '0' follows '/', so range selects keys of nested items
+            _keys = dict(_connection.execute('SELECT id, key FROM keys WHERE key = ? OR (key > ? AND key < ?)',
+                                             (_key, f'{_key}/', f'{_key}0')))
+            _snapshot_info = self.__get_snapshot_info(_connection, snapshot_id)
+            _content_ids = self.__get_item_content_ids(_connection, _snapshot_info, set(_keys))
+            _items = self.__get_items(_connection, _content_ids, _keys)
+
+        return build_config_node(_key, _items) if _key in _items else None
+
+    @staticmethod
+    def __get_entry_changes(connection: sqlite3.Connection, condition: str, parameters: tuple) -> List[EntryChange]:
+        _rows = connection.execute(
+            f'SELECT changes.snapshot_id, snapshots.created_at, keys.key, changes.change_type FROM changes '
+            f'JOIN snapshots ON snapshots.id = changes.snapshot_id JOIN keys ON keys.id = changes.key_id '
+            f'WHERE {condition} ORDER BY snapshots.created_at, changes.snapshot_id', parameters
+        ).fetchall()
+
+        return [EntryChange(x[0], x[1], x[2], SnapshotChangeType(x[3])) for x in _rows]
+
+    def get_history(self, xpath: str, device_serial: Optional[str] = None) -> List[EntryChange]:
+        """Snapshots where entry was added, changed or removed. Changes of nested entries aren't included"""
+        _condition = 'keys.key = ?'
+        _parameters = (normalize_xpath(xpath),)
+
+        if device_serial is not None:
+            _condition += ' AND snapshots.device_serial = ?'
+            _parameters += (device_serial,)
+
+        with closing(self.__connect()) as _connection:
+            return self.__get_entry_changes(_connection, _condition, _parameters)
+
+    def get_rule_history(self, rule_name: str, device_serial: Optional[str] = None) -> List[EntryChange]:
+        """Changes of rules named rule_name in all rulebases and device groups"""
+        _condition = 'keys.name = ?'
+        _parameters = (rule_name,)
+
+        if device_serial is not None:
+            _condition += ' AND snapshots.device_serial = ?'
+            _parameters += (device_serial,)
+
+        with closing(self.__connect()) as _connection:
+            _changes = self.__get_entry_changes(_connection, _condition, _parameters)
+
+        return [x for x in _changes if x.xpath.rsplit('/entry[', 1)[0].endswith('/rules')]
+
+    def get_changes(self, snapshot_id: int) -> List[EntryChange]:
+        """What changed in snapshot against the previous snapshot of the device"""
+        with closing(self.__connect()) as _connection:
+            return self.__get_entry_changes(_connection, 'changes.snapshot_id = ?', (snapshot_id,))
+
+    def get_storage_stats(self) -> dict:
+        with closing(self.__connect()) as _connection:
+            def _get_value(query: str):
+                return _connection.execute(query).fetchone()[0]
+
+            return {
+                'snapshots': _get_value('SELECT COUNT(*) FROM snapshots'),
+                'bases': _get_value('SELECT COUNT(*) FROM bases'),
+                'items': _get_value('SELECT COUNT(*) FROM keys'),
+                'contents': _get_value('SELECT COUNT(*) FROM contents'),
+                'changes': _get_value('SELECT COUNT(*) FROM changes'),
+                'packs_bytes': _get_value('SELECT COALESCE(SUM(LENGTH(data)), 0) FROM packs'),
+                'bases_bytes': _get_value('SELECT COALESCE(SUM(LENGTH(items)), 0) FROM bases'),
+                'file_bytes': Path(self._full_file_name).stat().st_size,
+            }
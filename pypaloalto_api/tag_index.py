@@ -0,0 +1,63 @@
+import xml.etree.ElementTree as ET
+from typing import Dict, List, Set, Optional
+
+
+class PanoramaTagIndex:
+    """Inverted index of Panorama tags of managed devices (mgt-config/devices).
+
+    Target is 'serial/vsys' for vsys tags and 'serial' for tags of devices without vsys entries."""
+
+    def __init__(self, tags_by_target: Dict[str, List[str]], tags_by_serial: Dict[str, List[str]]):
+        self._tags_by_target = tags_by_target
+        self._tags_by_serial = tags_by_serial
+        self._targets_by_tag: Dict[str, Set[str]] = {}
+
+        for _target, _tags in tags_by_target.items():
+            for _tag in _tags:
+                self._targets_by_tag.setdefault(_tag, set()).add(_target)
+
+    @staticmethod
+    def from_xml(mgmt_device_entries: ET.Element) -> 'PanoramaTagIndex':
+        """Takes node with device entries: result node of /config/mgt-config/devices/entry get request"""
+        _tags_by_target = {}
+        _tags_by_serial = {}
+
+        for _device_entry in mgmt_device_entries:
+            _serial = _device_entry.get('name')
+            _vsys_entries = _device_entry.findall('.//vsys/entry')
+            _tags_by_serial[_serial] = [x.text for x in _device_entry.findall('.//tags/member')]
+
+            if not _vsys_entries:
+                _tags_by_target[_serial] = [x.text for x in _device_entry.findall('tags/member')]
+                continue
+
+            for _vsys_entry in _vsys_entries:
+                _tags_by_target[f'{_serial}/{_vsys_entry.get("name")}'] = [
+                    x.text for x in _vsys_entry.findall('tags/member')
+                ]
+
+        return PanoramaTagIndex(_tags_by_target, _tags_by_serial)
+
+    @staticmethod
+    def from_dict(data: dict) -> 'PanoramaTagIndex':
+        return PanoramaTagIndex(data['tags_by_target'], data['tags_by_serial'])
+
+    def to_dict(self) -> dict:
+        return {'tags_by_target': self._tags_by_target, 'tags_by_serial': self._tags_by_serial}
+
+    @property
+    def tags(self) -> Set[str]:
+        return set(self._targets_by_tag)
+
+    def get_targets(self, tag: str) -> Set[str]:
+        return set(self._targets_by_tag.get(tag, ()))
+
+    def get_tags_by_target(self) -> Dict[str, List[str]]:
+        return {k: list(v) for k, v in self._tags_by_target.items()}
+
+    def get_device_tags(self, serial: str, vsys_name: Optional[str] = None) -> List[str]:
+        """Tags of device vsys, all tags of device and its vsys if vsys_name is None"""
+        if vsys_name:
+            return list(self._tags_by_target.get(f'{serial}/{vsys_name}', ()))
+
+        return list(self._tags_by_serial.get(serial, ()))
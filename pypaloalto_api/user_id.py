@@ -0,0 +1,307 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, List, Iterable, Dict
+from xml.sax.saxutils import escape
+
+from pypaloalto_api import logger
+from pypaloalto_api.configuration_commands import XmlApiRequestType
+from pypaloalto_api.devices import PaloAltoDevice
+from pypaloalto_api.enums import UidAction
+from pypaloalto_api.fleet import FleetExecutor
+
+_ATTRIBUTE_ENTITIES = {'"': '&quot;'}
+_MESSAGE_HEAD = '<uid-message><version>2.0</version><type>update</type><payload>'
+_MESSAGE_TAIL = '</payload></uid-message>'
+
+
+def _attribute(value) -> str:
+    return escape(str(value), _ATTRIBUTE_ENTITIES)
+
+
+class UidEntry:
+    """One User-ID update. user for login/logout, tag for register/unregister.
+    timeout - minutes for login, seconds for register tags. persistent - keep registered tag after reboot"""
+    __slots__ = ('action', 'ip', 'user', 'tag', 'timeout', 'persistent')
+
+    def __init__(self, action: UidAction, ip: str, user: str = '', tag: str = '', timeout: Optional[int] = None,
+                 persistent: bool = False):
+        self.action = action
+        self.ip = ip
+        self.user = user
+        self.tag = tag
+        self.timeout = timeout
+        self.persistent = persistent
+
+    @property
+    def key(self) -> tuple:
+        """Entries with the same key replace each other, the last one wins"""
+        if self.action in (UidAction.login, UidAction.logout):
+            return self.ip, ''
+
+        return self.ip, self.tag
+
+    def to_xml(self) -> str:
+        _timeout = f' timeout="{self.timeout}"' if self.timeout is not None else ''
+
+        if self.action in (UidAction.login, UidAction.logout):
+            return f'<entry name="{_attribute(self.user)}" ip="{_attribute(self.ip)}"{_timeout}/>'
+
+        _persistent = ' persistent="1"' if self.persistent else ''
+
+        return f'<entry ip="{_attribute(self.ip)}"{_persistent}><tag>' \
+               f'<member{_timeout}>{escape(self.tag)}</member></tag></entry>'
+
+    def __repr__(self):
+        return f'UidEntry({self.action.value}, {self.ip}, {self.user or self.tag})'
+
+
+class UidMessageBuilder:
+    """Builds uid-message XML for 'user-id' XML API requests"""
+
+    def __init__(self):
+        self._entries_by_action: Dict[UidAction, List[UidEntry]] = {x: [] for x in UidAction}
+        self._size = len(_MESSAGE_HEAD) + len(_MESSAGE_TAIL)
+        self._count = 0
+
+    def __len__(self):
+        return self._count
+
+    @property
+    def size_bytes(self) -> int:
+        """Size of message if built now, not counting action sections tags"""
+        return self._size
+
+    def add(self, entry: UidEntry) -> 'UidMessageBuilder':
+        self._entries_by_action[entry.action].append(entry)
+        self._size += len(entry.to_xml())
+        self._count += 1
+        return self
+
+    def login(self, ip: str, user: str, timeout_minutes: Optional[int] = None) -> 'UidMessageBuilder':
+        return self.add(UidEntry(UidAction.login, ip, user=user, timeout=timeout_minutes))
+
+    def logout(self, ip: str, user: str) -> 'UidMessageBuilder':
+        return self.add(UidEntry(UidAction.logout, ip, user=user))
+
+    def register(self, ip: str, tag: str, timeout_seconds: Optional[int] = None,
+                 persistent: bool = False) -> 'UidMessageBuilder':
+        return self.add(UidEntry(UidAction.register, ip, tag=tag, timeout=timeout_seconds, persistent=persistent))
+
+    def unregister(self, ip: str, tag: str) -> 'UidMessageBuilder':
+        return self.add(UidEntry(UidAction.unregister, ip, tag=tag))
+
+    def build(self) -> str:
+        _parts = [_MESSAGE_HEAD]
+
+        for _action, _entries in self._entries_by_action.items():
+            if _entries:
+                _parts.append(f'<{_action.value}>')
+                _parts += [x.to_xml() for x in _entries]
+                _parts.append(f'</{_action.value}>')
+
+        _parts.append(_MESSAGE_TAIL)
+
+        return ''.join(_parts)
+
+    @staticmethod
+    def split(entries: Iterable[UidEntry], max_entries: int = 1000,
+              max_bytes: int = 512 * 1024) -> List['UidMessageBuilder']:
+        """Splits entries into builders not bigger than max_entries and about max_bytes"""
+        _builders = []
+        _builder = UidMessageBuilder()
+
+        for _entry in entries:
+            if len(_builder) >= max_entries or (len(_builder) and _builder.size_bytes >= max_bytes):
+                _builders.append(_builder)
+                _builder = UidMessageBuilder()
+
+            _builder.add(_entry)
+
+        if len(_builder):
+            _builders.append(_builder)
+
+        return _builders
+
+    @staticmethod
+    def build_many(entries: Iterable[UidEntry], max_entries: int = 1000, max_bytes: int = 512 * 1024) -> List[str]:
+        """Splits entries into uid-messages not bigger than max_entries and about max_bytes"""
+        return [x.build() for x in UidMessageBuilder.split(entries, max_entries, max_bytes)]
+
+
+class UserIdPipelineStats:
+    def __init__(self):
+        self.started_at = time.monotonic()
+        self.entries_received = 0
+        self.entries_coalesced = 0
+        self.entries_dropped = 0
+        self.entries_sent = 0
+        self.entries_failed = 0
+        self.messages_sent = 0
+        self.messages_failed = 0
+        self.bytes_sent = 0
+
+    @property
+    def entries_per_second(self) -> float:
+        _elapsed = time.monotonic() - self.started_at
+        return self.entries_sent / _elapsed if _elapsed else 0.0
+
+    def to_dict(self) -> dict:
+        return {
+            'entries_received': self.entries_received,
+            'entries_coalesced': self.entries_coalesced,
+            'entries_dropped': self.entries_dropped,
+            'entries_sent': self.entries_sent,
+            'entries_failed': self.entries_failed,
+            'messages_sent': self.messages_sent,
+            'messages_failed': self.messages_failed,
+            'bytes_sent': self.bytes_sent,
+            'entries_per_second': self.entries_per_second,
+        }
+
+    def __repr__(self):
+        return str(self.to_dict())
+
+
+class UserIdPipeline:
+    """Streams User-ID updates to devices.
+
+    Entries are collected for coalesce_window_seconds (or until max_entries_per_message are pending),
+    updates of the same IP mapping or the same IP tag inside the window are replaced by the last one.
+    Then pending entries are split into size capped uid-messages and sent to all devices concurrently,
+    messages to one device keep their order.
+    Entries which don't fit into max_pending_entries are dropped. Entries of failed messages are not repeated,
+    use device retry_policy for that. entries_sent and entries_failed in stats are counted per device.
+
+    vsys - target vsys of multi-vsys devices.
+    """
+
+    def __init__(self, devices: List[PaloAltoDevice], coalesce_window_seconds: float = 1.0,
+                 max_entries_per_message: int = 1000, max_message_bytes: int = 512 * 1024,
+                 max_pending_entries: int = 100000, max_concurrency: int = 8, vsys: Optional[str] = None,
+                 request_timeout_seconds: int = None):
+        self._devices = list(devices)
+        self._coalesce_window_seconds = coalesce_window_seconds
+        self._max_entries_per_message = max_entries_per_message
+        self._max_message_bytes = max_message_bytes
+        self._max_pending_entries = max_pending_entries
+        # Unavailable devices fail fast inside the task, so their entries are counted as failed
+        self._executor = FleetExecutor(max_workers=max_concurrency, per_device_concurrency=1,
+                                       skip_unavailable=False)
+        self._additional_request_data = {'vsys': vsys} if vsys else {}
+        self._request_timeout_seconds = request_timeout_seconds
+        self._stats = UserIdPipelineStats()
+        self._pending: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._is_closed = False
+        self._thread = threading.Thread(target=self.__run, name='user-id-pipeline', daemon=True)
+        self._thread.start()
+
+    @property
+    def stats(self) -> UserIdPipelineStats:
+        return self._stats
+
+    def put(self, entry: UidEntry) -> bool:
+        """Returns False if entry was dropped because pipeline is full or closed"""
+        with self._lock:
+            self._stats.entries_received += 1
+
+            if self._is_closed:
+                self._stats.entries_dropped += 1
+                return False
+
+            _key = entry.key
+
+            if _key in self._pending:
+                # Moved to the end, so the last update is sent after older updates of other keys
+                del self._pending[_key]
+                self._stats.entries_coalesced += 1
+
+            elif len(self._pending) >= self._max_pending_entries:
+                self._stats.entries_dropped += 1
+                return False
+
+            self._pending[_key] = entry
+
+            if len(self._pending) >= self._max_entries_per_message:
+                self._wakeup.set()
+
+        return True
+
+    def login(self, ip: str, user: str, timeout_minutes: Optional[int] = None) -> bool:
+        return self.put(UidEntry(UidAction.login, ip, user=user, timeout=timeout_minutes))
+
+    def logout(self, ip: str, user: str) -> bool:
+        return self.put(UidEntry(UidAction.logout, ip, user=user))
+
+    def register(self, ip: str, tag: str, timeout_seconds: Optional[int] = None, persistent: bool = False) -> bool:
+        return self.put(UidEntry(UidAction.register, ip, tag=tag, timeout=timeout_seconds, persistent=persistent))
+
+    def unregister(self, ip: str, tag: str) -> bool:
+        return self.put(UidEntry(UidAction.unregister, ip, tag=tag))
+
+    def __run(self):
+        while not self._is_closed:
+            self._wakeup.wait(self._coalesce_window_seconds)
+            self._wakeup.clear()
+
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f'User-ID pipeline flush failed: {e!r}')
+
+    def flush(self):
+        """Sends all pending entries now"""
+        with self._flush_lock:
+            with self._lock:
+                _entries = list(self._pending.values())
+                self._pending = OrderedDict()
+
+            if not _entries:
+                return
+
+            _builders = UidMessageBuilder.split(_entries, self._max_entries_per_message, self._max_message_bytes)
+            _send_tasks = [self.__make_send_task(x.build(), len(x)) for x in _builders]
+            _tasks = [(_device, _task) for _device in self._devices for _task in _send_tasks]
+
+            for _result in self._executor.run_tasks(_tasks):
+                if _result.is_ok:
+                    self._stats.messages_sent += 1
+                    self._stats.entries_sent += _result.value[1]
+                    self._stats.bytes_sent += _result.value[0]
+                else:
+                    self._stats.messages_failed += 1
+                    logger.error(f'[{_result.device_name}]:User-ID message was not sent: {_result.error!r}')
+
+    def __make_send_task(self, message: str, entries_count: int):
+        def _send(device: PaloAltoDevice):
+            try:
+                device.xml_api_cmd_request(XmlApiRequestType.user_id, message,
+                                           request_timeout_seconds=self._request_timeout_seconds,
+                                           **self._additional_request_data)
+            except Exception:
+                with self._lock:
+                    self._stats.entries_failed += entries_count
+
+                raise
+
+            return len(message), entries_count
+
+        return _send
+
+    def close(self):
+        """Sends pending entries and stops the pipeline"""
+        with self._lock:
+            self._is_closed = True
+
+        self._wakeup.set()
+        self._thread.join()
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
@@ -134,3 +134,14 @@ def custom_deepcopy(sth):
         return copy.deepcopy(sth)
     else:
         return cp(sth, _deepcopy_dispatcher)
+
+
+class SharedOnCopy:
+    """Objects holding locks or connections which must be shared between copies of the device.
+    PaloAltoDevice instances are deep copied by Panorama properties, so their helpers must survive it."""
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
@@ -4,6 +4,7 @@ from typing import Tuple, List
 
 from pypaloalto_api import logger
 from pypaloalto_api.enums import Protocol
+from pypaloalto_api.hashing import xml_content_hash
 from pypaloalto_api.utils import deprecated
 
 DEFAULT_VALUES = ['any', 'application-default', 'none']
@@ -178,6 +179,11 @@ class XmlApiElementsBuilder:
 
         return _root_element
 
+    @staticmethod
+    def content_hash(element: ET.Element) -> str:
+        """Stable hash of element content. Compare it with hash from previous run to skip not changed objects"""
+        return xml_content_hash(element)
+
 
 class ElementsBuilder(XmlApiElementsBuilder):
     """Just short named XmlApiElementsBuilder"""
@@ -0,0 +1,29 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'benchmarks'))
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from simulator import PanOsSimulator  # noqa: E402
+
+
+@pytest.fixture(scope='module')
+def simulator():
+    with PanOsSimulator(managed_devices_count=4, device_groups_count=2, rules_count=20, logs_count=50) as _simulator:
+        yield _simulator
+
+
+@pytest.fixture
+def gateway(simulator):
+    from pypaloalto_api.devices import Gateway
+
+    return Gateway(simulator.address, simulator.device_config())
+
+
+@pytest.fixture
+def panorama(simulator):
+    from pypaloalto_api.devices import Panorama
+
+    return Panorama(simulator.panorama_config(), simulator.device_config())
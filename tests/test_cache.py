@@ -0,0 +1,106 @@
+import time
+import xml.etree.ElementTree as ET
+
+from pypaloalto_api.cache import TtlLruCache, ConfigCache, xpaths_overlap
+from pypaloalto_api.configuration_commands import ConfigAction
+
+ADDRESS_XPATH = "/config/devices/entry[@name='localhost.localdomain']/device-group/entry[@name='DG-0']/address"
+
+
+def test_lru_eviction_and_ttl():
+    _cache = TtlLruCache(max_size=2, ttl_seconds=0.05)
+    _cache.put('a', 1)
+    _cache.put('b', 2)
+    _cache.get('a')
+    _cache.put('c', 3)
+
+    assert _cache.get('b') is None
+    assert _cache.get('a') == 1
+    assert _cache.stats.evictions == 1
+
+    time.sleep(0.06)
+    assert _cache.get('a') is None
+    assert _cache.stats.expirations == 1
+
+
+def test_get_or_load_caches_value_but_not_errors():
+    _cache = TtlLruCache()
+    _calls = []
+
+    def _failing_loader():
+        _calls.append(1)
+        raise RuntimeError('down')
+
+    for _ in range(2):
+        try:
+            _cache.get_or_load('key', _failing_loader)
+        except RuntimeError:
+            pass
+
+    assert len(_calls) == 2
+    assert _cache.get_or_load('key', lambda: 'value') == 'value'
+    assert _cache.get_or_load('key', _failing_loader) == 'value'
+
+
+def test_xpaths_overlap():
+    assert xpaths_overlap(ADDRESS_XPATH, ADDRESS_XPATH + "/entry[@name='host-0']")
+    assert xpaths_overlap(ADDRESS_XPATH + "/entry[@name='host-0']", ADDRESS_XPATH)
+    assert not xpaths_overlap(ADDRESS_XPATH, ADDRESS_XPATH + '-group')
+    assert not xpaths_overlap(ADDRESS_XPATH + "/entry[@name='host-0']", ADDRESS_XPATH + "/entry[@name='host-1']")
+
+
+def test_invalidate_drops_only_overlapping_replies():
+    _cache = ConfigCache()
+    _cache.put_reply('get', ADDRESS_XPATH, (None, 200))
+    _cache.put_reply('get', ADDRESS_XPATH + "/entry[@name='host-0']", (None, 200))
+    _cache.put_reply('get', '/config/shared', (None, 200))
+
+    assert _cache.invalidate(ADDRESS_XPATH + "/entry[@name='host-0']") == 2
+    assert _cache.get_reply('get', '/config/shared') is not None
+
+
+def test_device_cache_is_dropped_by_write(gateway, simulator):
+    gateway.enable_config_cache()
+    _xpath = ADDRESS_XPATH + "/entry[@name='host-1']"
+    _first, _ = gateway.xml_api_config_request(ConfigAction.get, _xpath)
+    _requests_count = simulator.requests_counter['config']
+    _second, _ = gateway.xml_api_config_request(ConfigAction.get, _xpath)
+
+    assert simulator.requests_counter['config'] == _requests_count
+    assert _second is not _first and _second.findtext('.//ip-netmask') == '192.168.0.1/32'
+
+    _second.find('.//ip-netmask').text = 'changed by caller'
+    assert gateway.xml_api_config_request(ConfigAction.get, _xpath)[0].findtext('.//ip-netmask') == \
+        '192.168.0.1/32'
+
+    gateway.xml_api_config_request(ConfigAction.set, _xpath, [ET.fromstring('<description>cached</description>')])
+    _third, _ = gateway.xml_api_config_request(ConfigAction.get, _xpath)
+
+    assert _third.findtext('.//description') == 'cached'
+    assert simulator.requests_counter['config'] == _requests_count + 2
+
+
+def test_xpath_quoting_is_normalized():
+    _cache = ConfigCache()
+    _cache.put_reply('get', ADDRESS_XPATH + '/entry[@name="host-0"]', (None, 200))
+
+    assert _cache.get_reply('get', ADDRESS_XPATH + "/entry[@name='host-0']") is not None
+    assert _cache.invalidate(ADDRESS_XPATH.replace("'", '"') + "/entry[@name='host-0']") == 1
+
+
+def test_rename_drops_cached_reply_of_new_name(gateway):
+    gateway.enable_config_cache()
+    _old_xpath = ADDRESS_XPATH + "/entry[@name='host-2']"
+    _new_xpath = ADDRESS_XPATH + "/entry[@name='renamed-host']"
+
+    # Empty reply cached before the entry with new name exists
+    assert gateway.xml_api_config_request(ConfigAction.get, _new_xpath)[0].find('result/entry') is None
+
+    gateway.xml_api_config_request(ConfigAction.rename, _old_xpath, params={'newname': 'renamed-host'})
+
+    try:
+        assert gateway.xml_api_config_request(ConfigAction.get, _new_xpath)[0].findtext('.//ip-netmask') == \
+            '192.168.0.2/32'
+        assert gateway.xml_api_config_request(ConfigAction.get, _old_xpath)[0].find('result/entry') is None
+    finally:
+        gateway.xml_api_config_request(ConfigAction.rename, _new_xpath, params={'newname': 'host-2'})
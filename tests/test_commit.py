@@ -0,0 +1,96 @@
+import xml.etree.ElementTree as ET
+
+from pypaloalto_api.change_tracker import ConfigChangeTracker
+from pypaloalto_api.commit import CommitManager, CommitScope, CommitCmdBuilder
+from pypaloalto_api.configuration_commands import ConfigAction, XmlApiXPathBuilder
+from pypaloalto_api.jobs import JobTracker
+
+DG_0_XPATH = XmlApiXPathBuilder.localhost_device_group('DG-0')
+DG_1_XPATH = XmlApiXPathBuilder.localhost_device_group('DG-1')
+SHARED_XPATH = XmlApiXPathBuilder.config_shared() + '/address'
+
+
+def _commit_manager(device) -> CommitManager:
+    return CommitManager(device, JobTracker(0.01, 0.01))
+
+
+def test_scope_from_xpaths_and_partial_commit_cmd():
+    _scope = CommitScope.from_xpaths([DG_0_XPATH + '/address', XmlApiXPathBuilder.config_this_device() +
+                                      "/template/entry[@name='T1']/config"])
+
+    assert (_scope.device_groups, _scope.templates, _scope.is_full) == ({'DG-0'}, {'T1'}, False)
+    assert _scope.includes(DG_0_XPATH + '/address')
+    assert not _scope.includes(DG_1_XPATH + '/address')
+    assert not _scope.includes(SHARED_XPATH)
+    assert CommitScope.from_xpaths([SHARED_XPATH]).is_full
+    assert CommitScope.from_xpaths([None]).includes(DG_1_XPATH)
+
+    _cmd = ET.fromstring(CommitCmdBuilder.commit(_scope, description='a & b'))
+
+    assert _cmd.findtext('partial/device-group/member') == 'DG-0'
+    assert _cmd.findtext('description') == 'a & b'
+    assert ET.fromstring(CommitCmdBuilder.commit(CommitScope(is_full=True))).find('partial') is None
+
+
+def test_change_tracker_keeps_first_record_order():
+    _tracker = ConfigChangeTracker()
+
+    for _xpath in [DG_0_XPATH, DG_1_XPATH, DG_0_XPATH, None, DG_1_XPATH]:
+        _tracker.record(_xpath)
+
+    assert _tracker.xpaths == [DG_0_XPATH, DG_1_XPATH, None]
+
+    _tracker.discard([DG_0_XPATH, SHARED_XPATH])
+
+    assert _tracker.xpaths == [DG_1_XPATH, None] and len(_tracker) == 2
+
+def test_config_change_is_tracked_and_committed(panorama):
+    _manager = _commit_manager(panorama)
+    _element = ET.fromstring('<entry name="host-commit"><ip-netmask>192.0.2.10</ip-netmask></entry>')
+
+    panorama.xml_api_config_request(ConfigAction.set, DG_0_XPATH + '/address', [_element])
+
+    assert _manager.get_pending_scope().device_groups == {'DG-0'}
+    assert _manager.commit().is_ok
+    assert _manager.commit() is None
+
+
+def test_partial_commit_keeps_changes_outside_of_scope(panorama):
+    _manager = _commit_manager(panorama)
+    _tracker = panorama.enable_change_tracking()
+    _tracker.clear()
+
+    for _xpath in (DG_0_XPATH + '/address', DG_1_XPATH + '/address', SHARED_XPATH):
+        _tracker.record(_xpath)
+
+    assert _manager.commit(CommitScope(device_groups=['DG-0'])).is_ok
+    assert _tracker.xpaths == [DG_1_XPATH + '/address', SHARED_XPATH]
+    assert _manager.commit(CommitScope(is_full=True)).is_ok
+    assert _tracker.xpaths == []
+
+
+def test_commit_and_push_pushes_changed_device_groups(panorama):
+    _manager = _commit_manager(panorama)
+    _tracker = panorama.enable_change_tracking()
+    _tracker.clear()
+    _tracker.record(DG_1_XPATH + '/address')
+
+    _commit_result, _push_results = _manager.commit_and_push()
+
+    assert _commit_result.is_ok
+    assert list(_push_results) == ['DG-1']
+    assert all(x.is_ok for x in _push_results.values())
+
+
+def test_full_commit_and_push_pushes_all_device_groups(panorama):
+    _manager = _commit_manager(panorama)
+    _tracker = panorama.enable_change_tracking()
+    _tracker.clear()
+    _tracker.record(DG_1_XPATH + '/address')
+    _tracker.record(SHARED_XPATH)
+
+    _commit_result, _push_results = _manager.commit_and_push()
+
+    assert _commit_result.is_ok
+    assert sorted(_push_results) == ['DG-0', 'DG-1']
+    assert _tracker.xpaths == []
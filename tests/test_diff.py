@@ -0,0 +1,77 @@
+import xml.etree.ElementTree as ET
+
+from pypaloalto_api.configuration_commands import ConfigAction
+from pypaloalto_api.diff import diff_config_trees, compute_move_changes, apply_config_changes, entry_xpath, \
+    ConfigChange
+from pypaloalto_api.snapshot import ConfigSnapshot
+
+ADDRESS_XPATH = "/config/devices/entry[@name='localhost.localdomain']/device-group/entry[@name='DG-0']/address"
+
+
+def test_entry_xpath_quotes():
+    assert entry_xpath('/config/shared/address', 'a') == "/config/shared/address/entry[@name='a']"
+    assert entry_xpath('/config/shared/address', "it's") == '/config/shared/address/entry[@name="it\'s"]'
+
+
+def _apply_moves(names: list, changes: list) -> list:
+    names = list(names)
+
+    for _change in changes:
+        _name = _change.xpath.split("'")[1]
+        names.remove(_name)
+        _position = 0 if _change.params['where'] == 'top' else names.index(_change.params['dst']) + 1
+        names.insert(_position, _name)
+
+    return names
+
+
+def test_move_changes_are_minimal():
+    _changes = compute_move_changes(['a', 'b', 'c', 'd'], ['d', 'a', 'b', 'c'], '/rules')
+
+    assert _changes == [ConfigChange(ConfigAction.move, "/rules/entry[@name='d']", params={'where': 'top'})]
+    assert compute_move_changes(['a', 'b', 'c'], ['a', 'b', 'c'], '/rules') == []
+
+    _old_names = [f'r{x}' for x in range(10)]
+    _new_names = ['r9', 'r0', 'r1', 'r5', 'r2', 'r3', 'r4', 'r6', 'r8', 'r7']
+    _changes = compute_move_changes(_old_names, _new_names, '/rules')
+
+    assert len(_changes) == 3
+    assert _apply_moves(_old_names, _changes) == _new_names
+
+
+def test_equal_trees_have_no_changes():
+    _xml = ET.fromstring('<address><entry name="a"><ip-netmask>1.1.1.1</ip-netmask></entry>'
+                         '<entry name="b"><fqdn>b.example</fqdn></entry></address>')
+    _reordered = ET.fromstring('<address><entry name="b"><fqdn>b.example</fqdn></entry>'
+                               '<entry name="a"><ip-netmask>1.1.1.1</ip-netmask></entry></address>')
+
+    assert diff_config_trees(_xml, _reordered, ADDRESS_XPATH) == []
+
+
+def test_diff_touches_only_changed_entries():
+    _old = ET.fromstring('<address><entry name="a"><ip-netmask>1.1.1.1</ip-netmask></entry>'
+                         '<entry name="b"><fqdn>b.example</fqdn></entry>'
+                         '<entry name="c"><fqdn>c.example</fqdn></entry></address>')
+    _new = ET.fromstring('<address><entry name="a"><ip-netmask>1.1.1.1</ip-netmask></entry>'
+                         '<entry name="b"><fqdn>b2.example</fqdn></entry>'
+                         '<entry name="d"><fqdn>d.example</fqdn></entry></address>')
+    _changes = diff_config_trees(_old, _new, ADDRESS_XPATH)
+
+    assert [(x.action, x.xpath) for x in _changes] == [
+        (ConfigAction.delete, f"{ADDRESS_XPATH}/entry[@name='c']"),
+        (ConfigAction.edit, f"{ADDRESS_XPATH}/entry[@name='b']/fqdn"),
+        (ConfigAction.set, ADDRESS_XPATH),
+    ]
+    assert [x.get('name') for x in _changes[-1].elements] == ['d']
+
+
+def test_applied_diff_turns_device_config_into_target(gateway):
+    _old_xml = ConfigSnapshot.fetch(gateway).find(ADDRESS_XPATH)
+    _new_xml = ET.fromstring(ET.tostring(_old_xml))
+    _new_xml.remove(_new_xml.find("entry[@name='host-9']"))
+    _new_xml.find("entry[@name='host-0']/ip-netmask").text = '10.0.0.1/32'
+    ET.SubElement(ET.SubElement(_new_xml, 'entry', {'name': 'new-host'}), 'fqdn').text = 'new.example'
+
+    apply_config_changes(gateway, diff_config_trees(_old_xml, _new_xml, ADDRESS_XPATH))
+
+    assert diff_config_trees(ConfigSnapshot.fetch(gateway).find(ADDRESS_XPATH), _new_xml, ADDRESS_XPATH) == []
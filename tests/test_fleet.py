@@ -0,0 +1,76 @@
+import threading
+import time
+
+import requests
+
+from pypaloalto_api.fleet import FleetExecutor, summarize_fleet_results
+from pypaloalto_api.operational_commands import OPCmdBuilder
+
+
+def test_operational_command_on_all_managed_devices(panorama):
+    _results = list(FleetExecutor(max_workers=4).run_operational_command(
+        panorama.managed_devices, OPCmdBuilder.show_system_info()
+    ))
+
+    assert len(_results) == len(panorama.managed_devices)
+    assert all(x.is_ok for x in _results)
+    assert {x.device_name for x in _results} == {x.device_name for x in panorama.managed_devices}
+    assert all(x.value[0].get('status') == 'success' for x in _results)
+
+
+def test_per_device_concurrency_and_errors(panorama):
+    _device = panorama.managed_devices[0]
+    _lock = threading.Lock()
+    _running = []
+    _max_running = []
+
+    def _task(device):
+        with _lock:
+            _running.append(1)
+            _max_running.append(len(_running))
+
+        time.sleep(0.02)
+
+        with _lock:
+            _running.pop()
+
+        if len(_max_running) == 2:
+            raise RuntimeError('second task failed')
+
+    _results = list(FleetExecutor(max_workers=8, per_device_concurrency=1).run_tasks(
+        [(_device, _task)] * 4
+    ))
+
+    assert max(_max_running) == 1
+    assert sum(1 for x in _results if not x.is_ok) == 1
+
+
+def test_unavailable_devices_are_skipped_and_reported(panorama):
+    _devices = panorama.managed_devices[:2]
+    _health = _devices[0].enable_health_tracking(failure_threshold=1)
+    _health.record_result(requests.ConnectionError())
+    _calls = []
+
+    try:
+        _summary = summarize_fleet_results(FleetExecutor().run(_devices, lambda x: _calls.append(x.device_name)))
+    finally:
+        _devices[0].disable_health_tracking()
+
+    assert _summary == {'succeeded': [_devices[1].device_name], 'failed': {}, 'skipped': [_devices[0].device_name]}
+    assert _calls == [_devices[1].device_name]
+
+
+def test_early_stop_cancels_submitted_tasks(panorama):
+    _calls = []
+
+    def _task(device):
+        _calls.append(device.device_name)
+        time.sleep(0.02)
+
+    # Every device has its own slot, so all tasks are submitted to one worker at once
+    _results = FleetExecutor(max_workers=1).run(panorama.managed_devices, _task)
+    next(_results)
+    _results.close()
+    time.sleep(0.1)
+
+    assert len(_calls) < len(panorama.managed_devices)
@@ -0,0 +1,56 @@
+import time
+
+import pytest
+import requests
+
+from pypaloalto_api.devices import Gateway
+from pypaloalto_api.enums import CircuitState
+from pypaloalto_api.exceptions import DeviceUnavailableException, PaloAltoApiRequestException
+from pypaloalto_api.health import DeviceHealth
+from pypaloalto_api.operational_commands import OPCmdBuilder
+from pypaloalto_api.retry import RetryPolicy
+from simulator import PanOsSimulator
+
+
+def test_circuit_opens_and_probes():
+    _health = DeviceHealth(failure_threshold=2, reset_timeout_seconds=0.05)
+    _health.record_result(requests.ConnectionError())
+    assert _health.state == CircuitState.closed
+
+    _health.record_result(PaloAltoApiRequestException('fw', 503))
+    assert _health.state == CircuitState.open and not _health.allow_request()
+
+    time.sleep(0.06)
+    assert _health.allow_request()
+    assert not _health.allow_request()
+
+    _health.record_result()
+    assert _health.state == CircuitState.closed and _health.consecutive_failures == 0
+
+
+def test_alive_device_errors_are_not_failures():
+    _health = DeviceHealth(failure_threshold=1)
+    _health.record_result(PaloAltoApiRequestException('fw', 200, '', 'status is error'))
+
+    assert _health.state == CircuitState.closed
+
+
+def test_every_failed_attempt_counts_and_stops_retries():
+    with PanOsSimulator(rules_count=1) as _simulator:
+        _gateway = Gateway(_simulator.address, _simulator.device_config())
+
+    _gateway.retry_policy = RetryPolicy(max_attempts=8, base_delay_seconds=0.01, retry_on_connection_errors=True)
+    _health = _gateway.enable_health_tracking(failure_threshold=3)
+
+    with pytest.raises(requests.ConnectionError):
+        _gateway.xml_api_operational_request(OPCmdBuilder.show_system_info())
+
+    assert _health.state == CircuitState.open
+    assert _health.to_dict()['total_failures'] == 3
+
+    _started_at = time.monotonic()
+
+    with pytest.raises(DeviceUnavailableException):
+        _gateway.xml_api_operational_request(OPCmdBuilder.show_system_info())
+
+    assert time.monotonic() - _started_at < 0.5
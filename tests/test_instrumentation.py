@@ -0,0 +1,68 @@
+import pytest
+
+from pypaloalto_api.configuration_commands import ConfigAction, XmlApiRequestType
+from pypaloalto_api.exceptions import PaloAltoApiRequestException
+from pypaloalto_api.instrumentation import RequestHook, PrometheusMetricsHook, TransferStatsHook
+from pypaloalto_api.operational_commands import OPCmdBuilder
+
+ADDRESS_XPATH = "/config/devices/entry[@name='localhost.localdomain']/device-group/entry[@name='DG-0']/address"
+
+
+class _RecordingHook(RequestHook):
+    def __init__(self):
+        self.before = []
+        self.after = []
+
+    def before_request(self, request_info):
+        self.before.append(request_info)
+
+    def after_request(self, request_info):
+        self.after.append(request_info)
+
+
+def test_hook_gets_every_request_once(gateway):
+    _hook = _RecordingHook()
+    gateway.add_request_hook(_hook)
+    gateway.xml_api_config_request(ConfigAction.get, ADDRESS_XPATH)
+    gateway.xml_api_operational_request(OPCmdBuilder.show_system_info())
+
+    assert _hook.before == _hook.after
+    _config_info, _op_info = _hook.after
+    assert _config_info.request_type == XmlApiRequestType.config
+    assert (_config_info.action, _config_info.xpath) == ('get', ADDRESS_XPATH)
+    assert _config_info.attempts == 1 and _config_info.status_code == 200
+    assert _config_info.bytes_received > 0 and _config_info.bytes_sent > 0
+    assert _config_info.timings['total'] >= _config_info.timings['parse'] > 0
+    assert _op_info.cmd == OPCmdBuilder.show_system_info()
+
+    gateway.remove_request_hook(_hook)
+    gateway.xml_api_config_request(ConfigAction.get, ADDRESS_XPATH)
+    assert len(_hook.after) == 2
+
+
+def test_hook_gets_request_error(gateway):
+    _hook = _RecordingHook()
+    gateway.add_request_hook(_hook)
+
+    with pytest.raises(PaloAltoApiRequestException):
+        gateway.xml_api_request({'type': 'op', 'cmd': OPCmdBuilder.show_system_info(), 'target': 'unknown'})
+
+    assert isinstance(_hook.after[0].error, PaloAltoApiRequestException)
+
+
+def test_prometheus_and_transfer_stats(gateway):
+    _metrics = PrometheusMetricsHook()
+    _transfer_stats = TransferStatsHook()
+    gateway.add_request_hook(_metrics)
+    gateway.add_request_hook(_transfer_stats)
+
+    for _ in range(3):
+        gateway.xml_api_config_request(ConfigAction.get, ADDRESS_XPATH)
+
+    _text = _metrics.render()
+    _labels = f'device="{gateway.device_name}",type="config"'
+
+    assert f'pypaloalto_requests_total{{{_labels},action="get",status="200"}} 3' in _text
+    assert f'pypaloalto_request_duration_seconds_count{{{_labels}}} 3' in _text
+    assert _transfer_stats.get_report()['config/get']['requests'] == 3
+    assert _transfer_stats.get_report('other-device') == {}
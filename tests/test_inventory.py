@@ -0,0 +1,63 @@
+import threading
+import time
+
+from pypaloalto_api.devices import Panorama
+from pypaloalto_api.inventory import InventoryCache
+
+
+def _panorama(simulator, inventory_cache: InventoryCache) -> Panorama:
+    return Panorama(simulator.panorama_config(), simulator.device_config(), inventory_cache=inventory_cache)
+
+
+def test_warm_start_uses_cache_until_connected_devices_change(simulator, tmp_path):
+    _cache = InventoryCache(tmp_path / 'inventory.sqlite', revalidate_after_seconds=3600)
+    _cold_panorama = _panorama(simulator, _cache)
+    _config_requests = simulator.requests_counter['config']
+
+    _warm_panorama = _panorama(simulator, _cache)
+
+    assert simulator.requests_counter['config'] == _config_requests
+    assert [x.serial for x in _warm_panorama.managed_devices] == [x.serial for x in _cold_panorama.managed_devices]
+    assert _warm_panorama.device_groups_names == _cold_panorama.device_groups_names
+
+    simulator.managed_devices_count += 1
+
+    try:
+        _changed_panorama = _panorama(simulator, _cache)
+    finally:
+        simulator.managed_devices_count -= 1
+
+    assert simulator.requests_counter['config'] > _config_requests
+    assert len(_changed_panorama.managed_devices) == len(_cold_panorama.managed_devices) + 1
+
+
+def test_revalidation_replaces_managed_devices_at_once(simulator, tmp_path):
+    _cache = InventoryCache(tmp_path / 'inventory.sqlite', revalidate_after_seconds=0)
+    _panorama(simulator, _cache)
+    simulator.latency_seconds = 0.05
+
+    try:
+        _warm_panorama = _panorama(simulator, _cache)
+        _cached_devices = _warm_panorama._managed_devices
+        _observed_lengths = set()
+        _stop = threading.Event()
+
+        def _read():
+            while not _stop.is_set():
+                _observed_lengths.add(len(_warm_panorama._managed_devices))
+                time.sleep(0.001)
+
+        _reader = threading.Thread(target=_read)
+        _reader.start()
+
+        assert _warm_panorama.wait_inventory_revalidation(timeout_seconds=30)
+
+        _stop.set()
+        _reader.join()
+
+    finally:
+        simulator.latency_seconds = 0.0
+
+    assert _observed_lengths == {simulator.managed_devices_count}
+    assert _warm_panorama._managed_devices is not _cached_devices
+    assert [x.serial for x in _warm_panorama._managed_devices] == [x.serial for x in _cached_devices]
@@ -0,0 +1,137 @@
+import threading
+
+import pytest
+import requests
+
+from pypaloalto_api.enums import LogType
+from pypaloalto_api.exceptions import PaloAltoApiRequestException
+from pypaloalto_api.instrumentation import RequestHook
+from pypaloalto_api.logs import LogClient, LogQuery, ParallelLogReader
+
+
+def _open_log_jobs(simulator) -> list:
+    return [x for x in simulator._log_jobs.values() if 'logs_count' in x]
+
+
+def _log_client(device) -> LogClient:
+    return LogClient(device, initial_poll_interval_seconds=0.01, max_poll_interval_seconds=0.01)
+
+
+def test_iter_logs_reads_all_pages_and_deletes_jobs(simulator, gateway):
+    _logs = list(_log_client(gateway).iter_logs(LogQuery(LogType.traffic, page_size=7)))
+
+    assert [int(x['seqno']) for x in _logs] == list(range(simulator.logs_count, 0, -1))
+    assert _open_log_jobs(simulator) == []
+
+
+def test_iter_logs_forward_with_max_logs(simulator, gateway):
+    _logs = list(_log_client(gateway).iter_logs(LogQuery(LogType.traffic, max_logs=11, page_size=4,
+                                                         direction='forward')))
+
+    assert [int(x['seqno']) for x in _logs] == list(range(1, 12))
+
+
+class _RecordingHook(RequestHook):
+    def __init__(self):
+        self.before = []
+        self.after = []
+
+    def before_request(self, request_info):
+        self.before.append(request_info)
+
+    def after_request(self, request_info):
+        self.after.append(request_info)
+
+
+def test_streamed_log_pages_report_wire_and_payload_bytes(simulator, gateway):
+    _hook = _RecordingHook()
+    gateway.add_request_hook(_hook)
+    simulator.compression = 'gzip'
+
+    try:
+        _logs = list(_log_client(gateway).iter_logs(LogQuery(LogType.traffic, page_size=25)))
+    finally:
+        simulator.compression = ''
+
+    # Every page job is polled twice, the second reply has logs and is streamed
+    _pages = [x for x in _hook.after if x.action == 'get' and x.bytes_received > 1000]
+
+    assert len(_logs) == simulator.logs_count
+    assert len(_hook.before) == len(_hook.after)
+    assert len(_pages) == 2
+    assert all(0 < x.wire_bytes_received < x.bytes_received for x in _pages)
+    assert all(x.timings['transfer'] > 0 and x.timings['total'] >= x.timings['transfer'] for x in _pages)
+
+
+def test_new_logs_do_not_shift_pages(simulator, gateway):
+    _logs_count = simulator.logs_count
+    _seqnos = []
+
+    try:
+        for _entry in _log_client(gateway).iter_logs(LogQuery(LogType.traffic, page_size=10)):
+            _seqnos.append(int(_entry['seqno']))
+            # New logs arrive between pages
+            simulator.logs_count += 1
+
+    finally:
+        simulator.logs_count = _logs_count
+
+    assert _seqnos == list(range(_logs_count, 0, -1))
+
+
+def test_stopped_iteration_deletes_job(simulator, gateway):
+    _logs = _log_client(gateway).iter_logs(LogQuery(LogType.traffic, page_size=10))
+    next(_logs)
+
+    assert len(_open_log_jobs(simulator)) == 1
+
+    _logs.close()
+
+    assert _open_log_jobs(simulator) == []
+
+
+def test_parallel_reader_collects_logs_and_resets_errors(simulator, panorama, monkeypatch):
+    _query = LogQuery(LogType.traffic, page_size=20)
+    _reader = ParallelLogReader([(x, _query) for x in panorama.managed_devices[:2]], max_workers=2,
+                                initial_poll_interval_seconds=0.01, max_poll_interval_seconds=0.01)
+    _submit = LogClient.submit
+    _failed = threading.Event()
+
+    def _failing_submit(self, *args, **kwargs):
+        if not _failed.is_set():
+            _failed.set()
+            raise requests.ConnectionError('simulated')
+
+        return _submit(self, *args, **kwargs)
+
+    monkeypatch.setattr(LogClient, 'submit', _failing_submit)
+
+    assert len(list(_reader)) == simulator.logs_count
+    assert len(_reader.errors) == 1
+
+    monkeypatch.setattr(LogClient, 'submit', _submit)
+
+    assert len(list(_reader)) == simulator.logs_count * 2
+    assert _reader.errors == {}
+
+
+def test_parallel_reader_stops_with_full_buffer(simulator, gateway):
+    _reader = ParallelLogReader([(gateway, LogQuery(LogType.traffic, page_size=5))] * 3, max_workers=3,
+                                max_buffered_entries=1, initial_poll_interval_seconds=0.01,
+                                max_poll_interval_seconds=0.01)
+    _entries = iter(_reader)
+    next(_entries)
+    _entries.close()
+
+    for _thread in [x for x in threading.enumerate() if x.name == 'log-reader']:
+        _thread.join(5)
+
+    assert not [x for x in threading.enumerate() if x.name == 'log-reader']
+    assert _open_log_jobs(simulator) == []
+
+
+def test_failed_log_job_raises_with_reply_content(gateway):
+    with pytest.raises(PaloAltoApiRequestException) as _info:
+        next(_log_client(gateway).wait_job('unknown'))
+
+    assert 'Job not found' in _info.value.content
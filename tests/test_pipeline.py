@@ -0,0 +1,67 @@
+import xml.etree.ElementTree as ET
+
+from pypaloalto_api.configuration_commands import ConfigAction, XmlApiRequestType, XmlApiXPathBuilder
+from pypaloalto_api.operational_commands import OPCmdBuilder
+from pypaloalto_api.pipeline import RequestPipeline
+from pypaloalto_api.proxy import PanoramaProxy
+
+ADDRESS_XPATH = XmlApiXPathBuilder.localhost_device_group('DG-0') + '/address'
+
+
+def _set_address_request(name: str) -> dict:
+    return {
+        'type': XmlApiRequestType.config.value, 'action': ConfigAction.set.value, 'xpath': ADDRESS_XPATH,
+        'element': f'<entry name="{name}"><ip-netmask>192.0.2.20</ip-netmask></entry>',
+    }
+
+
+def test_pipeline_replies_are_in_order_over_one_connection(simulator, gateway):
+    _pipeline = RequestPipeline(gateway, return_exceptions=True)
+    _connections = simulator.requests_counter['connections']
+
+    for _ in range(4):
+        _pipeline.add_operational_command(OPCmdBuilder.show_system_info())
+
+    _failed_index = _pipeline.add_operational_command(OPCmdBuilder.show_system_info(), target='unknown')
+    _results = _pipeline.execute()
+
+    assert len(_pipeline) == 0
+    assert len(_results) == 5
+    assert all(x[0].get('status') == 'success' for x in _results[:_failed_index])
+    assert isinstance(_results[_failed_index], BaseException)
+    assert simulator.requests_counter['connections'] - _connections == 1
+
+
+def test_pipeline_config_write_invalidates_cache_and_is_tracked(panorama):
+    _cache = panorama.enable_config_cache()
+    _tracker = panorama.enable_change_tracking()
+    _tracker.clear()
+    panorama.xml_api_config_request(ConfigAction.get, ADDRESS_XPATH)
+
+    assert _cache.get_reply(ConfigAction.get.value, ADDRESS_XPATH) is not None
+
+    _pipeline = RequestPipeline(panorama)
+    _pipeline.add_operational_command(OPCmdBuilder.show_system_info())
+    _pipeline.add_request(_set_address_request('host-pipeline'))
+    _pipeline.execute()
+
+    assert _cache.get_reply(ConfigAction.get.value, ADDRESS_XPATH) is None
+    assert _tracker.xpaths == [ADDRESS_XPATH]
+
+    _reply, _status_code = panorama.xml_api_config_request(ConfigAction.get, ADDRESS_XPATH)
+
+    assert _reply.find(".//entry[@name='host-pipeline']") is not None
+
+
+def test_proxied_config_write_is_tracked_by_managed_device(panorama):
+    _panorama_tracker = panorama.enable_change_tracking()
+    _panorama_tracker.clear()
+    _device = PanoramaProxy(panorama).get_devices()[0]
+    _device_tracker = _device.enable_change_tracking()
+
+    _pipeline = RequestPipeline(_device)
+    _pipeline.add_request(_set_address_request('host-proxied'))
+    _pipeline.execute()
+
+    assert _device_tracker.xpaths == [ADDRESS_XPATH]
+    assert _panorama_tracker.xpaths == []
@@ -0,0 +1,70 @@
+import pytest
+
+from pypaloalto_api.enums import HttpRequestMethod
+from pypaloalto_api.exceptions import PaloAltoException
+from pypaloalto_api.operational_commands import OPCmdBuilder
+from pypaloalto_api.proxy import PanoramaProxy
+
+
+def test_operational_command_through_panorama(simulator, panorama):
+    _proxy = PanoramaProxy(panorama, max_concurrency=2)
+    _devices = _proxy.get_devices()
+    _connections = simulator.requests_counter['connections']
+
+    _results = list(_proxy.run_operational_command(OPCmdBuilder.show_system_info()))
+
+    assert len(_devices) == len(_results) == 4
+    assert all(x.is_ok and x.value[0].get('status') == 'success' for x in _results)
+    assert {x.device_name for x in _results} == {x.device_name for x in _devices}
+    assert simulator.requests_counter['connections'] - _connections <= 2
+
+
+def test_unknown_serial_is_kept(panorama):
+    _devices = PanoramaProxy(panorama).get_devices(['unknown'])
+
+    assert [x.serial for x in _devices] == ['unknown']
+
+
+def test_restapi_request_raises_palo_alto_exception(panorama):
+    _device = PanoramaProxy(panorama).get_devices()[0]
+
+    with pytest.raises(PaloAltoException):
+        _device.restapi_request('/restapi/v10.1/Objects/Addresses', HttpRequestMethod.get)
+
+
+def test_enable_connection_pooling_replaces_session(panorama):
+    _old_session = panorama.enable_connection_pooling(2)
+    _new_session = panorama.enable_connection_pooling(4)
+
+    assert panorama.http_session is _new_session is not _old_session
+    assert _new_session.pool_maxsize == 4
+
+    panorama.xml_api_operational_request(OPCmdBuilder.show_system_info())
+    panorama.disable_connection_pooling()
+
+    assert panorama.http_session is None
+
+
+def test_proxy_keeps_pool_of_caller(panorama):
+    _session = panorama.enable_connection_pooling(2)
+
+    try:
+        PanoramaProxy(panorama, max_concurrency=8)
+
+        assert panorama.http_session is _session and _session.pool_maxsize == 2
+    finally:
+        panorama.disable_connection_pooling()
+
+    PanoramaProxy(panorama, max_concurrency=3)
+
+    assert panorama.http_session.pool_maxsize == 3
+    panorama.disable_connection_pooling()
+
+
+def test_export_request_does_not_modify_params(panorama):
+    _device = PanoramaProxy(panorama).get_devices()[0]
+    _params = {'category': 'configuration'}
+    _device.xml_api_export_request(_params)
+
+    assert _params == {'category': 'configuration'}
+    panorama.disable_connection_pooling()
@@ -0,0 +1,37 @@
+import pytest
+
+from pypaloalto_api.exceptions import PaloAltoException
+from pypaloalto_api.registered_ip import RegisteredIpManager
+
+
+def test_sync_sends_only_differences(simulator, gateway):
+    _manager = RegisteredIpManager(gateway)
+    simulator.registered_ips.update({'10.4.0.1': {'old', 'unmanaged'}, '10.4.0.2': {'scanner'}})
+
+    _result = _manager.sync({'10.4.0.2': ['scanner', 'threat'], '10.4.0.3': ['threat']}, managed_tags=['old'])
+
+    assert (_result.registered, _result.unregistered, _result.unchanged) == (2, 1, 1)
+    assert _result.messages_sent == 1
+    assert simulator.registered_ips['10.4.0.1'] == {'unmanaged'}
+    assert simulator.registered_ips['10.4.0.2'] == {'scanner', 'threat'}
+    assert not _manager.sync({'10.4.0.2': ['scanner', 'threat'], '10.4.0.3': ['threat']}).has_changes
+
+
+def test_registered_ips_are_paged(simulator, gateway):
+    simulator.registered_ips.clear()
+    simulator.registered_ips.update({f'10.5.0.{x}': {'paged'} for x in range(12)})
+    _requests = simulator.requests_counter['op']
+
+    _registered_ips = RegisteredIpManager(gateway, page_size=5).get_registered_ips()
+
+    assert _registered_ips == simulator.registered_ips
+    assert simulator.requests_counter['op'] - _requests == 3
+
+
+def test_incomplete_table_raises(simulator, gateway, monkeypatch):
+    simulator.registered_ips.update({f'10.6.0.{x}': {'cut'} for x in range(4)})
+    _reply = simulator.registered_ips_reply
+    monkeypatch.setattr(simulator, 'registered_ips_reply', lambda start_point, limit, tag: _reply(1, 2, tag))
+
+    with pytest.raises(PaloAltoException):
+        RegisteredIpManager(gateway, page_size=5).get_registered_ips()
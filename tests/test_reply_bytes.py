@@ -0,0 +1,52 @@
+import pytest
+
+from pypaloalto_api.enums import HttpRequestMethod
+from pypaloalto_api.exceptions import PaloAltoApiRequestException
+from pypaloalto_api.operational_commands import OPCmdBuilder
+
+
+def test_http_request_decodes_content_only_when_asked(simulator, gateway):
+    _url = f'https://{gateway.ipv4}/api/'
+    _data = {'type': 'op', 'cmd': OPCmdBuilder.show_system_info()}
+
+    _bytes, _status_code = gateway.http_request(HttpRequestMethod.post, _url, _data, decode_content=False)
+    _text, _status_code = gateway.http_request(HttpRequestMethod.post, _url, _data)
+
+    assert isinstance(_bytes, bytes) and isinstance(_text, str)
+    assert _bytes.decode() == _text
+
+
+def test_exception_keeps_raw_bytes_and_decodes_on_access():
+    _exception = PaloAltoApiRequestException('fw', 500, '<response status="error">é</response>'.encode())
+
+    assert isinstance(_exception.raw_content, bytes)
+    assert _exception.content == '<response status="error">é</response>'
+    assert PaloAltoApiRequestException('fw', 500, b'\xff\xfe').content == b'\xff\xfe'
+
+
+def test_error_reply_content_is_kept_as_bytes(gateway):
+    with pytest.raises(PaloAltoApiRequestException) as _info:
+        gateway.xml_api_operational_request(OPCmdBuilder.show_system_info(), target='unknown')
+
+    assert isinstance(_info.value.raw_content, bytes)
+    assert 'status="error"' in _info.value.content
+
+
+def test_stream_request_reads_compressed_reply_while_received(simulator, gateway):
+    _request_data = {'type': 'config', 'action': 'get', 'xpath': '/config/devices'}
+    _content, _status_code = gateway.xml_api_raw_request(_request_data)
+    simulator.compression = 'gzip'
+
+    try:
+        _reply, _status_code = gateway.xml_api_stream_request(_request_data)
+
+        with _reply:
+            _head = _reply.read(100)
+            _rest = _reply.read()
+
+    finally:
+        simulator.compression = ''
+
+    assert _status_code == 200
+    assert _head + _rest == _content
+    assert _reply.closed
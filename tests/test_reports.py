@@ -0,0 +1,54 @@
+import threading
+import xml.etree.ElementTree as ET
+
+from pypaloalto_api.cache import TtlLruCache
+from pypaloalto_api.jobs import JobTracker
+from pypaloalto_api.reports import ReportClient, ReportTable
+
+
+def _report_client(device, cache=None) -> ReportClient:
+    return ReportClient(device, cache=cache, job_tracker=JobTracker(0.01, 0.01))
+
+
+def test_report_table_keeps_columns_in_order_with_missing_values():
+    _table = ReportTable.from_xml(ET.fromstring(
+        '<report name="top"><entry><app>a</app><bytes>1</bytes></entry><entry><app>b</app><risk>5</risk></entry>'
+        '</report>'
+    ))
+
+    assert _table.column_names == ['app', 'bytes', 'risk']
+    assert list(_table.rows()) == [{'app': 'a', 'bytes': '1', 'risk': None}, {'app': 'b', 'bytes': None, 'risk': '5'}]
+    assert _table.attributes == {'name': 'top'}
+    assert len(ReportTable.from_xml(None)) == 0
+
+
+def test_predefined_and_dynamic_reports(simulator, gateway):
+    _client = _report_client(gateway)
+
+    _predefined = _client.predefined('top-applications')
+    _dynamic = _client.dynamic('top-app-summary', topn=10)
+
+    assert len(_predefined) == len(_dynamic) == 10
+    assert _dynamic.column('app')[0] == 'app-0'
+    assert _dynamic.attributes['reportname'] == 'top-app-summary'
+
+
+def test_cached_report_is_fetched_once(simulator, gateway):
+    _client = _report_client(gateway, TtlLruCache(max_size=16, ttl_seconds=60))
+    _requests = simulator.requests_counter['report']
+    _tables = []
+    _threads = [threading.Thread(target=lambda: _tables.append(_client.dynamic('top-apps'))) for _ in range(4)]
+
+    for _thread in _threads:
+        _thread.start()
+
+    for _thread in _threads:
+        _thread.join()
+
+    _fetch_requests = simulator.requests_counter['report'] - _requests
+
+    assert _fetch_requests == 3  # submit and two polls of one job
+    assert len(_tables) == 4 and all(x is _tables[0] for x in _tables)
+    assert _client.dynamic('top-apps') is _tables[0]
+    assert simulator.requests_counter['report'] - _requests == _fetch_requests
+    assert _client.dynamic('top-apps', period='last-hour') is not _tables[0]
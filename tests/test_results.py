@@ -0,0 +1,67 @@
+import xml.etree.ElementTree as ET
+
+from pypaloalto_api.enums import HaPeerState
+from pypaloalto_api.operational_commands import OPCmdBuilder
+from pypaloalto_api.results import SystemInfo, HaState, ConnectedDevice, DeviceGroupInfo, JobInfo
+
+
+def test_fields_are_parsed_lazily_and_cached():
+    _node = ET.fromstring('<system><hostname>fw</hostname><multi-vsys>on</multi-vsys></system>')
+    _system_info = SystemInfo(_node)
+
+    assert _system_info.hostname == 'fw'
+    assert _system_info.is_multi_vsys is True
+    assert _system_info.serial is None
+
+    _node.find('hostname').text = 'changed'
+
+    assert _system_info.hostname == 'fw'
+    assert SystemInfo.from_reply(ET.fromstring('<response status="error"/>')).hostname is None
+
+
+def test_system_info_from_reply_node_variants(gateway):
+    _reply, _status_code = gateway.xml_api_operational_request(OPCmdBuilder.show_system_info())
+
+    for _node in (_reply, _reply.find('result'), _reply.find('result/system')):
+        assert SystemInfo.from_reply(_node).serial == gateway.serial
+
+
+def test_ha_state_with_and_without_group():
+    _ha_state = HaState.from_reply(ET.fromstring(
+        '<response><result><enabled>yes</enabled><group><local-info><state>passive</state></local-info>'
+        '<peer-info><state>active</state><conn-status>up</conn-status></peer-info></group></result></response>'
+    ))
+
+    assert _ha_state.ha_peer_state == HaPeerState.passive
+    assert (_ha_state.peer_state, _ha_state.peer_connection_status) == ('active', 'up')
+    assert HaState.from_reply(ET.fromstring('<result><enabled>no</enabled></result>')).ha_peer_state == \
+           HaPeerState.ha_not_enabled
+
+
+def test_connected_devices_and_device_groups(panorama):
+    _devices = ConnectedDevice.list_from_reply(
+        panorama.xml_api_operational_request(OPCmdBuilder.show_devices_connected())[0]
+    )
+    _device_groups = DeviceGroupInfo.list_from_reply(
+        panorama.xml_api_operational_request(OPCmdBuilder.show_devicegroups())[0]
+    )
+
+    assert len(_devices) == 4
+    assert all(x.is_connected and x.ha_state == HaPeerState.active for x in _devices)
+    assert _devices[0].vsys_display_name_by_vsys_name == {'vsys1': 'vsys1'}
+    assert [x.name for x in _device_groups] == ['DG-0', 'DG-1']
+    assert sorted(y for x in _device_groups for y in x.serials) == sorted(x.serial for x in _devices)
+    assert _device_groups[0].get_vsys_names(_device_groups[0].serials[0]) == ['vsys1']
+
+
+def test_job_info():
+    _jobs = JobInfo.list_from_reply(ET.fromstring(
+        '<response><result><job><id>7</id><status>FIN</status><result>FAIL</result><progress>100</progress>'
+        '<details><line>error 1</line><line>error 2</line></details></job>'
+        '<job><id>8</id><status>ACT</status><progress>n/a</progress></job></result></response>'
+    ))
+
+    assert (_jobs[0].is_finished, _jobs[0].is_ok, _jobs[0].progress) == (True, False, 100)
+    assert _jobs[0].details == ['error 1', 'error 2']
+    assert (_jobs[1].is_finished, _jobs[1].progress, _jobs[1].details) == (False, 0, [])
+    assert _jobs[1].to_dict()['id'] == '8'
@@ -0,0 +1,100 @@
+import time
+import xml.etree.ElementTree as ET
+
+import pytest
+import requests
+
+from pypaloalto_api.configuration_commands import ConfigAction
+from pypaloalto_api.devices import Gateway
+from pypaloalto_api.enums import HttpRequestMethod
+from pypaloalto_api.instrumentation import RequestHook
+from pypaloalto_api.operational_commands import OPCmdBuilder
+from pypaloalto_api.retry import RetryPolicy, DEFAULT_RETRY_POLICY, CONFIG_LOCK_RETRY_REASON, is_read_only_request
+from simulator import PanOsSimulator
+
+
+class _RetriesRecordingPolicy(RetryPolicy):
+    def __init__(self, **kwargs):
+        super().__init__(base_delay_seconds=0.01, config_lock_base_delay_seconds=0.01, **kwargs)
+        self.reasons = []
+
+    def can_retry(self, attempt: int, elapsed_seconds: float, delay_seconds: float, retry_reason: str = '') -> bool:
+        _can_retry = super().can_retry(attempt, elapsed_seconds, delay_seconds, retry_reason)
+
+        if _can_retry:
+            self.reasons.append(retry_reason)
+
+        return _can_retry
+
+
+class _AttemptsHook(RequestHook):
+    def __init__(self):
+        self.attempts = []
+
+    def after_request(self, request_info):
+        self.attempts.append(request_info.attempts)
+
+
+def test_read_only_requests():
+    assert is_read_only_request(HttpRequestMethod.post, {'type': 'config', 'action': 'get', 'xpath': '/config'})
+    assert is_read_only_request(HttpRequestMethod.post, {'type': 'op', 'cmd': OPCmdBuilder.show_system_info()})
+    assert is_read_only_request(HttpRequestMethod.post, {'type': 'log', 'action': 'get', 'job-id': '1'})
+    assert is_read_only_request(HttpRequestMethod.get, None)
+    assert not is_read_only_request(HttpRequestMethod.post, {'type': 'config', 'action': 'set', 'xpath': '/config'})
+    assert not is_read_only_request(HttpRequestMethod.post, {'type': 'commit', 'cmd': '<commit/>'})
+    assert not is_read_only_request(HttpRequestMethod.post, {'type': 'op', 'cmd': '<request><restart/></request>'})
+    assert not is_read_only_request(HttpRequestMethod.post, {'type': 'user-id', 'cmd': '<uid-message/>'})
+
+
+def test_default_policy_is_small_and_safe():
+    assert DEFAULT_RETRY_POLICY.max_attempts <= 3 and DEFAULT_RETRY_POLICY.base_delay_seconds <= 2
+    assert not DEFAULT_RETRY_POLICY.is_retryable_exception(requests.ConnectionError(), is_read_only=True)
+    assert DEFAULT_RETRY_POLICY.get_response_retry_reason(503, b'', is_read_only=False) is None
+    assert DEFAULT_RETRY_POLICY.get_response_retry_reason(503, b'', is_read_only=True) == 'Status code 503'
+    assert DEFAULT_RETRY_POLICY.get_response_retry_reason(
+        400, b'Timed out while getting config lock. Please try again.', is_read_only=False
+    ) == CONFIG_LOCK_RETRY_REASON
+
+
+def test_connect_timeout_and_writes_are_not_retried_with_connection_errors_on():
+    _policy = RetryPolicy(retry_on_connection_errors=True)
+
+    assert _policy.is_retryable_exception(requests.ConnectionError(), is_read_only=True)
+    assert not _policy.is_retryable_exception(requests.ConnectTimeout(), is_read_only=True)
+    assert not _policy.is_retryable_exception(requests.ConnectionError(), is_read_only=False)
+    assert RetryPolicy(retry_on_connection_errors=True, retry_write_requests=True).is_retryable_exception(
+        requests.ConnectionError(), is_read_only=False
+    )
+
+
+def test_refused_connection_fails_fast():
+    with PanOsSimulator(rules_count=1) as _simulator:
+        _gateway = Gateway(_simulator.address, _simulator.device_config())
+
+    _started_at = time.monotonic()
+
+    with pytest.raises(requests.ConnectionError):
+        _gateway.xml_api_operational_request(OPCmdBuilder.show_system_info())
+
+    assert time.monotonic() - _started_at < 2
+
+    _gateway.retry_policy = _RetriesRecordingPolicy(retry_on_connection_errors=True)
+
+    with pytest.raises(requests.ConnectionError):
+        _gateway.xml_api_operational_request(OPCmdBuilder.show_system_info())
+
+    assert len(_gateway.retry_policy.reasons) == 2
+
+
+def test_config_lock_is_retried_with_its_own_attempts():
+    with PanOsSimulator(rules_count=1, config_lock_failures=3) as _simulator:
+        _gateway = Gateway(_simulator.address, _simulator.device_config())
+        _gateway.retry_policy = _RetriesRecordingPolicy(max_attempts=1)
+        _hook = _AttemptsHook()
+        _gateway.add_request_hook(_hook)
+        _reply, _status_code = _gateway.xml_api_config_request(ConfigAction.set, '/config/shared',
+                                                               [ET.Element('tag')])
+
+    assert _status_code == 200
+    assert _gateway.retry_policy.reasons == [CONFIG_LOCK_RETRY_REASON] * 3
+    assert _hook.attempts == [4]
@@ -0,0 +1,83 @@
+import xml.etree.ElementTree as ET
+
+import pytest
+
+from pypaloalto_api.rule_archive import RuleArchive, RULES_SECTION
+from pypaloalto_api.security_rule import SecurityRuleBuilder
+from simulator import make_rulebase_reply
+
+ADDRESS_XML = '<address><entry name="web-server"><ip-netmask>10.0.0.10/32</ip-netmask>' \
+              '<tag><member>web</member></tag></entry>' \
+              '<entry name="dns-server"><ip-netmask>10.0.0.53/32</ip-netmask></entry></address>'
+
+
+@pytest.fixture
+def rules():
+    return SecurityRuleBuilder.create_security_rules_list(make_rulebase_reply(30))
+
+
+def test_rules_round_trip_in_rulebase_order(tmp_path, rules):
+    _archive_file_name = tmp_path / 'rules.para'
+    _size = RuleArchive.write(_archive_file_name, rules, device_serial='007', created_at='2024-01-01 00:00:00')
+
+    assert _size == _archive_file_name.stat().st_size
+
+    with RuleArchive(_archive_file_name) as _archive:
+        assert len(_archive) == len(rules)
+        assert _archive.device_serial == '007'
+        assert _archive.created_at == '2024-01-01 00:00:00'
+        assert _archive.rule_names == [x.name for x in rules]
+        assert [x.to_dict() for x in _archive.iter_rules()] == [x.to_dict() for x in rules]
+        assert _archive.get_rule_by_position(-1).to_dict() == rules[-1].to_dict()
+
+        with pytest.raises(IndexError):
+            _archive.get_rule_by_position(len(rules))
+
+
+def test_lookup_by_name_keeps_uuid(tmp_path, rules):
+    _archive_file_name = tmp_path / 'rules.para'
+    RuleArchive.write(_archive_file_name, rules)
+
+    with RuleArchive(_archive_file_name) as _archive:
+        # rule-10 sorts before rule-2, lookup doesn't depend on rulebase order
+        for _name in ('rule-0', 'rule-10', 'rule-2', 'rule-29'):
+            _rule = _archive.get_rule(_name)
+            _expected = next(x for x in rules if x.name == _name)
+
+            assert _name in _archive
+            assert _rule.to_dict() == _expected.to_dict()
+            assert _rule.uuid == _expected.uuid
+
+        assert 'rule-30' not in _archive
+        assert _archive.get_rule('rule-30') is None
+
+    # Rules taken from archive stay valid after closing
+    assert _rule.name == 'rule-29'
+
+
+def test_object_sections(tmp_path, rules):
+    _archive_file_name = tmp_path / 'rules.para'
+    _services = [{'@name': 'tcp-8080', 'protocol': {'tcp': {'port': '8080'}}}]
+    RuleArchive.write(_archive_file_name, rules, {'address': ET.fromstring(ADDRESS_XML), 'service': _services})
+
+    with RuleArchive(_archive_file_name) as _archive:
+        assert _archive.object_sections == ['address', 'service']
+        assert _archive.get_object_names('address') == ['web-server', 'dns-server']
+        assert _archive.get_object('address', 'web-server')['tag']['member'] == ['web']
+        assert _archive.get_object('address', 'dns-server')['@name'] == 'dns-server'
+        assert _archive.get_object('address', 'mail-server') is None
+        assert _archive.get_objects('service') == _services
+
+        with pytest.raises(KeyError):
+            _archive.get_objects('application')
+
+
+def test_invalid_archives_are_rejected(tmp_path, rules):
+    with pytest.raises(ValueError):
+        RuleArchive.write(tmp_path / 'rules.para', rules, {RULES_SECTION: []})
+
+    _file_name = tmp_path / 'not-archive.para'
+    _file_name.write_bytes(b'\0' * 64)
+
+    with pytest.raises(ValueError):
+        RuleArchive(_file_name)
@@ -0,0 +1,103 @@
+import xml.etree.ElementTree as ET
+
+from pypaloalto_api.configuration_commands import ConfigAction
+from pypaloalto_api.enums import RulebaseType
+from pypaloalto_api.rulebase_sync import IncrementalRulebaseFetcher
+
+RULES_XPATH = "/config/devices/entry[@name='localhost.localdomain']/device-group/entry[@name='DG-1']" \
+              "/pre-rulebase/security/rules"
+CHANGE_SUMMARY_REPLY = '<response status="success"><result><summary><device-group><member>DG-A</member>' \
+                       '<member>DG-B</member></device-group><shared/></summary></result></response>'
+
+
+class _RepliedPanorama:
+    device_name = 'panorama'
+
+    def xml_api_operational_request(self, cmd: str):
+        return ET.fromstring(CHANGE_SUMMARY_REPLY), 200
+
+
+def test_changed_locations_are_read_from_summary(tmp_path):
+    _fetcher = IncrementalRulebaseFetcher(_RepliedPanorama(), tmp_path / 'cache.json')
+
+    assert _fetcher.get_changed_locations() == {'DG-A', 'DG-B', 'shared'}
+
+
+def _get_fetched(fetcher: IncrementalRulebaseFetcher) -> set:
+    return {x.device_group_name for x in fetcher.last_results if x.is_fetched}
+
+
+def test_only_changed_locations_are_fetched_again(panorama, simulator, tmp_path):
+    _cache_file = tmp_path / 'cache.json'
+    _fetcher = IncrementalRulebaseFetcher(panorama, _cache_file)
+    _rules = _fetcher.fetch(['DG-0', 'DG-1', 'shared'])
+
+    assert len(_rules['DG-0'][RulebaseType.pre_rule]) == 20
+    assert _rules['shared'][RulebaseType.pre_rule] == []
+    assert _get_fetched(_fetcher) == {'DG-0', 'DG-1', 'shared'}
+    _fetcher.save()
+
+    # Pushed policy doesn't matter, shared and device groups are taken from cache
+    simulator.policy_push_count += 1
+    _fetcher = IncrementalRulebaseFetcher(panorama, _cache_file)
+    _requests_count = simulator.requests_counter['config']
+    _cached_rules = _fetcher.fetch(['DG-0', 'DG-1', 'shared'])
+
+    assert simulator.requests_counter['config'] == _requests_count
+    assert _get_fetched(_fetcher) == set()
+    assert [x.name for x in _cached_rules['DG-1'][RulebaseType.pre_rule]] == \
+        [x.name for x in _rules['DG-1'][RulebaseType.pre_rule]]
+
+    _original_rule_xml = _rules['DG-1'][RulebaseType.pre_rule][3].to_xml()
+    _rule_xml = _rules['DG-1'][RulebaseType.pre_rule][3].to_xml()
+    _rule_xml.find('description').text = 'Not committed change'
+    panorama.xml_api_config_request(ConfigAction.edit, f"{RULES_XPATH}/entry[@name='rule-3']", [_rule_xml])
+
+    try:
+        _assert_changed_device_group_is_fetched(_fetcher, simulator)
+    finally:
+        panorama.xml_api_config_request(ConfigAction.edit, f"{RULES_XPATH}/entry[@name='rule-3']",
+                                        [_original_rule_xml])
+        simulator.commit_reply({})
+
+
+def _assert_changed_device_group_is_fetched(fetcher: IncrementalRulebaseFetcher, simulator):
+    _rules = fetcher.fetch(['DG-0', 'DG-1', 'shared'])
+
+    assert _get_fetched(fetcher) == {'DG-1'}
+    assert [x.changed for x in fetcher.last_results if x.is_fetched] == [['rule-3'], []]
+    assert _rules['DG-1'][RulebaseType.pre_rule][3].to_dict()['description'] == 'Not committed change'
+
+    # Candidate changes can be changed again or reverted, so the location is fetched until commit
+    fetcher.fetch(['DG-0', 'DG-1', 'shared'])
+    assert _get_fetched(fetcher) == {'DG-1'}
+
+    simulator.commit_reply({})
+    fetcher.fetch(['DG-0', 'DG-1', 'shared'])
+    assert _get_fetched(fetcher) == {'DG-0', 'DG-1', 'shared'}
+    assert not any(x.has_changes for x in fetcher.last_results)
+
+    fetcher.fetch(['DG-0', 'DG-1', 'shared'])
+    assert _get_fetched(fetcher) == set()
+
+
+def test_renamed_rules_are_matched_by_uuid(panorama, simulator, tmp_path):
+    _fetcher = IncrementalRulebaseFetcher(panorama, tmp_path / 'cache.json', rulebase_types=(RulebaseType.pre_rule,))
+    _fetcher.fetch(['DG-1'])
+    panorama.xml_api_config_request(ConfigAction.rename, f"{RULES_XPATH}/entry[@name='rule-5']",
+                                    params={'newname': 'rule-5-renamed'})
+
+    try:
+        _rules = _fetcher.fetch(['DG-1'])
+        _result = _fetcher.last_results[0]
+
+        assert _result.renamed == [['rule-5', 'rule-5-renamed']]
+        assert _result.added == [] and _result.removed == [] and _result.changed == []
+        assert _rules['DG-1'][RulebaseType.pre_rule][5].name == 'rule-5-renamed'
+    finally:
+        panorama.xml_api_config_request(ConfigAction.rename, f"{RULES_XPATH}/entry[@name='rule-5-renamed']",
+                                        params={'newname': 'rule-5'})
+        simulator.commit_reply({})
+
+    # Rule renamed back is not taken from cache with the old name
+    assert [x.name for x in _fetcher.fetch(['DG-1'])['DG-1'][RulebaseType.pre_rule]][5] == 'rule-5'
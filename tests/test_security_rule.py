@@ -0,0 +1,76 @@
+import xml.etree.ElementTree as ET
+
+from pypaloalto_api.configuration_commands import ConfigAction
+from pypaloalto_api.diff import diff_security_rules
+from pypaloalto_api.security_rule import SecurityRule, SecurityRuleBuilder, RuleKey, RuleAction
+
+RULES_XPATH = "/config/devices/entry[@name='localhost.localdomain']/device-group/entry[@name='DG-1']" \
+              "/pre-rulebase/security/rules"
+
+
+def _make_local_rule(name: str = 'local-rule', source: list = None) -> SecurityRule:
+    return SecurityRuleBuilder.security_rule_from_arguments({
+        RuleKey.rule_name: name,
+        RuleKey.source_list: source or ['10.0.0.1', '10.0.0.2'],
+        RuleKey.action: RuleAction.deny,
+        RuleKey.tag_list: ['managed'],
+    })
+
+
+def test_local_rule_hash_survives_xml_round_trip():
+    _rule = _make_local_rule()
+
+    assert _rule.content_hash() == SecurityRule(_rule.to_xml()).content_hash()
+
+
+def test_local_rule_hash_equals_fetched_rule_hash(gateway):
+    _rule = _make_local_rule('pushed-rule')
+    gateway.xml_api_config_request(ConfigAction.set, RULES_XPATH, [_rule.to_xml()])
+    _reply, _ = gateway.xml_api_config_request(ConfigAction.get, f"{RULES_XPATH}/entry[@name='pushed-rule']")
+
+    assert SecurityRule(_reply.find('result/entry')).content_hash() == _rule.content_hash()
+
+
+def test_hash_ignores_defaults_location_and_members_order():
+    _device_xml = ET.fromstring(
+        '<entry name="local-rule" uuid="1234" loc="DG-1"><from><member>any</member></from><to><member>any</member>'
+        '</to><source><member>10.0.0.2</member><member>10.0.0.1</member></source><source-user><member>any</member>'
+        '</source-user><destination><member>any</member></destination><service><member>any</member></service>'
+        '<application><member>any</member></application><action>deny</action><tag><member>managed</member></tag>'
+        '<description/><target><negate>no</negate></target></entry>'
+    )
+
+    assert SecurityRule(_device_xml).content_hash() == _make_local_rule().content_hash()
+    assert _make_local_rule(source=['10.0.0.3']).content_hash() != _make_local_rule().content_hash()
+
+
+def test_diff_skips_equal_rules_built_differently():
+    _local_rules = [_make_local_rule('rule-a'), _make_local_rule('rule-b', ['10.0.0.3'])]
+    _fetched_rules = [SecurityRule(x.to_xml()) for x in _local_rules]
+
+    assert diff_security_rules(_fetched_rules, _local_rules, RULES_XPATH) == []
+
+    _changed_rules = [_local_rules[0], _make_local_rule('rule-b', ['10.0.0.4'])]
+    _changes = diff_security_rules(_fetched_rules, _changed_rules, RULES_XPATH)
+
+    assert [(x.action, x.xpath) for x in _changes] == [(ConfigAction.edit, f"{RULES_XPATH}/entry[@name='rule-b']")]
+
+
+def test_rules_list_from_raw_content_in_process_pool(gateway):
+    _content, _status_code = gateway.xml_api_raw_request({
+        'type': 'config', 'action': ConfigAction.get.value,
+        'xpath': RULES_XPATH.replace('DG-1', 'DG-0'),
+    })
+    _content = _content.replace(b'</rules>', b'<entry name="empty-rule"/></rules>')
+
+    _serial_rules = SecurityRuleBuilder.create_security_rules_list(_content)
+    _parallel_rules = SecurityRuleBuilder.create_security_rules_list(_content, max_workers=2, chunk_size=7)
+    _element_rules = SecurityRuleBuilder.create_security_rules_list(ET.fromstring(_content).find('result/rules'),
+                                                                    max_workers=2, chunk_size=7)
+
+    assert len(_serial_rules) == 21
+    assert _serial_rules[-1].name == 'empty-rule'
+    assert [x.name for x in _parallel_rules] == [x.name for x in _serial_rules]
+    assert [x.content_hash() for x in _parallel_rules] == [x.content_hash() for x in _serial_rules]
+    assert [x.content_hash() for x in _element_rules] == [x.content_hash() for x in _serial_rules]
+    assert SecurityRuleBuilder.create_security_rules_list(b'<response><result/></response>', max_workers=2) == []
@@ -0,0 +1,37 @@
+import gzip
+
+import requests
+
+from simulator import PanOsSimulator, API_KEY, CONFIG_LOCK_ERROR
+
+
+def _post(simulator: PanOsSimulator, data: dict, **kwargs) -> requests.Response:
+    return requests.post(f'https://{simulator.address}/api/', data=dict(data, key=API_KEY), verify=False, **kwargs)
+
+
+def test_config_lock_failures_are_answered_first():
+    with PanOsSimulator(config_lock_failures=1, rules_count=1) as _simulator:
+        _data = {'type': 'config', 'action': 'set', 'xpath': '/config/shared', 'element': '<tag/>'}
+        _first = _post(_simulator, _data)
+        _second = _post(_simulator, _data)
+
+    assert _first.status_code == 400 and CONFIG_LOCK_ERROR in _first.text
+    assert _second.status_code == 200 and 'success' in _second.text
+
+
+def test_replies_are_compressed_for_accepting_clients():
+    with PanOsSimulator(rules_count=1, compression='gzip') as _simulator:
+        _response = _post(_simulator, {'type': 'op', 'cmd': '<show><system><info></info></system></show>'},
+                          headers={'Accept-Encoding': 'gzip'}, stream=True)
+        _raw = _response.raw.read()
+
+    assert _response.headers['Content-Encoding'] == 'gzip'
+    assert b'<hostname>simulator</hostname>' in gzip.decompress(_raw)
+
+
+def test_error_injection():
+    with PanOsSimulator(rules_count=1, error_rate=1.0) as _simulator:
+        _response = _post(_simulator, {'type': 'op', 'cmd': '<show><system><info></info></system></show>'})
+
+    assert 'Injected error' in _response.text
+    assert _simulator.requests_counter['op'] == 1
@@ -0,0 +1,51 @@
+import pytest
+
+from pypaloalto_api.configuration_commands import ConfigAction
+from pypaloalto_api.exceptions import PaloAltoException
+from pypaloalto_api.snapshot import ConfigSnapshot, split_xpath
+
+DG_XPATH = "/config/devices/entry[@name='localhost.localdomain']/device-group/entry[@name='DG-1']"
+
+
+def test_split_xpath():
+    assert split_xpath(DG_XPATH + '/address') == [
+        ('config', None), ('devices', None), ('entry', 'localhost.localdomain'), ('device-group', None),
+        ('entry', 'DG-1'), ('address', None),
+    ]
+    assert split_xpath('/config/shared/address/entry[@name="it\'s"]')[-1] == ('entry', "it's")
+    assert split_xpath("/config/shared/address/entry[contains(@name, 'x')]") is None
+
+
+def test_snapshot_answers_like_device(gateway):
+    _snapshot = ConfigSnapshot.fetch(gateway)
+    _xpath = DG_XPATH + "/pre-rulebase/security/rules/entry[@name='rule-3']"
+    _local_reply, _ = _snapshot.xml_api_config_request(ConfigAction.get, _xpath)
+    _device_reply, _ = gateway.xml_api_config_request(ConfigAction.get, _xpath)
+
+    assert _local_reply.find('result').get('count') == '1'
+    assert _local_reply.find('result/entry').get('uuid') == _device_reply.find('result/entry').get('uuid')
+    assert _snapshot.findall(DG_XPATH + '/address/entry') == _snapshot.config_xml.findall(
+        "devices/entry/device-group/entry[@name='DG-1']/address/entry"
+    )
+    assert _snapshot.findall(DG_XPATH + "/address/entry[@name='missing']") == []
+
+
+def test_snapshot_falls_back_to_element_path(gateway):
+    _snapshot = ConfigSnapshot.fetch(gateway)
+
+    assert len(_snapshot.findall(DG_XPATH + "/address/entry[ip-netmask='192.168.1.3/32']")) == 1
+
+
+def test_snapshot_rejects_writes(gateway):
+    with pytest.raises(PaloAltoException):
+        ConfigSnapshot.fetch(gateway).xml_api_config_request(ConfigAction.set, DG_XPATH)
+
+
+def test_save_and_load(gateway, tmp_path):
+    _snapshot = ConfigSnapshot.fetch(gateway)
+    _snapshot.save(tmp_path / 'candidate.xml.gz')
+    _loaded = ConfigSnapshot.load(tmp_path / 'candidate.xml.gz')
+
+    assert _loaded.device_serial == gateway.serial
+    assert _loaded.created_at == _snapshot.created_at
+    assert len(_loaded.findall(DG_XPATH + '/pre-rulebase/security/rules/entry')) == 20
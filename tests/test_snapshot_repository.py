@@ -0,0 +1,123 @@
+import copy
+import xml.etree.ElementTree as ET
+
+import pytest
+
+from pypaloalto_api.enums import SnapshotChangeType
+from pypaloalto_api.snapshot import ConfigSnapshot
+from pypaloalto_api.snapshot_repository import SnapshotRepository, flatten_config, build_config_node, \
+    normalize_xpath, ROOT_KEY
+
+DG_XPATH = "/config/devices/entry[@name='localhost.localdomain']/device-group/entry[@name='DG-1']"
+RULE_XPATH = DG_XPATH + "/pre-rulebase/security/rules/entry[@name='rule-3']"
+ADDRESS_XPATH = DG_XPATH + '/address'
+
+
+def _make_snapshot(config_xml: ET.Element, day: int) -> ConfigSnapshot:
+    return ConfigSnapshot(config_xml, device_serial='007', created_at=f'2024-01-{day:02d} 00:00:00')
+
+
+def _make_history(config_xml: ET.Element) -> list:
+    """Config of day 1, rule-3 description changed on day 2, address added on day 3 and rule-3 removed on day 4"""
+    _configs = [copy.deepcopy(config_xml)]
+
+    _config = copy.deepcopy(_configs[-1])
+    _snapshot = ConfigSnapshot(_config)
+    _snapshot.find(RULE_XPATH).find('description').text = 'Changed on day 2'
+    _configs.append(_config)
+
+    _config = copy.deepcopy(_configs[-1])
+    _snapshot = ConfigSnapshot(_config)
+    _address = ET.SubElement(_snapshot.find(ADDRESS_XPATH), 'entry', {'name': 'new-server'})
+    ET.SubElement(_address, 'ip-netmask').text = '10.10.10.10/32'
+    _configs.append(_config)
+
+    _config = copy.deepcopy(_configs[-1])
+    _snapshot = ConfigSnapshot(_config)
+    _snapshot.find(RULE_XPATH.rsplit('/', 1)[0]).remove(_snapshot.find(RULE_XPATH))
+    _configs.append(_config)
+
+    return _configs
+
+
+def test_flatten_and_build_round_trip(gateway):
+    _config_xml = ConfigSnapshot.fetch(gateway).config_xml
+    _items = flatten_config(_config_xml)
+
+    assert ET.tostring(build_config_node(ROOT_KEY, _items)) == ET.tostring(_config_xml)
+    assert b'<entry name="rule-3" />' in _items[DG_XPATH]
+    assert ET.tostring(build_config_node(RULE_XPATH, _items)) == \
+           ET.tostring(ConfigSnapshot(_config_xml).find(RULE_XPATH))
+
+
+def test_normalize_xpath():
+    assert normalize_xpath('/config/devices/entry[@name="localhost.localdomain"]') == \
+           "/config/devices/entry[@name='localhost.localdomain']"
+
+    with pytest.raises(ValueError):
+        normalize_xpath("/config/devices/entry[contains(@name, 'local')]")
+
+
+@pytest.mark.parametrize('rebase_every', [1, 2, 30])
+def test_snapshots_are_restored_across_bases(gateway, tmp_path, rebase_every):
+    _configs = _make_history(ConfigSnapshot.fetch(gateway).config_xml)
+    _repository = SnapshotRepository(tmp_path / 'snapshots.sqlite', rebase_every=rebase_every)
+    _infos = [_repository.add(_make_snapshot(x, _day)) for _day, x in enumerate(_configs, 1)]
+
+    assert [x.snapshot_id for x in _repository.get_snapshots('007')] == [x.snapshot_id for x in _infos]
+    assert sum(x.is_base for x in _infos) == -(-len(_configs) // rebase_every)
+
+    for _info, _config in zip(_infos, _configs):
+        _restored = _repository.get_snapshot(_info.snapshot_id)
+
+        assert ET.tostring(_restored.config_xml) == ET.tostring(_config)
+        assert _restored.created_at == _info.created_at
+
+    _snapshot = _repository.get_snapshot_at('2024-01-03 12:00:00', '007')
+
+    assert ET.tostring(_snapshot.config_xml) == ET.tostring(_configs[2])
+    assert _repository.get_snapshot_at('2023-12-31 00:00:00', '007') is None
+
+
+def test_history_and_entries(gateway, tmp_path):
+    _configs = _make_history(ConfigSnapshot.fetch(gateway).config_xml)
+    _repository = SnapshotRepository(tmp_path / 'snapshots.sqlite', rebase_every=2)
+    _infos = [_repository.add(_make_snapshot(x, _day)) for _day, x in enumerate(_configs, 1)]
+
+    assert [(x.snapshot_id, x.change_type) for x in _repository.get_history(RULE_XPATH)] == [
+        (_infos[0].snapshot_id, SnapshotChangeType.added),
+        (_infos[1].snapshot_id, SnapshotChangeType.changed),
+        (_infos[3].snapshot_id, SnapshotChangeType.removed),
+    ]
+    # rule-3 of DG-0 is added once and never changed
+    assert [x.xpath for x in _repository.get_rule_history('rule-3')] == [
+        RULE_XPATH.replace('DG-1', 'DG-0'), RULE_XPATH, RULE_XPATH, RULE_XPATH,
+    ]
+    # Device group item keeps stubs of its entries, so it changes with the added address
+    assert {(x.xpath, x.change_type) for x in _repository.get_changes(_infos[2].snapshot_id)} == {
+        (f"{ADDRESS_XPATH}/entry[@name='new-server']", SnapshotChangeType.added),
+        (DG_XPATH, SnapshotChangeType.changed),
+    }
+
+    assert _repository.get_entry(RULE_XPATH, _infos[1].snapshot_id).find('description').text == 'Changed on day 2'
+    assert _repository.get_entry(RULE_XPATH, _infos[3].snapshot_id) is None
+    assert ET.tostring(_repository.get_entry(DG_XPATH, _infos[2].snapshot_id)) == \
+           ET.tostring(ConfigSnapshot(_configs[2]).find(DG_XPATH))
+
+    # Unchanged items are stored once
+    _stats = _repository.get_storage_stats()
+
+    assert _stats['snapshots'] == 4
+    assert _stats['contents'] < 2 * _stats['items']
+
+
+def test_snapshots_must_be_added_in_order(gateway, tmp_path):
+    _config_xml = ConfigSnapshot.fetch(gateway).config_xml
+    _repository = SnapshotRepository(tmp_path / 'snapshots.sqlite')
+    _repository.add(_make_snapshot(_config_xml, 2))
+
+    with pytest.raises(ValueError):
+        _repository.add(_make_snapshot(_config_xml, 1))
+
+    with pytest.raises(ValueError):
+        SnapshotRepository(tmp_path / 'snapshots.sqlite', rebase_every=0)
@@ -0,0 +1,47 @@
+import xml.etree.ElementTree as ET
+
+from pypaloalto_api.tag_index import PanoramaTagIndex
+
+MGMT_DEVICES_XML = '''<result>
+    <entry name="001"><vsys>
+        <entry name="vsys1"><tags><member>site-a</member><member>dmz</member></tags></entry>
+        <entry name="vsys2"><tags><member>site-b</member></tags></entry>
+    </vsys></entry>
+    <entry name="002"><tags><member>site-a</member></tags></entry>
+    <entry name="003"/>
+</result>'''
+
+
+def test_index_by_tag_target_and_serial():
+    _index = PanoramaTagIndex.from_xml(ET.fromstring(MGMT_DEVICES_XML))
+
+    assert _index.tags == {'site-a', 'site-b', 'dmz'}
+    assert _index.get_targets('site-a') == {'001/vsys1', '002'}
+    assert _index.get_targets('unknown') == set()
+    assert _index.get_device_tags('001', 'vsys2') == ['site-b']
+    assert sorted(_index.get_device_tags('001')) == ['dmz', 'site-a', 'site-b']
+    assert _index.get_device_tags('003') == []
+    assert _index.get_tags_by_target()['003'] == []
+
+
+def test_dict_round_trip_and_returned_copies():
+    _index = PanoramaTagIndex.from_xml(ET.fromstring(MGMT_DEVICES_XML))
+    _restored = PanoramaTagIndex.from_dict(_index.to_dict())
+
+    assert _restored.get_tags_by_target() == _index.get_tags_by_target()
+    assert _restored.get_targets('site-a') == _index.get_targets('site-a')
+
+    _restored.get_targets('site-a').add('004')
+    _restored.get_device_tags('002').append('changed')
+
+    assert _restored.get_targets('site-a') == {'001/vsys1', '002'}
+    assert _restored.get_device_tags('002') == ['site-a']
+
+
+def test_panorama_lookups_use_index_without_requests(simulator, panorama):
+    _requests = sum(simulator.requests_counter.values())
+
+    assert panorama.get_device_names_with_panorama_tag('site-1') == {f'{simulator.serial(1)}/vsys1'}
+    assert panorama.get_panorama_tags_by_device_serial(simulator.serial(0), 'vsys1') == ['site-0']
+    assert sum(simulator.requests_counter.values()) == _requests
+    assert panorama.update_panorama_tag_index().get_targets('site-0') == {f'{simulator.serial(x)}/vsys1' for x in (0, 3)}
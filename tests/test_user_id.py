@@ -0,0 +1,67 @@
+import xml.etree.ElementTree as ET
+
+from pypaloalto_api.enums import UidAction
+from pypaloalto_api.user_id import UidEntry, UidMessageBuilder, UserIdPipeline
+
+
+def test_message_escapes_values_and_groups_actions():
+    _message = UidMessageBuilder() \
+        .register('10.0.0.1', 'a<b', timeout_seconds=60, persistent=True) \
+        .login('10.0.0.2', 'corp\\"user"') \
+        .unregister('10.0.0.1', 'old') \
+        .build()
+    _xml = ET.fromstring(_message)
+
+    assert _xml.findtext('payload/register/entry/tag/member') == 'a<b'
+    assert _xml.find('payload/register/entry').get('persistent') == '1'
+    assert _xml.find('payload/register/entry/tag/member').get('timeout') == '60'
+    assert _xml.find('payload/login/entry').get('name') == 'corp\\"user"'
+    assert _xml.findtext('payload/unregister/entry/tag/member') == 'old'
+
+
+def test_split_respects_entries_and_bytes_limits():
+    _entries = [UidEntry(UidAction.register, f'10.1.0.{x}', tag='t') for x in range(10)]
+
+    assert [len(x) for x in UidMessageBuilder.split(_entries, max_entries=4)] == [4, 4, 2]
+
+    _entry_size = len(_entries[0].to_xml())
+    _builders = UidMessageBuilder.split(_entries, max_bytes=UidMessageBuilder().size_bytes + _entry_size * 3)
+
+    assert [len(x) for x in _builders] == [3, 3, 3, 1]
+    assert all(ET.fromstring(x.build()) is not None for x in _builders)
+
+
+def test_pipeline_coalesces_and_registers_tags(simulator, gateway):
+    with UserIdPipeline([gateway], coalesce_window_seconds=60, max_entries_per_message=2) as _pipeline:
+        _pipeline.register('10.2.0.1', 'first')
+        _pipeline.register('10.2.0.1', 'first', timeout_seconds=30)
+        _pipeline.register('10.2.0.1', 'second')
+        _pipeline.register('10.2.0.2', 'first')
+        _pipeline.login('10.2.0.3', 'user1')
+        _pipeline.login('10.2.0.3', 'user2')
+
+    _stats = _pipeline.stats
+
+    assert _stats.entries_received == 6
+    assert _stats.entries_coalesced == 2
+    assert _stats.entries_sent == 4
+    assert _stats.messages_sent == 2
+    assert _stats.entries_failed == _stats.messages_failed == 0
+    assert simulator.registered_ips['10.2.0.1'] == {'first', 'second'}
+    assert simulator.registered_ips['10.2.0.2'] == {'first'}
+    assert not _pipeline.register('10.2.0.4', 'late')
+    assert _pipeline.stats.entries_dropped == 1
+
+
+def test_pipeline_drops_entries_over_pending_limit(gateway):
+    _pipeline = UserIdPipeline([gateway], coalesce_window_seconds=60, max_pending_entries=2)
+
+    try:
+        assert _pipeline.register('10.3.0.1', 't')
+        assert _pipeline.register('10.3.0.2', 't')
+        assert not _pipeline.register('10.3.0.3', 't')
+        assert _pipeline.register('10.3.0.1', 't', timeout_seconds=10)
+    finally:
+        _pipeline.close()
+
+    assert _pipeline.stats.entries_dropped == 1